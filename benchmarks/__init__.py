@@ -0,0 +1 @@
+"""Measurement scripts; run them with ``python -m benchmarks.<name>`` from the repo root."""
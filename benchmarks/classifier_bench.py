@@ -0,0 +1,225 @@
+"""Throughput, latency and accuracy of each classifier on a labelled corpus.
+
+Usage::
+
+    python -m benchmarks.classifier_bench [--classifiers rule_based,ngram,cascade,gemini]
+        [--corpus benchmarks/data/labelled_segments.jsonl] [--rounds 20]
+        [--recorded answers.jsonl] [--stub-latency-ms 0] [--json out.json]
+
+The corpus is JSON lines of ``{"grid": n, "text": ...}``. Even lines train
+the n-gram model, odd lines are the evaluation set for every classifier.
+``gemini`` never leaves the machine: it talks to a local stub responder that
+replays ``--recorded`` answers (``{"text": ..., "answer": {...}}`` lines, as
+returned by the model). Without a recording the stub answers with the corpus
+label, which measures throughput and latency only: accuracy of the tiers that
+reach the stub (``gemini``, ``cascade``) is reported as n/a.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import threading
+import time
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from linus_app.cascade import CascadeClassifier
+from linus_app.circuit_breaker import CircuitBreaker
+from linus_app.classifier import BaseClassifier, ClassificationError, GeminiClassifier, RuleBasedClassifier
+from linus_app.config import GRID_DEFINITIONS
+from linus_app.matcher import normalize
+from linus_app.ngram_classifier import NgramBayesClassifier
+
+DEFAULT_CORPUS = Path(__file__).resolve().parent / "data" / "labelled_segments.jsonl"
+CLASSIFIERS = ("rule_based", "ngram", "cascade", "gemini")
+# Classifiers whose answers (some or all) come from the Gemini stub.
+UPSTREAM = ("cascade", "gemini")
+PARAGRAPH_PREFIX = "Paragraph: "
+
+
+def load_corpus(path: Path) -> List[Tuple[str, int]]:
+    with path.open("r", encoding="utf-8") as fh:
+        return [(record["text"], int(record["grid"])) for record in (json.loads(line) for line in fh if line.strip())]
+
+
+class StubResponder:
+    """Local generateContent endpoint answering from ``answers``; unknown paragraphs get grid 5."""
+
+    def __init__(self, answers: Dict[str, dict], latency_ms: float = 0.0):
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # Buffer the response so headers and body leave in one segment (no Nagle / delayed-ACK stall).
+            wbufsize = -1
+
+            def do_POST(self):  # noqa: N802
+                payload = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                paragraph = payload["contents"][0]["parts"][-1]["text"]
+                answer = answers.get(normalize(paragraph[len(PARAGRAPH_PREFIX):]), {"primary": {"grid": 5}})
+                if latency_ms:
+                    time.sleep(latency_ms / 1000)
+                text = json.dumps(answer, ensure_ascii=False)
+                body = json.dumps({"candidates": [{"content": {"parts": [{"text": text}]}}]}).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self._server.server_address[1]}"
+        threading.Thread(target=self._server.serve_forever, args=(0.05,), daemon=True).start()
+
+    def close(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+
+def stub_answers(corpus: List[Tuple[str, int]], recorded: Optional[Path]) -> Dict[str, dict]:
+    """Recorded answers only, or the corpus labels when there is no recording (timing runs)."""
+    if not recorded:
+        return {normalize(text): {"primary": {"grid": grid, "confidence": 0.9}} for text, grid in corpus}
+    with recorded.open("r", encoding="utf-8") as fh:
+        return {
+            normalize(record["text"]): record["answer"] for record in (json.loads(line) for line in fh if line.strip())
+        }
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    ordered = sorted(samples)
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def evaluate(classifier: BaseClassifier, examples: List[Tuple[str, int]], rounds: int) -> dict:
+    latencies: List[float] = []
+    confusion: Dict[int, Dict[int, int]] = defaultdict(lambda: defaultdict(int))
+    correct = errors = 0
+    started = time.perf_counter()
+    for round_index in range(rounds):
+        for text, label in examples:
+            call_started = time.perf_counter()
+            try:
+                assignments = classifier.classify(text)
+            except ClassificationError:
+                assignments = None
+            latencies.append((time.perf_counter() - call_started) * 1000)
+            if round_index:
+                continue  # quality is deterministic; count it once
+            if not assignments:
+                errors += 1
+                predicted = 0
+            else:
+                predicted = next((a.grid_id for a in assignments if not a.secondary), assignments[0].grid_id)
+            correct += predicted == label
+            confusion[label][predicted] += 1
+    elapsed = time.perf_counter() - started
+    per_grid = {
+        str(grid): round(confusion[grid][grid] / sum(confusion[grid].values()), 3) for grid in sorted(confusion)
+    }
+    return {
+        "segments": len(latencies),
+        "segments_per_sec": round(len(latencies) / elapsed, 1) if elapsed else None,
+        "latency_ms": {
+            "p50": round(percentile(latencies, 50), 3),
+            "p95": round(percentile(latencies, 95), 3),
+            "p99": round(percentile(latencies, 99), 3),
+        },
+        "accuracy": round(correct / len(examples), 3) if examples else None,
+        "errors": errors,
+        "per_grid_accuracy": per_grid,
+        # confusion[label][predicted]; predicted 0 means no answer
+        "confusion": {str(label): {str(pred): n for pred, n in sorted(row.items())} for label, row in sorted(confusion.items())},
+    }
+
+
+def build(name: str, train: List[Tuple[str, int]], stub: Optional[StubResponder]) -> BaseClassifier:
+    rules = RuleBasedClassifier(GRID_DEFINITIONS)
+    if name == "rule_based":
+        return rules
+    ngram = NgramBayesClassifier(GRID_DEFINITIONS, min_examples=1)
+    ngram.learn(train)
+    if name == "ngram":
+        return ngram
+    gemini = GeminiClassifier(
+        "bench-key", "stub", GRID_DEFINITIONS, base_url=stub.url, breaker=CircuitBreaker(failure_threshold=10**6)
+    )
+    if name == "gemini":
+        return gemini
+    return CascadeClassifier([("rule_based", rules), ("ngram", ngram), ("gemini", gemini)])
+
+
+def run(
+    corpus_path: Path,
+    names: List[str],
+    rounds: int,
+    recorded: Optional[Path] = None,
+    stub_latency_ms: float = 0.0,
+) -> dict:
+    corpus = load_corpus(corpus_path)
+    train, test = corpus[0::2], corpus[1::2]
+    needs_stub = any(name in UPSTREAM for name in names)
+    stub = StubResponder(stub_answers(corpus, recorded), stub_latency_ms) if needs_stub else None
+    try:
+        results = {}
+        for name in names:
+            classifier = build(name, train, stub)
+            results[name] = evaluate(classifier, test, rounds)
+            if name in UPSTREAM and not recorded:
+                # The stub answered with the ground truth; these numbers would be 1.0 by construction.
+                results[name].update(accuracy=None, per_grid_accuracy=None, confusion=None, accuracy_stubbed=True)
+            stats = classifier.stats()
+            if "cascade" in stats:
+                results[name]["decided_by"] = stats["cascade"]["decided_by"]
+    finally:
+        if stub:
+            stub.close()
+    return {
+        "corpus": str(corpus_path),
+        "train_size": len(train),
+        "eval_size": len(test),
+        "rounds": rounds,
+        "stub_latency_ms": stub_latency_ms,
+        "results": results,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--classifiers", default=",".join(CLASSIFIERS))
+    parser.add_argument("--corpus", type=Path, default=DEFAULT_CORPUS)
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--recorded", type=Path, help="recorded Gemini answers to replay from the stub")
+    parser.add_argument("--stub-latency-ms", type=float, default=0.0)
+    parser.add_argument("--json", dest="json_path", help="also write the report to this file")
+    args = parser.parse_args()
+
+    names = [name.strip() for name in args.classifiers.split(",") if name.strip()]
+    unknown = set(names) - set(CLASSIFIERS)
+    if unknown:
+        parser.error(f"unknown classifiers: {', '.join(sorted(unknown))}")
+    report = run(args.corpus, names, args.rounds, args.recorded, args.stub_latency_ms)
+    print(f"train {report['train_size']}  eval {report['eval_size']}  rounds {report['rounds']}")
+    for name, row in report["results"].items():
+        latency = row["latency_ms"]
+        accuracy = "n/a (stubbed)" if row["accuracy"] is None else f"{row['accuracy']:.3f}"
+        print(
+            f"{name:10s} {row['segments_per_sec']:>10} seg/s  "
+            f"p50 {latency['p50']:8.3f} ms  p95 {latency['p95']:8.3f} ms  p99 {latency['p99']:8.3f} ms  "
+            f"accuracy {accuracy}"
+        )
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as fh:
+            json.dump(report, fh, indent=2, ensure_ascii=False)
+
+
+if __name__ == "__main__":
+    main()
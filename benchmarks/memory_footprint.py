@@ -0,0 +1,148 @@
+"""Bytes per GridEntry / InsightLogEntry, legacy dict-backed layout vs. current models.
+
+Usage::
+
+    python -m benchmarks.memory_footprint --count 100000 [--json out.json]
+
+Records are built the way hydration builds them: every string comes out of a
+fresh parse, so identical sources are distinct objects unless interned.
+"""
+
+from __future__ import annotations
+
+import argparse
+import gc
+import json
+import random
+import tracemalloc
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Callable, List
+
+from linus_app.models import GridEntry, InsightLogEntry
+
+
+@dataclass
+class LegacyGridEntry:
+    segment_id: str
+    source: str
+    snippet: str
+    status: str
+    related_grids: List[int]
+    confidence: float
+    created_at: datetime
+
+
+@dataclass
+class LegacyInsightLogEntry:
+    segment_id: str
+    grid_id: int
+    action: str
+    similarity: float
+    comment: str
+    created_at: datetime
+
+
+SOURCES = [f"meeting-2024-{month:02d}-{day:02d}" for month in range(1, 13) for day in (5, 20)]
+RELATED = [[], [3], [3, 8], [1, 2], [6]]
+BASE_TIME = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+def _fresh(value: str) -> str:
+    # Round-trip through JSON so the string is a new object, like a parsed state file.
+    return json.loads(json.dumps(value))
+
+
+def _legacy_entry(index: int, rng: random.Random) -> LegacyGridEntry:
+    return LegacyGridEntry(
+        segment_id=f"seg-{index:08x}",
+        source=_fresh(rng.choice(SOURCES)),
+        snippet=f"合約 SOW 條款需要補上 #{index}",
+        status=_fresh("new_entry"),
+        related_grids=list(rng.choice(RELATED)),
+        confidence=0.82,
+        created_at=BASE_TIME + timedelta(seconds=index),
+    )
+
+
+def _compact_entry(index: int, rng: random.Random) -> GridEntry:
+    return GridEntry(
+        segment_id=f"seg-{index:08x}",
+        source=_fresh(rng.choice(SOURCES)),
+        snippet=f"合約 SOW 條款需要補上 #{index}",
+        status=_fresh("new_entry"),
+        related_grids=list(rng.choice(RELATED)),
+        confidence=0.82,
+        created_ts=(BASE_TIME + timedelta(seconds=index)).timestamp(),
+    )
+
+
+def _legacy_log(index: int, rng: random.Random) -> LegacyInsightLogEntry:
+    return LegacyInsightLogEntry(
+        segment_id=f"seg-{index:08x}",
+        grid_id=rng.randint(1, 9),
+        action=_fresh("inserted"),
+        similarity=0.0,
+        comment=_fresh("new_entry_appended"),
+        created_at=BASE_TIME + timedelta(seconds=index),
+    )
+
+
+def _compact_log(index: int, rng: random.Random) -> InsightLogEntry:
+    return InsightLogEntry(
+        segment_id=f"seg-{index:08x}",
+        grid_id=rng.randint(1, 9),
+        action=_fresh("inserted"),
+        similarity=0.0,
+        comment=_fresh("new_entry_appended"),
+        created_ts=(BASE_TIME + timedelta(seconds=index)).timestamp(),
+    )
+
+
+def bytes_per_record(factory: Callable[[int, random.Random], object], count: int) -> float:
+    rng = random.Random(7)
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    records = [factory(index, rng) for index in range(count)]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del records
+    return (after - before) / count
+
+
+def run(count: int) -> dict:
+    report = {}
+    for name, legacy, compact in (
+        ("grid_entry", _legacy_entry, _compact_entry),
+        ("insight_log", _legacy_log, _compact_log),
+    ):
+        before = bytes_per_record(legacy, count)
+        after = bytes_per_record(compact, count)
+        report[name] = {
+            "legacy_bytes": round(before, 1),
+            "compact_bytes": round(after, 1),
+            "saved_pct": round(100 * (before - after) / before, 1),
+        }
+    return {"count": count, "results": report}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--count", type=int, default=100_000)
+    parser.add_argument("--json", dest="json_path", help="also write the report to this file")
+    args = parser.parse_args()
+
+    report = run(args.count)
+    for name, row in report["results"].items():
+        print(
+            f"{name:12s} legacy {row['legacy_bytes']:8.1f} B  "
+            f"compact {row['compact_bytes']:8.1f} B  saved {row['saved_pct']:5.1f}%"
+        )
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as fh:
+            json.dump(report, fh, indent=2)
+
+
+if __name__ == "__main__":
+    main()
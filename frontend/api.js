@@ -14,6 +14,7 @@ async function handleResponse(response) {
 
 export async function fetchGrids() {
   try {
+    // Summary view: the newest few entries per grid plus counts; older items are paged in on demand.
     const response = await fetch(`${API_BASE}/grids`);
     return await handleResponse(response);
   } catch (error) {
@@ -22,6 +23,20 @@ export async function fetchGrids() {
   }
 }
 
+export async function fetchGridItems(gridId, kind, { limit, before } = {}) {
+  try {
+    const params = new URLSearchParams();
+    if (limit) params.set("limit", limit);
+    if (before) params.set("before", before);
+    const query = params.toString();
+    const response = await fetch(`${API_BASE}/grids/${gridId}/${kind}${query ? `?${query}` : ""}`);
+    return await handleResponse(response);
+  } catch (error) {
+    console.error("[API] fetchGridItems failed:", error);
+    throw error;
+  }
+}
+
 export async function fetchSegmentLog(segmentId) {
   try {
     const response = await fetch(`${API_BASE}/segments/${segmentId}/log`);
@@ -9,7 +9,7 @@ import {
 import { renderMandalaBoard, renderOverviewBoard } from "./renderBoard.js";
 import { renderDetailPanel } from "./renderDetail.js";
 import { renderSearchResults } from "./renderSearch.js";
-import { loadGrids } from "./modules/data.js";
+import { loadGrids, loadOlderItems } from "./modules/data.js";
 import { SearchModule } from "./modules/search.js";
 import { NavigationModule } from "./modules/navigation.js";
 import { SegmentModule } from "./modules/segment.js";
@@ -61,7 +61,8 @@ const MandalaModule = {
   render: render,
   renderBoard: () => renderMandalaBoard(DOM.gridBoard, DOM.detailPanel, handleNavigate),
   renderOverview: () => renderOverviewBoard(DOM.overviewBoard, handleNavigate),
-  renderDetail: () => renderDetailPanel(DOM.detailPanel, getGrid(getState().currentGridId), DOM.logModal, DOM.logList),
+  renderDetail: () =>
+    renderDetailPanel(DOM.detailPanel, getGrid(getState().currentGridId), DOM.logModal, DOM.logList, handleLoadMore),
   updateControls: () => NavigationModule.updateControls(DOM.breadcrumb),
 };
 
@@ -158,6 +159,18 @@ function setViewModeHandler(mode) {
   MandalaModule.render();
 }
 
+async function handleLoadMore(kind) {
+  const gridId = getState().currentGridId;
+  try {
+    await loadOlderItems(gridId, kind);
+  } catch (error) {
+    console.warn("[loadMore] 載入失敗", error);
+  }
+  if (getState().currentGridId === gridId) {
+    MandalaModule.renderDetail();
+  }
+}
+
 function handleSearch() {
   const handleNavigate = (targetGridId) => {
     NavigationModule.jumpToGrid(targetGridId);
@@ -1,7 +1,12 @@
-import { fetchGrids } from "../api.js";
-import { setGrids } from "../store.js";
+import { fetchGridItems, fetchGrids } from "../api.js";
+import { getGrid, getState, setGrids, updateGrid } from "../store.js";
 import { fallbackGrids } from "../data/fallback.js";
 
+const PAGE_SIZE = 50;
+// Largest page the API serves (pagination.MAX_LIMIT); used when search needs every entry.
+const MAX_PAGE_SIZE = 200;
+const ITEM_KEYS = { entries: "entries", needs_review: "needsReview" };
+
 export async function loadGrids() {
     try {
         console.log("正在嘗試從 API 載入資料...");
@@ -22,18 +27,63 @@ export async function loadGrids() {
     }
 }
 
+/**
+ * Page in older entries / needs_review items of one grid (kind is the API name).
+ * The summary view only carries the newest few; the first call replaces them with the newest page.
+ */
+export async function loadOlderItems(gridId, kind, limit = PAGE_SIZE) {
+    const grid = getGrid(gridId);
+    const cursor = grid?.cursors?.[kind];
+    // undefined: only the summary items are loaded; null: everything is loaded.
+    // Built-in fallback grids have no cursors and nothing to page in.
+    if (!grid?.cursors || cursor === null) return;
+    const page = await fetchGridItems(gridId, kind, { limit, before: cursor });
+    const older = [...page.items].reverse();
+    const key = ITEM_KEYS[kind];
+    const current = getGrid(gridId);
+    updateGrid(gridId, {
+        [key]: cursor === undefined ? older : [...older, ...current[key]],
+        cursors: { ...current.cursors, [kind]: page.next_cursor },
+    });
+}
+
+/** Search runs over every entry, so page in whatever the summary view left out. */
+export async function loadAllEntries() {
+    await Promise.all(
+        getState().grids.map(async (grid) => {
+            while (hasOlderItems(getGrid(grid.gridId), "entries")) {
+                await loadOlderItems(grid.gridId, "entries", MAX_PAGE_SIZE);
+            }
+        })
+    );
+}
+
+export function hasOlderItems(grid, kind) {
+    return Boolean(grid?.cursors) && grid.cursors[kind] !== null;
+}
+
 function normalizeGrid(raw) {
     if (!raw) return raw;
+    const entries = raw.entries ?? [];
+    const needsReview = raw.needs_review ?? raw.needsReview ?? [];
+    const entryCount = raw.entry_count ?? entries.length;
+    const needsReviewCount = raw.needs_review_count ?? raw.needsReviewCount ?? needsReview.length;
     return {
         gridId: raw.grid_id ?? raw.gridId,
         title: raw.title,
         persona: raw.persona || "",
         summary: raw.summary ?? [],
-        entries: raw.entries ?? [],
-        needsReview: raw.needs_review ?? raw.needsReview ?? [],
+        entries,
+        needsReview,
+        entryCount,
+        needsReviewCount,
+        // Cursor towards older items for each kind; null once everything is loaded.
+        cursors: {
+            entries: entries.length >= entryCount ? null : undefined,
+            needs_review: needsReview.length >= needsReviewCount ? null : undefined,
+        },
         updatedAt: raw.updated_at ?? raw.updatedAt ?? "",
         mandala: raw.mandala,
         hasNewEntry: raw.hasNewEntry ?? false,
-        needsReviewCount: raw.needs_review ? raw.needs_review.length : raw.needsReviewCount ?? 0,
     };
 }
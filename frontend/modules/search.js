@@ -1,8 +1,15 @@
 import { getState, setSearchResults } from "../store.js";
 import { renderSearchResults } from "../renderSearch.js";
+import { loadAllEntries } from "./data.js";
 
 export const SearchModule = {
-    filter: (searchInputEl, gridFilterEl, statusFilterEl, resultsListEl, resultCountEl, detailPanelEl, onNavigate) => {
+    filter: async (searchInputEl, gridFilterEl, statusFilterEl, resultsListEl, resultCountEl, detailPanelEl, onNavigate) => {
+        try {
+            // /api/grids only carries the newest entries; search pages in the rest once.
+            await loadAllEntries();
+        } catch (error) {
+            console.warn("[search] 無法載入全部 entries，只搜尋已載入的部分", error);
+        }
         const keyword = searchInputEl.value.trim().toLowerCase();
         const gridFilter = gridFilterEl.value;
         const statusFilter = statusFilterEl.value;
@@ -79,7 +79,7 @@ function renderItemCard(card, clone, slot, mandala, onNavigate) {
 }
 
 function updateReviewStatus(card, targetGrid) {
-    const needsCount = (targetGrid?.needsReview?.length || 0);
+    const needsCount = targetGrid?.needsReviewCount ?? (targetGrid?.needsReview?.length || 0);
     const flag = card.querySelector(".needs-review-flag");
     if (flag) {
         if (needsCount > 0) {
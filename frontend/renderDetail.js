@@ -1,7 +1,8 @@
 import { getState } from "./store.js";
 import { fetchSegmentLog } from "./api.js";
+import { hasOlderItems } from "./modules/data.js";
 
-export function renderDetailPanel(detailPanelEl, grid, logModalEl, logListEl) {
+export function renderDetailPanel(detailPanelEl, grid, logModalEl, logListEl, onLoadMore) {
   if (!grid) {
     detailPanelEl.innerHTML =
       "<div class='placeholder'><h2>沒有資料</h2><p>請確認 API 是否回傳內容。</p></div>";
@@ -13,8 +14,8 @@ export function renderDetailPanel(detailPanelEl, grid, logModalEl, logListEl) {
       <h2>${grid.title}</h2>
       <p>
         ${grid.persona}
-        ${grid.needsReview?.length
-      ? `<span class="detail-needs-review">需覆核 ${grid.needsReview.length}</span>`
+        ${needsReviewCount(grid)
+      ? `<span class="detail-needs-review">需覆核 ${needsReviewCount(grid)}</span>`
       : ""
     }
       </p>
@@ -27,15 +28,16 @@ export function renderDetailPanel(detailPanelEl, grid, logModalEl, logListEl) {
     </section>
     <section class="entries">
       <div class="section-header">
-        <h3>Entries (${grid.entries.length})</h3>
+        <h3>Entries (${renderCount(grid.entries.length, grid.entryCount)})</h3>
       </div>
       <ul class="entries-list">
         ${grid.entries.map(renderEntry).join("")}
       </ul>
+      ${renderLoadMore(grid, "entries")}
     </section>
     <section>
       <div class="section-header">
-        <h3>Needs Review (${grid.needsReview.length})</h3>
+        <h3>Needs Review (${renderCount(grid.needsReview.length, grid.needsReviewCount)})</h3>
       </div>
       <ul class="needs-review-list">
         ${grid.needsReview.length
@@ -43,6 +45,7 @@ export function renderDetailPanel(detailPanelEl, grid, logModalEl, logListEl) {
       : "<li>無待覆核段落</li>"
     }
       </ul>
+      ${renderLoadMore(grid, "needs_review")}
     </section>
     ${renderMandalaDetail(grid)}
   `;
@@ -50,6 +53,28 @@ export function renderDetailPanel(detailPanelEl, grid, logModalEl, logListEl) {
   detailPanelEl.querySelectorAll(".action-view-log").forEach((button) => {
     button.addEventListener("click", () => openLogModal(button.dataset.segmentId, logModalEl, logListEl));
   });
+  detailPanelEl.querySelectorAll(".action-load-more").forEach((button) => {
+    button.addEventListener("click", () => {
+      button.disabled = true;
+      onLoadMore?.(button.dataset.kind);
+    });
+  });
+}
+
+function needsReviewCount(grid) {
+  return grid.needsReviewCount ?? grid.needsReview?.length ?? 0;
+}
+
+// The summary view only carries the newest items; show how many of the total are loaded.
+function renderCount(loaded, total) {
+  return total != null && total > loaded ? `${loaded} / ${total}` : `${loaded}`;
+}
+
+function renderLoadMore(grid, kind) {
+  if (!hasOlderItems(grid, kind)) {
+    return "";
+  }
+  return `<button class="action-load-more" data-kind="${kind}">載入更早的項目</button>`;
 }
 
 function renderEntry(entry) {
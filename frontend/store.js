@@ -35,6 +35,10 @@ export function setGrids(newGrids) {
     updateState({ grids: [...newGrids] });
 }
 
+export function updateGrid(gridId, updates) {
+    updateState({ grids: state.grids.map((grid) => (grid.gridId === gridId ? { ...grid, ...updates } : grid)) });
+}
+
 export function getGrid(gridId) {
     return state.grids.find((item) => item.gridId === gridId);
 }
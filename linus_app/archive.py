@@ -0,0 +1,93 @@
+"""Compressed cold storage for InsightLog history evicted from memory.
+
+Segment logs are hashed into a fixed number of bucket files of gzipped JSON
+lines, one line per segment. A spill of new segments appends one gzip member
+to the bucket (concatenated members are still a valid gzip stream); a spill
+that supersedes a segment already archived rewrites that bucket without the
+old line. The ids in the archive are indexed once at startup, so looking up a
+segment that was never archived does not open any file.
+"""
+
+from __future__ import annotations
+
+import gzip
+import json
+import os
+import threading
+import zlib
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, Iterator, List, Set, Tuple
+
+
+class LogArchive:
+    def __init__(self, directory: Path, buckets: int = 64):
+        self._directory = directory
+        self._buckets = buckets
+        self._lock = threading.Lock()
+        self._segments: Set[str] = set()
+        for path in sorted(directory.glob("logs-*.jsonl.gz")) if directory.is_dir() else ():
+            self._segments.update(self._read_bucket(path))
+
+    def _bucket_path(self, segment_id: str) -> Path:
+        bucket = zlib.crc32(segment_id.encode("utf-8")) % self._buckets
+        return self._directory / f"logs-{bucket:02x}.jsonl.gz"
+
+    @staticmethod
+    def _read_bucket(path: Path) -> Dict[str, List[dict]]:
+        """``{segment_id: history}`` in a bucket; buckets written before compaction may repeat an id, the last wins."""
+        histories: Dict[str, List[dict]] = {}
+        with gzip.open(path, "rt", encoding="utf-8") as fh:
+            for line in fh:
+                if line.strip():
+                    record = json.loads(line)
+                    histories[record["segment_id"]] = record["history"]
+        return histories
+
+    def spill(self, histories: Dict[str, List[dict]]) -> None:
+        """Store ``{segment_id: [log dict, ...]}``, replacing any earlier history of the same segments."""
+        by_bucket: Dict[Path, Dict[str, List[dict]]] = defaultdict(dict)
+        for segment_id, history in histories.items():
+            by_bucket[self._bucket_path(segment_id)][segment_id] = history
+        with self._lock:
+            self._directory.mkdir(parents=True, exist_ok=True)
+            for path, spilled in by_bucket.items():
+                if self._segments.isdisjoint(spilled):
+                    with gzip.open(path, "at", encoding="utf-8") as fh:
+                        fh.write("".join(_line(segment_id, history) for segment_id, history in spilled.items()))
+                else:
+                    merged = {**self._read_bucket(path), **spilled} if path.exists() else dict(spilled)
+                    tmp_path = path.with_name(path.name + ".tmp")
+                    with gzip.open(tmp_path, "wt", encoding="utf-8") as fh:
+                        fh.write("".join(_line(segment_id, history) for segment_id, history in merged.items()))
+                    os.replace(tmp_path, path)
+                self._segments.update(spilled)
+
+    def load(self, segment_id: str) -> List[dict]:
+        path = self._bucket_path(segment_id)
+        with self._lock:
+            if segment_id not in self._segments or not path.exists():
+                return []
+            needle = json.dumps(segment_id, ensure_ascii=False)
+            history: List[dict] = []
+            with gzip.open(path, "rt", encoding="utf-8") as fh:
+                for line in fh:
+                    if needle not in line:
+                        continue
+                    record = json.loads(line)
+                    if record["segment_id"] == segment_id:
+                        history = record["history"]
+        return history
+
+    def iter_all(self) -> Iterator[Tuple[str, List[dict]]]:
+        """Every archived ``(segment_id, history)``, one bucket in memory at a time."""
+        with self._lock:
+            paths = sorted(self._directory.glob("logs-*.jsonl.gz")) if self._directory.is_dir() else []
+        for path in paths:
+            with self._lock:
+                histories = self._read_bucket(path)
+            yield from histories.items()
+
+
+def _line(segment_id: str, history: List[dict]) -> str:
+    return json.dumps({"segment_id": segment_id, "history": history}, ensure_ascii=False) + "\n"
@@ -0,0 +1,92 @@
+"""Confidence-gated cascade over several classifiers.
+
+Tiers run cheapest first. A tier's answer is accepted when its primary
+confidence reaches the threshold and the runner-up grid trails by at least
+the margin; otherwise the paragraph escalates to the next tier. The last
+tier always decides. Every returned assignment records the deciding tier.
+"""
+
+from __future__ import annotations
+
+import threading
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+from .classifier import BaseClassifier, BatchResult, ClassificationError
+from .models import GridAssignment
+
+
+class CascadeClassifier(BaseClassifier):
+    def __init__(
+        self,
+        tiers: Sequence[Tuple[str, BaseClassifier]],
+        threshold: float = 0.8,
+        margin: float = 0.1,
+    ):
+        if not tiers:
+            raise ValueError("A cascade needs at least one tier")
+        self._tiers = list(tiers)
+        self._threshold = threshold
+        self._margin = margin
+        self._lock = threading.Lock()
+        self._decided: Dict[str, int] = {name: 0 for name, _ in self._tiers}
+        self.parallel_batch_size = self._tiers[-1][1].parallel_batch_size
+        self.trainable = any(tier.trainable for _, tier in self._tiers)
+
+    def classify(self, text: str) -> List[GridAssignment]:
+        return self._unwrap(self.classify_batch([text])[0])
+
+    def classify_batch(self, texts: Sequence[str]) -> List[BatchResult]:
+        results: List[BatchResult] = [[] for _ in texts]
+        pending = list(range(len(texts)))
+        for position, (name, tier) in enumerate(self._tiers):
+            last = position == len(self._tiers) - 1
+            answers = tier.classify_batch([texts[index] for index in pending])
+            escalate = []
+            for index, answer in zip(pending, answers):
+                if not last and (isinstance(answer, ClassificationError) or not self._confident(answer)):
+                    escalate.append(index)
+                    continue
+                results[index] = self._decided_by(name, answer)
+            pending = escalate
+            if not pending:
+                break
+        return results
+
+    def _confident(self, assignments: List[GridAssignment]) -> bool:
+        if not assignments:
+            return False
+        ranked = sorted((assignment.confidence for assignment in assignments), reverse=True)
+        runner_up = ranked[1] if len(ranked) > 1 else 0.0
+        return ranked[0] >= self._threshold and ranked[0] - runner_up >= self._margin
+
+    def _decided_by(self, name: str, answer: BatchResult) -> BatchResult:
+        if isinstance(answer, ClassificationError):
+            return answer
+        with self._lock:
+            self._decided[name] += 1
+        for assignment in answer:
+            assignment.tier = name
+        return answer
+
+    @staticmethod
+    def _unwrap(result: BatchResult) -> List[GridAssignment]:
+        if isinstance(result, ClassificationError):
+            raise result
+        return result
+
+    def learn(self, examples: Iterable[Tuple[str, int]]) -> int:
+        trainable = [tier for _, tier in self._tiers if tier.trainable]
+        if len(trainable) > 1:
+            examples = list(examples)
+        return max((tier.learn(examples) for tier in trainable), default=0)
+
+    def stats(self) -> dict:
+        with self._lock:
+            decided = dict(self._decided)
+        merged: dict = {"cascade": {"decided_by": decided, "threshold": self._threshold, "margin": self._margin}}
+        for _, tier in self._tiers:
+            merged.update(tier.stats())
+        return merged
+
+    def circuit_state(self) -> str | None:
+        return next((state for _, tier in self._tiers if (state := tier.circuit_state()) is not None), None)
@@ -0,0 +1,98 @@
+"""Circuit breaker for the upstream classifier.
+
+``closed``: calls go through; consecutive failures are counted.
+``open``: after ``failure_threshold`` failures in a row (or an upstream
+``Retry-After`` longer than we are willing to wait) calls are refused until
+the cool-down ends, so requests fall back to the rule-based classifier at
+once instead of waiting on timeouts.
+``half_open``: after the cool-down a single probe call is let through; its
+success closes the breaker, its failure opens it for another cool-down.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from typing import Callable, Optional
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        cooldown_seconds: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self._failure_threshold = failure_threshold
+        self._cooldown_seconds = cooldown_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._failures = 0
+        self._open_until = 0.0
+        self._probe_in_flight = False
+        self._times_opened = 0
+        self._rejected = 0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._current_state()
+
+    def _current_state(self) -> str:
+        if self._state == OPEN and self._clock() >= self._open_until:
+            self._state = HALF_OPEN
+            self._probe_in_flight = False
+        return self._state
+
+    def allow(self) -> bool:
+        """Whether a call may go upstream now; in half-open only one probe is admitted."""
+        with self._lock:
+            state = self._current_state()
+            if state == CLOSED:
+                return True
+            if state == HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            self._rejected += 1
+            return False
+
+    def release(self) -> None:
+        """Give back an admitted call that never went upstream, freeing the half-open probe."""
+        with self._lock:
+            self._probe_in_flight = False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._state = CLOSED
+            self._failures = 0
+            self._probe_in_flight = False
+
+    def record_failure(self, retry_after: Optional[float] = None) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._state == HALF_OPEN or self._failures >= self._failure_threshold or retry_after:
+                self._open(max(self._cooldown_seconds, retry_after or 0.0))
+
+    def _open(self, seconds: float) -> None:
+        self._state = OPEN
+        self._open_until = self._clock() + seconds
+        self._probe_in_flight = False
+        self._times_opened += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            state = self._current_state()
+            return {
+                "state": state,
+                "consecutive_failures": self._failures,
+                "failure_threshold": self._failure_threshold,
+                "cooldown_seconds": self._cooldown_seconds,
+                "retry_in_seconds": round(max(0.0, self._open_until - self._clock()), 1) if state == OPEN else 0.0,
+                "times_opened": self._times_opened,
+                "rejected_calls": self._rejected,
+            }
@@ -0,0 +1,182 @@
+"""Content-addressed cache in front of an upstream classifier.
+
+Keys hash the whitespace-normalized text together with the classifier name,
+model and a fingerprint of the grid definitions, so editing the cheat sheet
+or switching models never serves stale answers. Entries are kept in LRU
+order with an optional TTL and appended to a JSON-lines file that is
+replayed on startup and rewritten once it holds too many stale lines.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import asdict
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from .classifier import BaseClassifier, BatchResult, ClassificationError
+from .config import GridDefinition
+from .matcher import normalize
+from .models import GridAssignment
+
+
+def definitions_fingerprint(grid_definitions: Dict[int, GridDefinition]) -> str:
+    encoded = json.dumps(
+        [asdict(grid_definitions[grid_id]) for grid_id in sorted(grid_definitions)],
+        ensure_ascii=False,
+        sort_keys=True,
+    )
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()[:12]
+
+
+class CachedClassifier(BaseClassifier):
+    def __init__(
+        self,
+        inner: BaseClassifier,
+        name: str,
+        model: str,
+        grid_definitions: Dict[int, GridDefinition],
+        max_entries: int = 2048,
+        ttl_seconds: Optional[float] = None,
+        path: Optional[Path] = None,
+        clock: Callable[[], float] = time.time,
+    ):
+        self._inner = inner
+        self._namespace = f"{name}\0{model}\0{definitions_fingerprint(grid_definitions)}\0"
+        self._max_entries = max_entries
+        self._ttl_seconds = ttl_seconds
+        self._path = path
+        self._clock = clock
+        self._lock = threading.Lock()
+        # key -> (stored_at, assignments as dicts)
+        self._entries: "OrderedDict[str, Tuple[float, List[dict]]]" = OrderedDict()
+        self._file_lines = 0
+        self.hits = 0
+        self.misses = 0
+        self.parallel_batch_size = inner.parallel_batch_size
+        self.trainable = inner.trainable
+        if path is not None:
+            self._load()
+
+    def key(self, text: str) -> str:
+        return hashlib.sha256((self._namespace + normalize(text)).encode("utf-8")).hexdigest()
+
+    def classify(self, text: str) -> List[GridAssignment]:
+        key = self.key(text)
+        cached = self._get(key)
+        if cached is not None:
+            return cached
+        assignments = self._inner.classify(text)
+        self._put({key: assignments})
+        return assignments
+
+    def classify_batch(self, texts: Sequence[str]) -> List[BatchResult]:
+        keys = [self.key(text) for text in texts]
+        results: List[Optional[BatchResult]] = [self._get(key) for key in keys]
+        missing = [index for index, result in enumerate(results) if result is None]
+        if missing:
+            fresh = self._inner.classify_batch([texts[index] for index in missing])
+            stored: Dict[str, List[GridAssignment]] = {}
+            for index, result in zip(missing, fresh):
+                results[index] = result
+                if not isinstance(result, ClassificationError):
+                    stored[keys[index]] = result
+            self._put(stored)
+        return results
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            cache = {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+                "entries": len(self._entries),
+                "max_entries": self._max_entries,
+                "ttl_seconds": self._ttl_seconds,
+            }
+        return {"cache": cache, **self._inner.stats()}
+
+    def circuit_state(self) -> str | None:
+        return self._inner.circuit_state()
+
+    def learn(self, examples: Iterable[Tuple[str, int]]) -> int:
+        return self._inner.learn(examples)
+
+    def _get(self, key: str) -> Optional[List[GridAssignment]]:
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is not None and self._expired(cached[0]):
+                del self._entries[key]
+                cached = None
+            if cached is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        return [GridAssignment(**item) for item in cached[1]]
+
+    def _put(self, fresh: Dict[str, List[GridAssignment]]) -> None:
+        if not fresh:
+            return
+        now = self._clock()
+        lines = []
+        with self._lock:
+            for key, assignments in fresh.items():
+                encoded = [asdict(assignment) for assignment in assignments]
+                self._entries[key] = (now, encoded)
+                self._entries.move_to_end(key)
+                lines.append(json.dumps({"key": key, "at": now, "assignments": encoded}, ensure_ascii=False))
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+            if self._path is not None:
+                self._persist(lines)
+
+    def _expired(self, stored_at: float) -> bool:
+        return self._ttl_seconds is not None and self._clock() - stored_at > self._ttl_seconds
+
+    def _load(self) -> None:
+        if not self._path.exists():
+            return
+        with self._path.open("r", encoding="utf-8") as fh:
+            for line in fh:
+                self._file_lines += 1
+                try:
+                    record = json.loads(line)
+                    key, stored_at, assignments = record["key"], float(record["at"]), record["assignments"]
+                except (ValueError, KeyError, TypeError):
+                    continue  # torn tail from an interrupted append
+                if self._expired(stored_at):
+                    continue
+                self._entries[key] = (stored_at, assignments)
+                self._entries.move_to_end(key)
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+
+    def _persist(self, lines: List[str]) -> None:
+        try:
+            self._path.parent.mkdir(parents=True, exist_ok=True)
+            if self._file_lines + len(lines) > 2 * self._max_entries:
+                self._rewrite()
+                return
+            with self._path.open("a", encoding="utf-8") as fh:
+                fh.write("\n".join(lines) + "\n")
+            self._file_lines += len(lines)
+        except OSError as exc:
+            # The cache is an optimisation; a read-only disk must not fail classification.
+            print(f"[Cache] could not persist classification cache: {exc}", file=sys.stderr)
+
+    def _rewrite(self) -> None:
+        tmp_path = self._path.with_name(self._path.name + ".tmp")
+        with tmp_path.open("w", encoding="utf-8") as fh:
+            for key, (stored_at, assignments) in self._entries.items():
+                fh.write(json.dumps({"key": key, "at": stored_at, "assignments": assignments}, ensure_ascii=False))
+                fh.write("\n")
+        os.replace(tmp_path, self._path)
+        self._file_lines = len(self._entries)
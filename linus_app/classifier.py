@@ -4,39 +4,82 @@ from __future__ import annotations
 
 import json
 import os
-import re
+import random
+import sys
+import time
+from email.utils import parsedate_to_datetime
 from abc import ABC, abstractmethod
-from typing import Dict, List, Tuple
+from typing import TYPE_CHECKING, Callable, Dict, Iterable, List, Optional, Sequence, Tuple, Union
 
-from urllib import request, parse, error
+from urllib import parse
 
+from .circuit_breaker import CircuitBreaker
 from .config import GRID_DEFINITIONS, GridDefinition
+from .http_pool import ConnectionPool
+from .matcher import KeywordHits, shared_matcher
 from .models import GridAssignment
 
+if TYPE_CHECKING:
+    from .quota import QuotaScheduler
+
 
 class ClassificationError(Exception):
     """Raised when an upstream classifier fails."""
 
 
+class CircuitOpenError(ClassificationError):
+    """Raised without calling upstream while the circuit breaker is open."""
+
+
+class QuotaRejectedError(ClassificationError):
+    """Raised without calling upstream when the quota scheduler cannot fit a call before its deadline."""
+
+
+BatchResult = Union[List[GridAssignment], ClassificationError]
+
+
 class BaseClassifier(ABC):
+    # Batch size worth classifying on its own worker thread; None keeps batches inline (local, CPU-bound).
+    parallel_batch_size: int | None = None
+    # Whether learn() uses labelled examples; the service only feeds entries to trainable classifiers.
+    trainable = False
+
     @abstractmethod
     def classify(self, text: str) -> List[GridAssignment]:
         ...
 
+    def classify_batch(self, texts: Sequence[str]) -> List[BatchResult]:
+        """Classify several texts in order; a failed item yields its error instead of raising."""
+        results: List[BatchResult] = []
+        for text in texts:
+            try:
+                results.append(self.classify(text))
+            except ClassificationError as exc:
+                results.append(exc)
+        return results
+
+    def learn(self, examples: Iterable[Tuple[str, int]]) -> int:
+        """Train on ``(text, grid_id)`` pairs; returns how many were used."""
+        return 0
+
+    def stats(self) -> dict:
+        """Counters reported under ``/api/stats``; plain classifiers have none."""
+        return {}
+
+    def circuit_state(self) -> str | None:
+        """Circuit breaker state of an upstream classifier, ``None`` for local ones."""
+        return None
+
 
 class RuleBasedClassifier(BaseClassifier):
     """Keyword matcher derived from prompt table (fallback when Gemini not available)."""
 
     def __init__(self, grid_definitions: Dict[int, GridDefinition] | None = None):
         self._definitions = grid_definitions or GRID_DEFINITIONS
-        self._keyword_map: Dict[int, List[str]] = {
-            grid_id: [kw.lower() for kw in definition.keywords]
-            for grid_id, definition in self._definitions.items()
-        }
+        self._matcher = shared_matcher(self._definitions)
 
     def classify(self, text: str) -> List[GridAssignment]:
-        normalized = re.sub(r"\s+", "", text.lower())
-        scored = self._score_grids(normalized)
+        scored = self._score_grids(self._matcher.scan(text))
         if not scored:
             return []
         assignments: List[GridAssignment] = []
@@ -64,10 +107,10 @@ class RuleBasedClassifier(BaseClassifier):
             )
         return assignments
 
-    def _score_grids(self, normalized_text: str) -> List[Tuple[int, float, List[str]]]:
+    def _score_grids(self, hits: KeywordHits) -> List[Tuple[int, float, List[str]]]:
         scored: List[Tuple[int, float, List[str]]] = []
-        for grid_id, keywords in self._keyword_map.items():
-            matched = [kw for kw in keywords if kw and kw in normalized_text]
+        for grid_id in self._definitions:
+            matched = list(hits.for_grid(grid_id))
             score = float(len(matched))
             scored.append((grid_id, score, matched))
 
@@ -87,16 +130,50 @@ class RuleBasedClassifier(BaseClassifier):
 class GeminiClassifier(BaseClassifier):
     """Calls Gemini model with structured prompt to classify segments."""
 
-    BASE_URL = "https://generativelanguage.googleapis.com/v1/models/{model}:generateContent"
+    BASE_URL = "https://generativelanguage.googleapis.com"
+    PATH = "/v1/models/{model}:generateContent"
+    # One request carries at most this many paragraphs / characters of paragraph text.
+    MAX_BATCH_ITEMS = 20
+    MAX_BATCH_CHARS = 12000
+    # Jittered exponential backoff between retries; a longer Retry-After is not waited out.
+    BACKOFF_BASE_SECONDS = 0.5
+    BACKOFF_MAX_SECONDS = 8.0
+    MAX_RETRY_WAIT_SECONDS = 10.0
+    # Quota estimate: paragraphs are mostly CJK (about a token per character, fewer for
+    # English), plus room for the JSON answer of each paragraph.
+    CHARS_PER_TOKEN = 2
+    ANSWER_TOKENS = 128
 
-    def __init__(self, api_key: str, model: str):
+    def __init__(
+        self,
+        api_key: str,
+        model: str,
+        grid_definitions: Dict[int, GridDefinition] | None = None,
+        max_batch_items: int | None = None,
+        max_batch_chars: int | None = None,
+        base_url: str | None = None,
+        pool_size: int = 4,
+        timeout: float = 20.0,
+        breaker: CircuitBreaker | None = None,
+        sleep: Callable[[float], None] = time.sleep,
+        scheduler: "QuotaScheduler | None" = None,
+    ):
         self._api_key = api_key
         self._model = model
+        # Keep-alive connections shared by every thread classifying through this instance.
+        self._pool = ConnectionPool(base_url or self.BASE_URL, max_connections=pool_size, timeout=timeout)
+        self._breaker = breaker or CircuitBreaker()
+        self._sleep = sleep
+        self._scheduler = scheduler
+        self._definitions = grid_definitions or GRID_DEFINITIONS
+        self._max_batch_items = max_batch_items or self.MAX_BATCH_ITEMS
+        self._max_batch_chars = max_batch_chars or self.MAX_BATCH_CHARS
+        self.parallel_batch_size = self._max_batch_items
         self._prompt = self._build_prompt()
 
     def _build_prompt(self) -> str:
         bullets = []
-        for grid_id, definition in GRID_DEFINITIONS.items():
+        for grid_id, definition in self._definitions.items():
             keywords = ", ".join(definition.keywords)
             bullets.append(
                 f"{grid_id}. {definition.title} - Persona: {definition.persona} - Keywords: {keywords}"
@@ -133,37 +210,182 @@ class GeminiClassifier(BaseClassifier):
         data = self._call_gemini_with_retry(payload)
         return self._parse_response(data)
 
-    def _call_gemini_with_retry(self, payload: dict, max_retries: int = 3) -> dict:
+    def classify_batch(self, texts: Sequence[str]) -> List[BatchResult]:
+        results: List[BatchResult] = [[] for _ in texts]
+        pending = [(index, text.strip()) for index, text in enumerate(texts) if text.strip()]
+        for chunk in self._split_batches(pending):
+            if len(chunk) == 1:
+                index, text = chunk[0]
+                results[index] = self._classify_or_error(text)
+                continue
+            try:
+                data = self._call_gemini_with_retry(
+                    self._batch_payload([text for _, text in chunk]), paragraphs=len(chunk)
+                )
+            except ClassificationError as exc:
+                for index, _ in chunk:
+                    results[index] = exc
+                continue
+            parsed = self._parse_batch_response(data, len(chunk))
+            for position, (index, text) in enumerate(chunk):
+                item = parsed[position]
+                # A paragraph the batch answer did not cover cleanly is asked about on its own.
+                results[index] = item if item is not None else self._classify_or_error(text)
+        return results
+
+    def _classify_or_error(self, text: str) -> BatchResult:
+        try:
+            return self.classify(text)
+        except ClassificationError as exc:
+            return exc
+
+    def _split_batches(self, items: List[Tuple[int, str]]) -> List[List[Tuple[int, str]]]:
+        batches: List[List[Tuple[int, str]]] = []
+        current: List[Tuple[int, str]] = []
+        size = 0
+        for item in items:
+            length = len(item[1])
+            if current and (len(current) >= self._max_batch_items or size + length > self._max_batch_chars):
+                batches.append(current)
+                current, size = [], 0
+            current.append(item)
+            size += length
+        if current:
+            batches.append(current)
+        return batches
+
+    def _batch_payload(self, texts: List[str]) -> dict:
+        paragraphs = "\n".join(f"[{index}] {text}" for index, text in enumerate(texts))
+        return {
+            "contents": [
+                {
+                    "parts": [
+                        {"text": self._prompt},
+                        {
+                            "text": (
+                                f"Classify each of the {len(texts)} numbered paragraphs below independently.\n"
+                                "Respond with a JSON array only, one object per paragraph in the same order, "
+                                'each shaped like the object above plus "index": the paragraph number.'
+                            )
+                        },
+                        {"text": f"Paragraphs:\n{paragraphs}"},
+                    ]
+                }
+            ],
+            "safetySettings": [],
+            "generationConfig": {"temperature": 0.1, "topP": 0.9, "topK": 32},
+        }
+
+    def _call_gemini_with_retry(self, payload: dict, max_retries: int = 3, paragraphs: int = 1) -> dict:
+        if not self._breaker.allow():
+            raise CircuitOpenError("Gemini circuit open; using rule-based classifier")
+        estimated = self._estimate_tokens(payload, paragraphs)
         params = {"key": self._api_key}
         data_bytes = json.dumps(payload).encode("utf-8")
-        url = f"{self.BASE_URL.format(model=self._model)}?{parse.urlencode(params)}"
-        req = request.Request(url, data=data_bytes, headers={"Content-Type": "application/json"})
-        
+        path = f"{self.PATH.format(model=self._model)}?{parse.urlencode(params)}"
+        headers = {"Content-Type": "application/json"}
+
         last_error = None
         for attempt in range(max_retries):
+            retry_after = None
+            if self._scheduler is not None:
+                try:
+                    self._scheduler.acquire(estimated)
+                except QuotaRejectedError:
+                    self._breaker.release()
+                    raise
             try:
-                with request.urlopen(req, timeout=20) as resp:
-                    return json.load(resp)
-            except error.HTTPError as exc:
-                last_error = exc
-                if exc.code >= 500 and attempt < max_retries - 1:
-                    continue  # Retry on server errors
-                raise ClassificationError(f"Gemini HTTP {exc.code}") from exc
+                resp = self._pool.request("POST", path, body=data_bytes, headers=headers)
             except Exception as exc:
                 last_error = exc
-                if attempt < max_retries - 1:
-                    continue
-                raise ClassificationError(str(exc)) from exc
-        
-        raise ClassificationError(f"Max retries exceeded: {last_error}")
+                retryable = True
+            else:
+                if resp.status < 400:
+                    self._breaker.record_success()
+                    try:
+                        data = json.loads(resp.body)
+                    except ValueError as exc:
+                        raise ClassificationError(f"Gemini response parsing error: {exc}") from exc
+                    if self._scheduler is not None:
+                        usage = data.get("usageMetadata") if isinstance(data, dict) else None
+                        self._scheduler.record_usage(estimated, (usage or {}).get("totalTokenCount"))
+                    return data
+                last_error = f"Gemini HTTP {resp.status}"
+                retryable = resp.status >= 500 or resp.status == 429
+                retry_after = self._retry_after(resp.headers.get("retry-after"))
+            if not retryable or attempt == max_retries - 1:
+                break
+            delay = self._backoff(attempt) if retry_after is None else retry_after
+            if delay > self.MAX_RETRY_WAIT_SECONDS:
+                break
+            self._sleep(delay)
+        # Upstream asked for a longer pause than we wait inline: keep the breaker open that long.
+        self._breaker.record_failure(retry_after if retry_after and retry_after > self.MAX_RETRY_WAIT_SECONDS else None)
+        if isinstance(last_error, Exception):
+            raise ClassificationError(str(last_error)) from last_error
+        raise ClassificationError(last_error or "Max retries exceeded")
+
+    def _estimate_tokens(self, payload: dict, paragraphs: int) -> int:
+        chars = sum(len(part.get("text", "")) for content in payload["contents"] for part in content["parts"])
+        return chars // self.CHARS_PER_TOKEN + self.ANSWER_TOKENS * paragraphs
+
+    def _backoff(self, attempt: int) -> float:
+        ceiling = min(self.BACKOFF_MAX_SECONDS, self.BACKOFF_BASE_SECONDS * (2 ** attempt))
+        return random.uniform(ceiling / 2, ceiling)
+
+    @staticmethod
+    def _retry_after(value: Optional[str]) -> Optional[float]:
+        """Seconds to wait from a ``Retry-After`` header (delta seconds or HTTP date)."""
+        if not value:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+        try:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+        except (TypeError, ValueError):
+            return None
+
+    def circuit_state(self) -> str | None:
+        return self._breaker.state
+
+    def stats(self) -> dict:
+        stats = {"http": self._pool.stats(), "circuit": self._breaker.stats()}
+        if self._scheduler is not None:
+            stats["quota"] = self._scheduler.stats()
+        return stats
 
     def _parse_response(self, data: dict) -> List[GridAssignment]:
         try:
             text_response = data["candidates"][0]["content"]["parts"][0]["text"]
             parsed = json.loads(text_response)
+            return self._assignments_from(parsed)
         except Exception as exc:
             raise ClassificationError(f"Gemini response parsing error: {exc}") from exc
 
+    def _parse_batch_response(self, data: dict, expected: int) -> List[List[GridAssignment] | None]:
+        """Per-paragraph assignments, or ``None`` for paragraphs missing or malformed in the answer."""
+        results: List[List[GridAssignment] | None] = [None] * expected
+        try:
+            items = json.loads(data["candidates"][0]["content"]["parts"][0]["text"])
+        except Exception as exc:
+            print(f"[Classifier] Gemini batch response unreadable, retrying per item: {exc}", file=sys.stderr)
+            return results
+        if not isinstance(items, list):
+            return results
+        for position, item in enumerate(items):
+            if not isinstance(item, dict) or not isinstance(item.get("primary"), dict):
+                continue
+            try:
+                index = int(item.get("index", position))
+                if 0 <= index < expected and results[index] is None:
+                    results[index] = self._assignments_from(item)
+            except (KeyError, ValueError, TypeError):
+                continue
+        return results
+
+    def _assignments_from(self, parsed: dict) -> List[GridAssignment]:
         assignments: List[GridAssignment] = []
         primary = parsed.get("primary") or {}
         grid_id = int(primary.get("grid", 5))
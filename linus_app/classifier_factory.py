@@ -1,21 +1,170 @@
 """Factory for building classifiers with fallback."""
 
+from pathlib import Path
+
 from .classifier import BaseClassifier, RuleBasedClassifier, GeminiClassifier, ClassificationError
+from .cascade import CascadeClassifier
+from .circuit_breaker import CircuitBreaker
+from .classification_cache import CachedClassifier
 from .config import GRID_DEFINITIONS
+from .ngram_classifier import NgramBayesClassifier
+from .quota import BULK, INTERACTIVE, QuotaScheduler, shared_scheduler
+from .storage_factory import SQLITE_SCHEME
 import os
 
 
-def build_classifier() -> tuple[BaseClassifier, BaseClassifier]:
-    """Returns (primary_classifier, fallback_classifier)."""
-    fallback = RuleBasedClassifier(GRID_DEFINITIONS)
-    
+def build_classifier() -> tuple[tuple[str, BaseClassifier], tuple[str, BaseClassifier]]:
+    """Returns ((primary_name, primary_classifier), (fallback_name, fallback_classifier)).
+
+    ``LINUS_CLASSIFIER`` picks the primary: ``gemini`` (default when an API key
+    is set), ``ngram``, ``rule_based`` or ``cascade``, which runs the tiers in
+    ``LINUS_CASCADE_TIERS`` (default ``rule_based,gemini``) cheapest first.
+    ``LINUS_FALLBACK_CLASSIFIER`` is ``rule_based`` (default) or ``ngram``.
+    """
+    rules = RuleBasedClassifier(GRID_DEFINITIONS)
+    available: dict = {"rule_based": rules, "gemini": _build_gemini()}
+    mode = os.getenv("LINUS_CLASSIFIER", "").lower()
+    tier_names = [name.strip() for name in os.getenv("LINUS_CASCADE_TIERS", "rule_based,gemini").split(",")]
+    fallback_mode = os.getenv("LINUS_FALLBACK_CLASSIFIER", "rule_based").lower()
+    ngram_with_rules = None
+    if "ngram" in (mode, fallback_mode) or (mode == "cascade" and "ngram" in tier_names):
+        available["ngram"] = NgramBayesClassifier(
+            GRID_DEFINITIONS, min_examples=int(os.getenv("LINUS_NGRAM_MIN_EXAMPLES", "20"))
+        )
+        # As primary or fallback the model must always answer: keyword rules cover for it until it is trained.
+        ngram_with_rules = CascadeClassifier(
+            [("ngram", available["ngram"]), ("rule_based", rules)], threshold=0.0, margin=0.0
+        )
+
+    fallback = ("ngram", ngram_with_rules) if fallback_mode == "ngram" else ("rule_based", rules)
+    if mode == "cascade":
+        tiers = [(name, available[name]) for name in tier_names if available.get(name) is not None]
+        if len(tiers) > 1:
+            cascade = CascadeClassifier(
+                tiers,
+                threshold=float(os.getenv("LINUS_CASCADE_THRESHOLD", "0.8")),
+                margin=float(os.getenv("LINUS_CASCADE_MARGIN", "0.1")),
+            )
+            return ("cascade", cascade), fallback
+    if mode == "ngram":
+        return ("ngram", ngram_with_rules), fallback
+    if mode == "rule_based":
+        return ("rule_based", rules), fallback
+    if available["gemini"] is None:
+        return fallback, fallback
+    return ("gemini", available["gemini"]), fallback
+
+
+def build_shadow_classifier() -> tuple[str, BaseClassifier] | None:
+    """Returns (label, classifier) for shadow comparison, or None when shadowing is off.
+
+    ``LINUS_SHADOW_CLASSIFIER`` is ``gemini`` (model from ``LINUS_SHADOW_GEMINI_MODEL``,
+    default ``GEMINI_MODEL``), ``ngram``, ``rule_based`` or ``cascade`` over
+    ``LINUS_SHADOW_CASCADE_TIERS`` (default ``LINUS_CASCADE_TIERS``). Shadow Gemini
+    calls skip the classification cache so their latency is the real one.
+    """
+    mode = os.getenv("LINUS_SHADOW_CLASSIFIER", "").lower()
+    if not mode:
+        return None
+    rules = RuleBasedClassifier(GRID_DEFINITIONS)
+    model = os.getenv("LINUS_SHADOW_GEMINI_MODEL") or None
+
+    def build(name: str) -> BaseClassifier | None:
+        if name == "rule_based":
+            return rules
+        if name == "ngram":
+            return NgramBayesClassifier(GRID_DEFINITIONS, min_examples=int(os.getenv("LINUS_NGRAM_MIN_EXAMPLES", "20")))
+        if name == "gemini":
+            return _build_gemini(model, cache=False)
+        return None
+
+    if mode == "cascade":
+        default_tiers = os.getenv("LINUS_CASCADE_TIERS", "rule_based,gemini")
+        names = [name.strip() for name in os.getenv("LINUS_SHADOW_CASCADE_TIERS", default_tiers).split(",")]
+        tiers = [(name, tier) for name, tier in ((name, build(name)) for name in names) if tier is not None]
+        if len(tiers) < 2:
+            return None
+        classifier = CascadeClassifier(
+            tiers,
+            threshold=float(os.getenv("LINUS_CASCADE_THRESHOLD", "0.8")),
+            margin=float(os.getenv("LINUS_CASCADE_MARGIN", "0.1")),
+        )
+        return f"cascade:{'+'.join(name for name, _ in tiers)}", classifier
+    classifier = build(mode)
+    if classifier is None:
+        return None
+    if mode == "gemini":
+        return f"gemini:{model or os.getenv('GEMINI_MODEL', 'gemini-2.0-flash-exp')}", classifier
+    return mode, classifier
+
+
+def _build_gemini(model: str | None = None, cache: bool = True) -> BaseClassifier | None:
     api_key = os.getenv("GEMINI_API_KEY")
     if not api_key:
-        return fallback, fallback
+        return None
     
-    model = os.getenv("GEMINI_MODEL", "gemini-2.0-flash-exp")
+    model = model or os.getenv("GEMINI_MODEL", "gemini-2.0-flash-exp")
     try:
-        gemini = GeminiClassifier(api_key, model, GRID_DEFINITIONS)
-        return gemini, fallback
+        batch_size = os.getenv("GEMINI_BATCH_SIZE")
+        gemini = GeminiClassifier(
+            api_key,
+            model,
+            GRID_DEFINITIONS,
+            max_batch_items=int(batch_size) if batch_size else None,
+            base_url=os.getenv("GEMINI_BASE_URL") or None,
+            pool_size=int(os.getenv("GEMINI_POOL_SIZE", "4")),
+            timeout=float(os.getenv("GEMINI_TIMEOUT", "20")),
+            breaker=CircuitBreaker(
+                failure_threshold=int(os.getenv("GEMINI_BREAKER_THRESHOLD", "5")),
+                cooldown_seconds=float(os.getenv("GEMINI_BREAKER_COOLDOWN", "30")),
+            ),
+            scheduler=_quota_scheduler(),
+        )
+        return _with_cache(gemini, "gemini", model) if cache else gemini
     except Exception:
-        return fallback, fallback
+        return None
+
+
+def _quota_scheduler() -> QuotaScheduler | None:
+    """Process-wide Gemini quota scheduler when GEMINI_RPM and/or GEMINI_TPM are set."""
+    rpm = os.getenv("GEMINI_RPM")
+    tpm = os.getenv("GEMINI_TPM")
+    if not rpm and not tpm:
+        return None
+    return shared_scheduler(
+        requests_per_minute=float(rpm) if rpm else None,
+        tokens_per_minute=float(tpm) if tpm else None,
+        headroom=float(os.getenv("GEMINI_QUOTA_HEADROOM", "0.9")),
+        max_queue=int(os.getenv("GEMINI_QUOTA_MAX_QUEUE", "64")),
+        deadlines={
+            INTERACTIVE: float(os.getenv("GEMINI_QUOTA_DEADLINE_INTERACTIVE", "10")),
+            BULK: float(os.getenv("GEMINI_QUOTA_DEADLINE_BULK", "120")),
+        },
+    )
+
+
+def _with_cache(classifier: BaseClassifier, name: str, model: str) -> BaseClassifier:
+    """Wrap an upstream classifier in the persistent cache unless LINUS_CLASSIFY_CACHE=0."""
+    if os.getenv("LINUS_CLASSIFY_CACHE", "1") == "0":
+        return classifier
+    ttl = os.getenv("LINUS_CLASSIFY_CACHE_TTL")
+    return CachedClassifier(
+        classifier,
+        name,
+        model,
+        GRID_DEFINITIONS,
+        max_entries=int(os.getenv("LINUS_CLASSIFY_CACHE_SIZE", "2048")),
+        ttl_seconds=float(ttl) if ttl else None,
+        path=_cache_path(),
+    )
+
+
+def _cache_path() -> Path:
+    """``LINUS_CLASSIFY_CACHE_PATH``, or ``classify_cache.jsonl`` next to the state file."""
+    configured = os.getenv("LINUS_CLASSIFY_CACHE_PATH")
+    if configured:
+        return Path(configured)
+    location = os.getenv("LINUS_STATE_PATH", "data/linus_state.json")
+    if location.startswith(SQLITE_SCHEME):
+        location = location[len(SQLITE_SCHEME):]
+    return Path(location).parent / "classify_cache.jsonl"
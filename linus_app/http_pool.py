@@ -0,0 +1,185 @@
+"""Thread-safe keep-alive connection pool for the upstream classifier.
+
+Connections to one origin are kept open between calls and shared across
+threads, so a classification pays the TCP + TLS handshake only when a pooled
+connection is missing or has gone stale. Every call records a latency
+breakdown (connect, time to first byte, total).
+"""
+
+from __future__ import annotations
+
+import http.client
+import select
+import ssl
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+# Errors that mean a reused keep-alive connection was closed underneath us.
+_STALE_ERRORS = (http.client.RemoteDisconnected, http.client.BadStatusLine, BrokenPipeError, ConnectionResetError)
+
+
+@dataclass(slots=True)
+class CallTiming:
+    connect_ms: float
+    ttfb_ms: float
+    total_ms: float
+    reused: bool
+
+
+@dataclass(slots=True)
+class PooledResponse:
+    status: int
+    headers: Dict[str, str]
+    body: bytes
+    timing: CallTiming
+
+
+class ConnectionPool:
+    def __init__(
+        self,
+        base_url: str,
+        max_connections: int = 4,
+        timeout: float = 20.0,
+        max_idle_seconds: float = 60.0,
+        ssl_context: Optional[ssl.SSLContext] = None,
+    ):
+        parts = urlsplit(base_url)
+        if parts.scheme not in ("http", "https"):
+            raise ValueError(f"Unsupported scheme in {base_url}")
+        self._scheme = parts.scheme
+        self._host = parts.hostname or ""
+        self._port = parts.port
+        self._timeout = timeout
+        self._max_idle_seconds = max_idle_seconds
+        self._ssl_context = ssl_context
+        self._slots = threading.BoundedSemaphore(max_connections)
+        self._lock = threading.Lock()
+        self._idle: List[Tuple[http.client.HTTPConnection, float]] = []
+        self.max_connections = max_connections
+        self._calls = 0
+        self._opened = 0
+        self._reused = 0
+        self._totals = {"connect_ms": 0.0, "ttfb_ms": 0.0, "total_ms": 0.0}
+        self._last: Optional[CallTiming] = None
+
+    def request(
+        self, method: str, path: str, body: Optional[bytes] = None, headers: Optional[Dict[str, str]] = None
+    ) -> PooledResponse:
+        with self._slots:
+            conn, reused = self._checkout()
+            try:
+                try:
+                    response = self._send(conn, reused, method, path, body, headers or {})
+                except _STALE_ERRORS:
+                    conn.close()
+                    if not reused:
+                        raise
+                    # The server dropped an idle connection between our health check and the send.
+                    conn, reused = self._new_connection(), False
+                    response = self._send(conn, reused, method, path, body, headers or {})
+            except BaseException:
+                conn.close()
+                raise
+        self._record(response.timing)
+        return response
+
+    def _send(
+        self,
+        conn: http.client.HTTPConnection,
+        reused: bool,
+        method: str,
+        path: str,
+        body: Optional[bytes],
+        headers: Dict[str, str],
+    ) -> PooledResponse:
+        started = time.perf_counter()
+        if conn.sock is None:
+            conn.connect()
+        connected = time.perf_counter()
+        conn.request(method, path, body=body, headers=headers)
+        resp = conn.getresponse()
+        first_byte = time.perf_counter()
+        payload = resp.read()
+        finished = time.perf_counter()
+        if resp.will_close:
+            conn.close()
+        else:
+            self._checkin(conn)
+        timing = CallTiming(
+            connect_ms=round((connected - started) * 1000, 2),
+            ttfb_ms=round((first_byte - connected) * 1000, 2),
+            total_ms=round((finished - started) * 1000, 2),
+            reused=reused,
+        )
+        return PooledResponse(resp.status, {key.lower(): value for key, value in resp.getheaders()}, payload, timing)
+
+    def _checkout(self) -> Tuple[http.client.HTTPConnection, bool]:
+        while True:
+            with self._lock:
+                if not self._idle:
+                    break
+                conn, last_used = self._idle.pop()
+            if self._healthy(conn, last_used):
+                return conn, True
+            conn.close()
+        return self._new_connection(), False
+
+    def _healthy(self, conn: http.client.HTTPConnection, last_used: float) -> bool:
+        if conn.sock is None or time.monotonic() - last_used > self._max_idle_seconds:
+            return False
+        # An idle keep-alive socket must not be readable: readability means EOF or stray bytes.
+        try:
+            readable, _, _ = select.select([conn.sock], [], [], 0)
+        except (OSError, ValueError):
+            return False
+        return not readable
+
+    def _checkin(self, conn: http.client.HTTPConnection) -> None:
+        with self._lock:
+            self._idle.append((conn, time.monotonic()))
+
+    def _new_connection(self) -> http.client.HTTPConnection:
+        with self._lock:
+            self._opened += 1
+        if self._scheme == "https":
+            return http.client.HTTPSConnection(
+                self._host, self._port, timeout=self._timeout, context=self._ssl_context
+            )
+        return http.client.HTTPConnection(self._host, self._port, timeout=self._timeout)
+
+    def _record(self, timing: CallTiming) -> None:
+        with self._lock:
+            self._calls += 1
+            self._reused += int(timing.reused)
+            self._totals["connect_ms"] += timing.connect_ms
+            self._totals["ttfb_ms"] += timing.ttfb_ms
+            self._totals["total_ms"] += timing.total_ms
+            self._last = timing
+
+    def stats(self) -> dict:
+        with self._lock:
+            calls = self._calls or 1
+            return {
+                "calls": self._calls,
+                "connections_opened": self._opened,
+                "reused": self._reused,
+                "idle": len(self._idle),
+                "max_connections": self.max_connections,
+                "avg_ms": {key: round(total / calls, 2) for key, total in self._totals.items()},
+                "last_ms": None
+                if self._last is None
+                else {
+                    "connect": self._last.connect_ms,
+                    "ttfb": self._last.ttfb_ms,
+                    "total": self._last.total_ms,
+                },
+            }
+
+    def close(self) -> None:
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn, _ in idle:
+            conn.close()
@@ -2,46 +2,129 @@
 
 from __future__ import annotations
 
-import re
+import threading
+from array import array
 from collections import defaultdict
 from datetime import datetime, timezone
-from typing import Dict, List, Optional, Set
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
 
 from .config import GRID_DEFINITIONS, GridDefinition
-from .models import GridAssignment, GridCell, GridEntry, InsightLogEntry, Segment
+from .matcher import shared_matcher
+from .minhash import LSHIndex, MinHasher
+from .models import ChangeSet, GridAssignment, GridCell, GridEntry, InsightLogEntry, Segment
 from .summary import SummaryBuilder
 
 
-def _normalize(text: str) -> str:
-    return re.sub(r"\s+", "", text.lower())
+SIMILARITY_MODES = ("keywords", "minhash")
+
+
+class _CellIndex:
+    """Duplicate-lookup index of one cell's entries.
+
+    ``keywords``: keyword bit -> entries whose snippet has that keyword.
+    ``minhash``: LSH buckets over the entries' snippet signatures.
+    """
+
+    __slots__ = ("entries", "indexed", "postings", "lsh")
+
+    def __init__(self, entries: List[GridEntry], lsh: Optional[LSHIndex] = None):
+        self.entries = entries
+        self.indexed = 0
+        self.postings: Dict[int, List[GridEntry]] = defaultdict(list)
+        self.lsh = lsh
+
+    def add(self, entry: GridEntry) -> None:
+        if self.lsh is not None:
+            self.lsh.add(entry, entry.minhash)
+            return
+        mask = entry.keyword_mask
+        while mask:
+            low = mask & -mask
+            self.postings[low].append(entry)
+            mask ^= low
 
 
 class GridIntegrator:
     def __init__(
         self,
         grid_definitions: Dict[int, GridDefinition] | None = None,
+        log_max_age_seconds: Optional[float] = None,
+        log_max_segments: Optional[int] = None,
+        similarity: str = "keywords",
     ):
+        if similarity not in SIMILARITY_MODES:
+            raise ValueError(f"Unknown similarity mode {similarity}")
         self._definitions = grid_definitions or GRID_DEFINITIONS
         self._summary_builder = SummaryBuilder(self._definitions)
         self.cells: Dict[int, GridCell] = {
             grid_id: GridCell(definition=definition, summary=list(definition.fallback_summary))
             for grid_id, definition in self._definitions.items()
         }
-        self._keyword_pool: Set[str] = {
-            kw.lower() for definition in self._definitions.values() for kw in definition.keywords if kw
-        }
-        self._grid_keywords: Dict[int, Set[str]] = {
-            grid_id: {kw.lower() for kw in definition.keywords if kw}
-            for grid_id, definition in self._definitions.items()
-        }
+        self._matcher = shared_matcher(self._definitions)
         self._logs: Dict[str, List[InsightLogEntry]] = defaultdict(list)
+        self._changes = ChangeSet()
+        self._cell_loader: Optional[Callable[[GridCell], None]] = None
+        self._log_loader: Optional[Callable[[str], List[InsightLogEntry]]] = None
+        self._loaded_cells: Set[int] = set()
+        self._indexes: Dict[int, _CellIndex] = {}
+        # "keywords" compares grid keyword sets; "minhash" compares snippet text (near-duplicates).
+        self._similarity = similarity
+        self._minhasher = MinHasher() if similarity == "minhash" else None
+        self._load_lock = threading.Lock()
+        # Hot-log retention; _logs is kept ordered by last activity so eviction pops from the front.
+        self._log_max_age_seconds = log_max_age_seconds
+        self._log_max_segments = log_max_segments
+
+    def set_loaders(
+        self,
+        cell_loader: Optional[Callable[[GridCell], None]] = None,
+        log_loader: Optional[Callable[[str], List[InsightLogEntry]]] = None,
+    ) -> None:
+        """Let a lazily-hydrating store fill cells and segment logs on first use."""
+        self._cell_loader = cell_loader
+        self._log_loader = log_loader
+
+    def cell(self, grid_id: int) -> Optional[GridCell]:
+        cell = self.cells.get(grid_id)
+        if cell is None or grid_id in self._loaded_cells:
+            return cell
+        with self._load_lock:
+            if grid_id not in self._loaded_cells:
+                if self._cell_loader:
+                    self._cell_loader(cell)
+                self._cell_index(cell)
+                self._loaded_cells.add(grid_id)
+        return cell
+
+    def segment_log(self, segment_id: str) -> List[InsightLogEntry]:
+        if segment_id in self._logs:
+            return self._logs[segment_id]
+        return self._log_loader(segment_id) if self._log_loader else []
 
     def process(self, segment: Segment, assignments: List[GridAssignment]) -> dict:
+        return self.process_batch([(segment, assignments)])[0]
+
+    def process_batch(self, items: Iterable[Tuple[Segment, List[GridAssignment]]]) -> List[dict]:
+        """Apply segments in order and refresh each touched cell's summary once at the end.
+
+        Outcomes and the final state are the same as calling ``process`` on each in turn:
+        a summary only depends on the cell's entries and its newest insert.
+        """
+        newest: Dict[int, GridEntry] = {}
+        outcomes = [self._apply(segment, assignments, newest) for segment, assignments in items]
+        for grid_id, entry in newest.items():
+            cell = self.cells[grid_id]
+            self._summary_builder.refresh(cell, latest_entry=entry)
+            # The entry bump in _apply came before this refresh; a response cached in between is stale.
+            cell.version += 1
+        return outcomes
+
+    def _apply(self, segment: Segment, assignments: List[GridAssignment], newest: Dict[int, GridEntry]) -> dict:
         if not assignments:
             return {}
         primary = next((assign for assign in assignments if not assign.secondary), assignments[0])
         related = [assign.grid_id for assign in assignments if assign.secondary]
-        cell = self.cells[primary.grid_id]
+        cell = self.cell(primary.grid_id)
         now = datetime.now(timezone.utc)
 
         snippet = segment.text.strip().replace("\n", " ")
@@ -50,10 +133,16 @@ class GridIntegrator:
         if primary.confidence < 0.6:
             entry = self._build_entry(segment, primary, snippet, "needs_review", related, now)
             cell.needs_review.append(entry)
+            cell.version += 1
+            self._changes.needs_review.append((primary.grid_id, entry))
             self._log(segment.id, primary.grid_id, "marked_review", 0.0, "low_confidence")
             return self._outcome(primary, "needs_review", related, "低置信度，需人工確認")
 
-        similarity = self._max_similarity(segment.text, cell)
+        if self._minhasher is not None:
+            signature = self._minhasher.signature(snippet)
+            similarity = self._max_text_similarity(signature, cell)
+        else:
+            similarity = self._max_similarity(segment.text, cell)
         if similarity >= 0.85:
             self._log(segment.id, primary.grid_id, "merged", similarity, "similarity>=0.85")
             return self._outcome(primary, "merged", related, "與既有摘要相似，維持原條目")
@@ -61,12 +150,21 @@ class GridIntegrator:
         if similarity >= 0.7:
             entry = self._build_entry(segment, primary, snippet, "needs_review", related, now)
             cell.needs_review.append(entry)
+            cell.version += 1
+            self._changes.needs_review.append((primary.grid_id, entry))
             self._log(segment.id, primary.grid_id, "marked_review", similarity, "similarity_in_gray_zone")
             return self._outcome(primary, "needs_review", related, "相似度介於 0.7~0.85，需人工決定")
 
         entry = self._build_entry(segment, primary, snippet, "new_entry", related, now)
+        if self._minhasher is not None:
+            entry.minhash = signature
+        else:
+            entry.keyword_mask = self._matcher.scan(snippet).mask(primary.grid_id)
         cell.entries.append(entry)
-        self._summary_builder.refresh(cell, latest_entry=entry)
+        self._changes.entries.append((primary.grid_id, entry))
+        newest[primary.grid_id] = entry
+        cell.version += 1
+        self._changes.summaries.add(primary.grid_id)
         self._log(segment.id, primary.grid_id, "inserted", similarity, "new_entry_appended")
         return self._outcome(primary, "new_entry", related, "新增 insight 已寫入摘要")
 
@@ -86,7 +184,7 @@ class GridIntegrator:
             status=status,
             related_grids=related_grids,
             confidence=assignment.confidence,
-            created_at=created_at,
+            created_ts=created_at.timestamp(),
         )
 
     def _outcome(
@@ -101,31 +199,62 @@ class GridIntegrator:
         }
 
     def _max_similarity(self, text: str, cell: GridCell) -> float:
+        """Best keyword overlap between ``text`` and the cell's entries.
+
+        Overlap is |shared keywords| / min(|keywords of either side|), computed on the
+        entries' keyword bitmasks; only entries sharing at least one keyword are visited.
+        """
         if not cell.entries:
             return 0.0
-        tokens = self._extract_tokens(text, cell.definition.grid_id)
-        if not tokens:
+        query = self._matcher.scan(text).mask(cell.definition.grid_id)
+        if not query:
             return 0.0
-        similarities = [
-            self._overlap(tokens, self._extract_tokens(entry.snippet or "", cell.definition.grid_id))
-            for entry in cell.entries
-        ]
-        return max(similarities) if similarities else 0.0
-
-    def _extract_tokens(self, text: str, grid_id: Optional[int] = None) -> Set[str]:
-        normalized = _normalize(text)
-        keyword_source = self._grid_keywords.get(grid_id) if grid_id else self._keyword_pool
-        return {kw for kw in (keyword_source or set()) if kw in normalized}
-
-    @staticmethod
-    def _overlap(tokens_a: Set[str], tokens_b: Set[str]) -> float:
-        if not tokens_a and not tokens_b:
-            return 1.0
-        if not tokens_a or not tokens_b:
+        index = self._cell_index(cell)
+        query_size = query.bit_count()
+        best = 0.0
+        seen: Set[int] = set()
+        bits = query
+        while bits:
+            low = bits & -bits
+            bits ^= low
+            for entry in index.postings.get(low, ()):
+                if id(entry) in seen:
+                    continue
+                seen.add(id(entry))
+                mask = entry.keyword_mask
+                overlap = (query & mask).bit_count() / min(query_size, mask.bit_count())
+                if overlap > best:
+                    best = overlap
+                    if best >= 1.0:
+                        return best
+        return best
+
+    def _max_text_similarity(self, signature: array, cell: GridCell) -> float:
+        """Best estimated shingle Jaccard between a snippet and the LSH candidates of the cell."""
+        if not cell.entries:
             return 0.0
-        intersection = len(tokens_a & tokens_b)
-        denominator = min(len(tokens_a), len(tokens_b)) or 1
-        return intersection / denominator
+        index = self._cell_index(cell)
+        best = 0.0
+        for entry in index.lsh.candidates(signature):
+            best = max(best, MinHasher.similarity(signature, entry.minhash))
+        return best
+
+    def _cell_index(self, cell: GridCell) -> _CellIndex:
+        """The cell's index, catching up on entries added (or reloaded) since it was last used."""
+        grid_id = cell.definition.grid_id
+        index = self._indexes.get(grid_id)
+        if index is None or index.entries is not cell.entries or index.indexed > len(cell.entries):
+            lsh = LSHIndex(self._minhasher.num_perm) if self._minhasher is not None else None
+            index = self._indexes[grid_id] = _CellIndex(cell.entries, lsh)
+        for entry in cell.entries[index.indexed:]:
+            if self._minhasher is not None:
+                if entry.minhash is None:
+                    entry.minhash = self._minhasher.signature(entry.snippet or "")
+            elif entry.keyword_mask is None:
+                entry.keyword_mask = self._matcher.scan(entry.snippet or "").mask(grid_id)
+            index.add(entry)
+        index.indexed = len(cell.entries)
+        return index
 
     def _log(self, segment_id: str, grid_id: int, action: str, similarity: float, comment: str) -> None:
         entry = InsightLogEntry(
@@ -134,9 +263,37 @@ class GridIntegrator:
             action=action,
             similarity=round(similarity, 2),
             comment=comment,
-            created_at=datetime.now(timezone.utc),
+            created_ts=datetime.now(timezone.utc).timestamp(),
         )
-        self._logs[segment_id].append(entry)
+        history = self._logs.pop(segment_id, None)
+        if history is None:
+            # Page in earlier (possibly archived) history so the hot list stays complete.
+            history = list(self._log_loader(segment_id)) if self._log_loader else []
+            if history:
+                self._changes.paged_logs[segment_id] = list(history)
+        history.append(entry)
+        self._logs[segment_id] = history
+        self._changes.logs.append(entry)
+
+    def evict_logs(self, now: Optional[float] = None) -> Dict[str, List[InsightLogEntry]]:
+        """Drop segment logs beyond the retention policy from memory and return them."""
+        now = now if now is not None else datetime.now(timezone.utc).timestamp()
+        cutoff = now - self._log_max_age_seconds if self._log_max_age_seconds is not None else None
+        evicted: Dict[str, List[InsightLogEntry]] = {}
+        while self._logs:
+            segment_id, history = next(iter(self._logs.items()))
+            over_count = self._log_max_segments is not None and len(self._logs) > self._log_max_segments
+            too_old = cutoff is not None and (not history or history[-1].created_ts < cutoff)
+            if not (over_count or too_old):
+                break
+            evicted[segment_id] = self._logs.pop(segment_id)
+        self._changes.evicted_logs.update(evicted)
+        return evicted
+
+    def drain_changes(self) -> ChangeSet:
+        """Hand over the accumulated change set and start a fresh one."""
+        changes, self._changes = self._changes, ChangeSet()
+        return changes
 
     @property
     def logs(self) -> Dict[str, List[InsightLogEntry]]:
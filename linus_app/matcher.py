@@ -0,0 +1,127 @@
+"""Single-pass keyword matcher shared by the classifier and the integrator.
+
+All grid keywords are compiled into one Aho–Corasick automaton, so finding
+every keyword hit (with the grids it belongs to) costs one walk over the
+normalized text regardless of how many keywords are configured. Recent scan
+results are memoized, which lets the classifier and the integrator consume
+the same scan of a segment.
+"""
+
+from __future__ import annotations
+
+import re
+import threading
+from collections import deque
+from dataclasses import dataclass, field
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Dict, FrozenSet, List, Mapping, Tuple
+
+from .config import GRID_DEFINITIONS, GridDefinition
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize(text: str) -> str:
+    return _WHITESPACE.sub("", text.lower())
+
+
+@dataclass(frozen=True)
+class KeywordHits:
+    """Keywords found in one text, grouped by grid in definition order."""
+
+    by_grid: Mapping[int, Tuple[str, ...]]
+    # Per grid, one bit per distinct keyword of that grid (bit = its first position in the definition).
+    masks: Mapping[int, int] = field(default_factory=lambda: MappingProxyType({}))
+
+    def for_grid(self, grid_id: int) -> Tuple[str, ...]:
+        return self.by_grid.get(grid_id, ())
+
+    def mask(self, grid_id: int) -> int:
+        return self.masks.get(grid_id, 0)
+
+    def keywords(self) -> FrozenSet[str]:
+        return frozenset(kw for keywords in self.by_grid.values() for kw in keywords)
+
+
+class KeywordMatcher:
+    def __init__(self, grid_definitions: Dict[int, GridDefinition] | None = None, cache_size: int = 1024):
+        definitions = grid_definitions or GRID_DEFINITIONS
+        # Node 0 is the root; each node has goto edges, a failure link and (grid_id, rank, keyword) outputs.
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._outputs: List[List[Tuple[int, int, str]]] = [[]]
+        self._bits: Dict[int, Dict[str, int]] = {}
+        for grid_id, definition in definitions.items():
+            bits = self._bits[grid_id] = {}
+            for rank, keyword in enumerate(definition.keywords):
+                keyword = keyword.lower()
+                if keyword:
+                    bits.setdefault(keyword, 1 << rank)
+                    self._add(keyword, (grid_id, rank, keyword))
+        self._link()
+        self._cached_scan = lru_cache(maxsize=cache_size)(self._scan)
+
+    def _add(self, keyword: str, output: Tuple[int, int, str]) -> None:
+        node = 0
+        for char in keyword:
+            nxt = self._goto[node].get(char)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[node][char] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._outputs.append([])
+            node = nxt
+        self._outputs[node].append(output)
+
+    def _link(self) -> None:
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                queue.append(child)
+                fallback = self._fail[node]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                self._fail[child] = target if target != child else 0
+                # Fold the suffix outputs in so a scan never has to walk output links.
+                self._outputs[child].extend(self._outputs[self._fail[child]])
+
+    def scan(self, text: str) -> KeywordHits:
+        return self._cached_scan(normalize(text))
+
+    def _scan(self, normalized: str) -> KeywordHits:
+        goto, fail, outputs = self._goto, self._fail, self._outputs
+        found = set()
+        node = 0
+        for char in normalized:
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            if outputs[node]:
+                found.update(outputs[node])
+        by_grid: Dict[int, List[str]] = {}
+        masks: Dict[int, int] = {}
+        for grid_id, _rank, keyword in sorted(found):
+            by_grid.setdefault(grid_id, []).append(keyword)
+            masks[grid_id] = masks.get(grid_id, 0) | self._bits[grid_id][keyword]
+        return KeywordHits(
+            MappingProxyType({grid_id: tuple(kws) for grid_id, kws in by_grid.items()}), MappingProxyType(masks)
+        )
+
+
+_MATCHERS: Dict[tuple, KeywordMatcher] = {}
+_MATCHERS_LOCK = threading.Lock()
+
+
+def shared_matcher(grid_definitions: Dict[int, GridDefinition] | None = None) -> KeywordMatcher:
+    """Return the matcher for these definitions, building it once per process."""
+    definitions = grid_definitions or GRID_DEFINITIONS
+    key = tuple((grid_id, tuple(definition.keywords)) for grid_id, definition in definitions.items())
+    with _MATCHERS_LOCK:
+        matcher = _MATCHERS.get(key)
+        if matcher is None:
+            matcher = _MATCHERS[key] = KeywordMatcher(definitions)
+    return matcher
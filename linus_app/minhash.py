@@ -0,0 +1,89 @@
+"""MinHash signatures and a banded LSH index for near-duplicate snippets.
+
+A snippet is reduced to its set of character shingles (normalized text, so
+whitespace and case do not matter; characters rather than words because the
+transcripts are mostly Chinese). ``num_perm`` salted hashes keep the minimum
+per salt; the fraction of equal positions between two signatures estimates the
+Jaccard similarity of their shingle sets. The LSH index splits signatures into
+``bands`` and only snippets that agree on a whole band are compared, so a
+lookup touches the likely duplicates instead of every entry.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import random
+from array import array
+from collections import defaultdict
+from typing import Dict, Generic, Hashable, Iterator, List, Set, Tuple, TypeVar
+
+from .matcher import normalize
+
+_PRIME = (1 << 61) - 1
+_MASK = (1 << 64) - 1
+
+T = TypeVar("T")
+
+
+def shingles(text: str, size: int = 3) -> Set[str]:
+    normalized = normalize(text)
+    if len(normalized) <= size:
+        return {normalized} if normalized else set()
+    return {normalized[start:start + size] for start in range(len(normalized) - size + 1)}
+
+
+class MinHasher:
+    def __init__(self, num_perm: int = 64, shingle_size: int = 3, seed: int = 1):
+        rng = random.Random(seed)
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        # Universal hashing (a * x + b) mod p stands in for num_perm random permutations.
+        self._coefficients = [(rng.randrange(1, _PRIME), rng.randrange(0, _PRIME)) for _ in range(num_perm)]
+
+    def signature(self, text: str) -> array:
+        """Per-permutation minimum hash of the text's shingles (all-max for empty text)."""
+        hashes = [
+            int.from_bytes(hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).digest(), "little")
+            for shingle in shingles(text, self.shingle_size)
+        ]
+        if not hashes:
+            return array("Q", [_MASK] * self.num_perm)
+        return array("Q", [min((a * value + b) % _PRIME for value in hashes) for a, b in self._coefficients])
+
+    @staticmethod
+    def similarity(first: array, second: array) -> float:
+        """Estimated Jaccard similarity of the two shingle sets."""
+        if first[0] == _MASK or second[0] == _MASK:
+            return 0.0
+        return sum(1 for x, y in zip(first, second) if x == y) / len(first)
+
+
+class LSHIndex(Generic[T]):
+    """Banded LSH buckets: items sharing any band of their signature are candidates."""
+
+    def __init__(self, num_perm: int = 64, bands: int = 16):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self._rows = num_perm // bands
+        self._bands = bands
+        self._buckets: Dict[Tuple[int, Hashable], List[T]] = defaultdict(list)
+
+    def _keys(self, signature: array) -> Iterator[Tuple[int, Hashable]]:
+        if signature[0] == _MASK:
+            return
+        for band in range(self._bands):
+            start = band * self._rows
+            yield band, signature[start:start + self._rows].tobytes()
+
+    def add(self, item: T, signature: array) -> None:
+        for key in self._keys(signature):
+            self._buckets[key].append(item)
+
+    def candidates(self, signature: array) -> Iterator[T]:
+        """Each item sharing at least one band with ``signature``, once."""
+        seen: Set[int] = set()
+        for key in self._keys(signature):
+            for item in self._buckets.get(key, ()):
+                if id(item) not in seen:
+                    seen.add(id(item))
+                    yield item
@@ -1,23 +1,51 @@
-"""Core dataclasses shared across the Linus service."""
+"""Core dataclasses shared across the Linus service.
+
+Entries and logs are the bulk of the state, so they are slotted, keep
+timestamps as UTC epoch seconds and share interned strings and
+``related_grids`` tuples instead of carrying a copy each.
+"""
 
 from __future__ import annotations
 
+import sys
+from array import array
 from dataclasses import dataclass, field
-from datetime import datetime
-from typing import List
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Set, Tuple
 
 from .config import GridDefinition
 
+_GRID_TUPLES: Dict[Tuple[int, ...], Tuple[int, ...]] = {}
 
-@dataclass
+
+def intern_grids(grids: Iterable[int]) -> Tuple[int, ...]:
+    """Return the shared tuple for this combination of related grids."""
+    key = tuple(grids)
+    return _GRID_TUPLES.setdefault(key, key)
+
+
+def to_epoch(value: datetime) -> float:
+    """Naive datetimes are treated as UTC, matching how the service stamps records."""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+def from_epoch(value: float) -> datetime:
+    return datetime.fromtimestamp(value, timezone.utc)
+
+
+@dataclass(slots=True)
 class GridAssignment:
     grid_id: int
     confidence: float
     secondary: bool
     related_keywords: List[str]
+    # Classifier tier that decided this assignment when a cascade is in use.
+    tier: Optional[str] = None
 
 
-@dataclass
+@dataclass(slots=True)
 class Segment:
     id: str
     source: str
@@ -27,15 +55,49 @@ class Segment:
     status: str = "pending"
 
 
-@dataclass
+@dataclass(slots=True)
 class GridEntry:
     segment_id: str
     source: str
     snippet: str
     status: str
-    related_grids: List[int]
+    related_grids: Tuple[int, ...]
     confidence: float
-    created_at: datetime
+    created_ts: float
+    # Keywords of its cell found in the snippet, one bit each (see KeywordHits.mask); set by the
+    # integrator when the entry is inserted or first indexed, never persisted.
+    keyword_mask: Optional[int] = field(default=None, compare=False, repr=False)
+    # MinHash signature of the snippet when near-duplicate detection is on (see minhash.py); derived,
+    # so it is rebuilt when a cell is loaded rather than persisted.
+    minhash: Optional[array] = field(default=None, compare=False, repr=False)
+
+    def __post_init__(self) -> None:
+        self.source = sys.intern(self.source)
+        self.status = sys.intern(self.status)
+        self.related_grids = intern_grids(self.related_grids)
+
+    @property
+    def created_at(self) -> datetime:
+        return from_epoch(self.created_ts)
+
+    def to_dict(self) -> dict:
+        return {
+            "segment_id": self.segment_id,
+            "source": self.source,
+            "snippet": self.snippet,
+            "status": self.status,
+            "confidence": round(self.confidence, 2),
+            "related_grids": list(self.related_grids),
+            "created_at": self.created_at.isoformat(),
+        }
+
+    def to_review_dict(self) -> dict:
+        return {
+            "segment_id": self.segment_id,
+            "confidence": round(self.confidence, 2),
+            "snippet": self.snippet,
+            "created_at": self.created_at.isoformat(),
+        }
 
 
 @dataclass
@@ -44,6 +106,8 @@ class GridCell:
     summary: List[str] = field(default_factory=list)
     entries: List[GridEntry] = field(default_factory=list)
     needs_review: List[GridEntry] = field(default_factory=list)
+    # Bumped by the integrator on every mutation; response caches key on it.
+    version: int = 0
 
     def to_dict(self) -> dict:
         """Convert into API-friendly structure."""
@@ -52,41 +116,46 @@ class GridCell:
             "title": self.definition.title,
             "persona": self.definition.persona,
             "summary": self.summary,
-            "entries": [
-                {
-                    "segment_id": entry.segment_id,
-                    "source": entry.source,
-                    "snippet": entry.snippet,
-                    "status": entry.status,
-                    "confidence": round(entry.confidence, 2),
-                    "related_grids": entry.related_grids,
-                    "created_at": entry.created_at.isoformat(),
-                }
-                for entry in self.entries
-            ],
-            "needs_review": [
-                {
-                    "segment_id": entry.segment_id,
-                    "confidence": round(entry.confidence, 2),
-                    "snippet": entry.snippet,
-                    "created_at": entry.created_at.isoformat(),
-                }
-                for entry in self.needs_review
-            ],
-            "related_grids": sorted(
-                {grid for entry in self.entries for grid in entry.related_grids}
-            ),
+            "entries": [entry.to_dict() for entry in self.entries],
+            "needs_review": [entry.to_review_dict() for entry in self.needs_review],
+            "related_grids": self._related_grids(),
+        }
+
+    def to_summary_dict(self, latest: int) -> dict:
+        """Like ``to_dict`` but only the latest ``latest`` entries / review items, plus counts."""
+        entries, needs_review = list(self.entries), list(self.needs_review)
+        return {
+            "grid_id": self.definition.grid_id,
+            "title": self.definition.title,
+            "persona": self.definition.persona,
+            "summary": self.summary,
+            "entries": [entry.to_dict() for entry in entries[-latest:]] if latest > 0 else [],
+            "needs_review": [entry.to_review_dict() for entry in needs_review[-latest:]] if latest > 0 else [],
+            "entry_count": len(entries),
+            "needs_review_count": len(needs_review),
+            "related_grids": self._related_grids(),
         }
 
+    def _related_grids(self) -> List[int]:
+        return sorted({grid for entry in self.entries for grid in entry.related_grids})
 
-@dataclass
+
+@dataclass(slots=True)
 class InsightLogEntry:
     segment_id: str
     grid_id: int
     action: str
     similarity: float
     comment: str
-    created_at: datetime
+    created_ts: float
+
+    def __post_init__(self) -> None:
+        self.action = sys.intern(self.action)
+        self.comment = sys.intern(self.comment)
+
+    @property
+    def created_at(self) -> datetime:
+        return from_epoch(self.created_ts)
 
     def to_dict(self) -> dict:
         return {
@@ -96,3 +165,30 @@ class InsightLogEntry:
             "comment": self.comment,
             "created_at": self.created_at.isoformat(),
         }
+
+
+@dataclass
+class ChangeSet:
+    """Everything the integrator touched since the last drain."""
+
+    entries: List[Tuple[int, GridEntry]] = field(default_factory=list)
+    needs_review: List[Tuple[int, GridEntry]] = field(default_factory=list)
+    summaries: Set[int] = field(default_factory=set)
+    logs: List[InsightLogEntry] = field(default_factory=list)
+    # Earlier history paged back in from storage before ``logs`` were appended to it.
+    paged_logs: Dict[str, List[InsightLogEntry]] = field(default_factory=dict)
+    evicted_logs: Set[str] = field(default_factory=set)
+
+    @property
+    def touched_cells(self) -> Set[int]:
+        touched = set(self.summaries)
+        touched.update(grid_id for grid_id, _ in self.entries)
+        touched.update(grid_id for grid_id, _ in self.needs_review)
+        return touched
+
+    @property
+    def touched_segments(self) -> Set[str]:
+        return {log.segment_id for log in self.logs} | self.evicted_logs
+
+    def __bool__(self) -> bool:
+        return bool(self.entries or self.needs_review or self.summaries or self.logs or self.evicted_logs)
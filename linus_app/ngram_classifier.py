@@ -0,0 +1,170 @@
+"""Offline classifier trained from the entries already filed under each grid.
+
+A multinomial naive Bayes model over character n-grams of the normalized
+text. Training is incremental: every accepted entry adds its n-gram counts,
+so the model follows the grids without a rebuild. Scoring uses NumPy when it
+is installed and plain dictionaries otherwise; both give the same result.
+"""
+
+from __future__ import annotations
+
+import math
+import threading
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from .classifier import BaseClassifier, ClassificationError
+from .config import GRID_DEFINITIONS, GridDefinition
+from .matcher import normalize, shared_matcher
+from .models import GridAssignment
+
+try:
+    import numpy as np
+except ImportError:  # optional speed-up only
+    np = None
+
+
+def char_ngrams(text: str, sizes: Sequence[int] = (1, 2, 3)) -> Counter:
+    normalized = normalize(text)
+    grams: Counter = Counter()
+    for size in sizes:
+        for start in range(len(normalized) - size + 1):
+            grams[normalized[start:start + size]] += 1
+    return grams
+
+
+class NgramBayesClassifier(BaseClassifier):
+    trainable = True
+    # Per-gram log-likelihoods are averaged and scaled by this before the softmax, so the
+    # confidence of a short paragraph and a long one are comparable.
+    SHARPNESS = 5.0
+    SECONDARY_MIN = 0.2
+
+    def __init__(
+        self,
+        grid_definitions: Dict[int, GridDefinition] | None = None,
+        sizes: Sequence[int] = (1, 2, 3),
+        alpha: float = 0.5,
+        min_examples: int = 20,
+        use_numpy: Optional[bool] = None,
+    ):
+        self._definitions = grid_definitions or GRID_DEFINITIONS
+        self._matcher = shared_matcher(self._definitions)
+        self._grid_ids = sorted(self._definitions)
+        self._rows = {grid_id: row for row, grid_id in enumerate(self._grid_ids)}
+        self._sizes = tuple(sizes)
+        self._alpha = alpha
+        self._min_examples = min_examples
+        self._use_numpy = np is not None if use_numpy is None else use_numpy and np is not None
+        self._lock = threading.RLock()
+        self._vocab: Dict[str, int] = {}
+        self._docs = [0] * len(self._grid_ids)
+        self._totals = [0] * len(self._grid_ids)
+        if self._use_numpy:
+            self._matrix = np.zeros((len(self._grid_ids), 1024))
+        else:
+            self._counts: List[Dict[str, int]] = [{} for _ in self._grid_ids]
+
+    @property
+    def examples(self) -> int:
+        return sum(self._docs)
+
+    def learn(self, examples: Iterable[Tuple[str, int]]) -> int:
+        learned = 0
+        with self._lock:
+            for text, grid_id in examples:
+                row = self._rows.get(grid_id)
+                grams = char_ngrams(text, self._sizes)
+                if row is None or not grams:
+                    continue
+                self._add(row, grams)
+                self._docs[row] += 1
+                learned += 1
+        return learned
+
+    def _add(self, row: int, grams: Counter) -> None:
+        for gram, count in grams.items():
+            column = self._vocab.get(gram)
+            if column is None:
+                column = self._vocab[gram] = len(self._vocab)
+            if self._use_numpy:
+                if column >= self._matrix.shape[1]:
+                    grown = np.zeros((self._matrix.shape[0], self._matrix.shape[1] * 2))
+                    grown[:, : self._matrix.shape[1]] = self._matrix
+                    self._matrix = grown
+                self._matrix[row, column] += count
+            else:
+                self._counts[row][gram] = self._counts[row].get(gram, 0) + count
+            self._totals[row] += count
+
+    def classify(self, text: str) -> List[GridAssignment]:
+        if not text.strip():
+            return []
+        grams = char_ngrams(text, self._sizes)
+        with self._lock:
+            if self.examples < self._min_examples:
+                raise ClassificationError(f"n-gram model has {self.examples} examples, needs {self._min_examples}")
+            known = [(gram, count) for gram, count in grams.items() if gram in self._vocab]
+            if not known:
+                raise ClassificationError("no known n-grams in text")
+            # Grids without a single example carry no evidence and would win on smoothing alone.
+            rows = [row for row, docs in enumerate(self._docs) if docs]
+            scores = self._scores(rows, known, sum(grams.values()))
+        probabilities = self._softmax(scores)
+        ranked = sorted(
+            zip((self._grid_ids[row] for row in rows), probabilities), key=lambda item: item[1], reverse=True
+        )
+        hits = self._matcher.scan(text)
+        assignments = []
+        for index, (grid_id, probability) in enumerate(ranked):
+            if index and probability < self.SECONDARY_MIN:
+                break
+            assignments.append(
+                GridAssignment(
+                    grid_id=grid_id,
+                    confidence=round(min(0.95, probability), 2),
+                    secondary=index > 0,
+                    related_keywords=list(hits.for_grid(grid_id)),
+                )
+            )
+        return assignments
+
+    def _scores(self, rows: List[int], known: List[Tuple[str, int]], gram_total: int) -> List[float]:
+        """Average per-gram log-likelihood plus prior for each of ``rows``.
+
+        Grams outside the vocabulary add the same log(alpha) to every grid and are
+        left out of the numerator; they still count in each grid's normalizer.
+        """
+        vocab_size = len(self._vocab)
+        doc_total = sum(self._docs)
+        if self._use_numpy:
+            columns = np.fromiter((self._vocab[gram] for gram, _ in known), dtype=np.int64, count=len(known))
+            counts = np.fromiter((count for _, count in known), dtype=float, count=len(known))
+            numerators = (np.log(self._matrix[np.ix_(rows, columns)] + self._alpha) @ counts).tolist()
+        else:
+            numerators = [
+                sum(count * math.log(self._counts[row].get(gram, 0) + self._alpha) for gram, count in known)
+                for row in rows
+            ]
+        scores = []
+        for row, numerator in zip(rows, numerators):
+            normalizer = math.log(self._totals[row] + self._alpha * vocab_size)
+            prior = math.log(self._docs[row] / doc_total)
+            scores.append((numerator + prior) / gram_total - normalizer)
+        return scores
+
+    def _softmax(self, scores: List[float]) -> List[float]:
+        peak = max(scores)
+        weights = [math.exp((score - peak) * self.SHARPNESS) for score in scores]
+        total = sum(weights)
+        return [weight / total for weight in weights]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "ngram": {
+                    "examples": self.examples,
+                    "vocabulary": len(self._vocab),
+                    "backend": "numpy" if self._use_numpy else "python",
+                }
+            }
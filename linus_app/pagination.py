@@ -0,0 +1,71 @@
+"""Cursor pagination over a cell's entries / needs_review lists.
+
+Both lists are append-only and appended in ``created_at`` order, so a cursor
+only needs ``(created_ts, segment_id)`` to find its position again with a
+bisect. Pages are returned newest first: ``before`` walks towards older
+items, ``after`` towards newer ones.
+"""
+
+from __future__ import annotations
+
+import base64
+import binascii
+import json
+from bisect import bisect_left, bisect_right
+from typing import List, Optional, Tuple
+
+from .models import GridEntry
+
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 200
+
+
+def encode_cursor(entry: GridEntry) -> str:
+    raw = json.dumps([entry.created_ts, entry.segment_id], ensure_ascii=False).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[float, str]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_ts, segment_id = json.loads(raw)
+        return float(created_ts), str(segment_id)
+    except (binascii.Error, ValueError, TypeError) as exc:
+        raise ValueError(f"Invalid cursor {cursor!r}") from exc
+
+
+def _position(items: List[GridEntry], cursor: str) -> Tuple[int, bool]:
+    """Index of the cursor item and whether it was found exactly."""
+    created_ts, segment_id = decode_cursor(cursor)
+    low = bisect_left(items, created_ts, key=lambda entry: entry.created_ts)
+    high = bisect_right(items, created_ts, key=lambda entry: entry.created_ts)
+    for index in range(low, high):
+        if items[index].segment_id == segment_id:
+            return index, True
+    # The exact item never existed here: treat the cursor as a point in time.
+    return low, False
+
+
+def paginate(
+    items: List[GridEntry],
+    limit: int = DEFAULT_LIMIT,
+    before: Optional[str] = None,
+    after: Optional[str] = None,
+) -> Tuple[List[GridEntry], Optional[str], Optional[str]]:
+    """Return ``(page newest first, next_cursor towards older, prev_cursor towards newer)``."""
+    if before and after:
+        raise ValueError("Use either before or after, not both")
+    if limit < 1:
+        raise ValueError("limit must be positive")
+    limit = min(limit, MAX_LIMIT)
+    if after:
+        start, exact = _position(items, after)
+        start += 1 if exact else 0
+        end = min(len(items), start + limit)
+    else:
+        end = _position(items, before)[0] if before else len(items)
+        start = max(0, end - limit)
+    page = list(reversed(items[start:end]))
+    next_cursor = encode_cursor(items[start]) if start > 0 and page else None
+    prev_cursor = encode_cursor(items[end - 1]) if end < len(items) and page else None
+    return page, next_cursor, prev_cursor
@@ -0,0 +1,192 @@
+"""Process-wide scheduler that keeps upstream LLM calls under their quotas.
+
+Two token buckets model the per-minute request and token quotas, with some
+headroom and a short burst allowance, so calls are spread out instead of
+tripping 429s. Callers queue in priority lanes: interactive ingest is served
+ahead of bulk work. Each lane's queue is bounded, and a call whose estimated
+wait exceeds its deadline is rejected at once rather than timing out later.
+"""
+
+from __future__ import annotations
+
+import heapq
+import itertools
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterator, List, Optional
+
+from .classifier import QuotaRejectedError
+
+INTERACTIVE = "interactive"
+BULK = "bulk"
+LANES = (INTERACTIVE, BULK)
+_LANE_RANK = {INTERACTIVE: 0, BULK: 1}
+
+_current_lane: ContextVar[str] = ContextVar("linus_quota_lane", default=INTERACTIVE)
+
+
+@contextmanager
+def lane(name: str) -> Iterator[None]:
+    """Run upstream calls made in this context (and copied contexts) in ``name``'s lane."""
+    if name not in _LANE_RANK:
+        raise ValueError(f"Unknown priority lane {name}")
+    token = _current_lane.set(name)
+    try:
+        yield
+    finally:
+        _current_lane.reset(token)
+
+
+def current_lane() -> str:
+    return _current_lane.get()
+
+
+class TokenBucket:
+    def __init__(self, per_minute: float, burst_seconds: float, clock: Callable[[], float]):
+        self.rate = per_minute / 60.0
+        self.capacity = max(1.0, self.rate * burst_seconds)
+        self._level = self.capacity
+        self._clock = clock
+        self._updated = clock()
+
+    def _refill(self) -> None:
+        now = self._clock()
+        self._level = min(self.capacity, self._level + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until ``amount`` more than is available now has refilled."""
+        self._refill()
+        return max(0.0, (amount - self._level) / self.rate)
+
+    def clamp(self, amount: float) -> float:
+        """A single call larger than the bucket waits for a full bucket instead of forever."""
+        return min(amount, self.capacity)
+
+    def take(self, amount: float) -> None:
+        self._refill()
+        self._level -= self.clamp(amount)
+
+    def adjust(self, amount: float) -> None:
+        """Charge (positive) or refund (negative) the difference between estimate and actual use."""
+        self._refill()
+        self._level = min(self.capacity, self._level - amount)
+
+
+class QuotaScheduler:
+    DEFAULT_DEADLINES = {INTERACTIVE: 10.0, BULK: 120.0}
+
+    def __init__(
+        self,
+        requests_per_minute: Optional[float] = None,
+        tokens_per_minute: Optional[float] = None,
+        headroom: float = 0.9,
+        burst_seconds: float = 10.0,
+        max_queue: int = 64,
+        deadlines: Optional[Dict[str, float]] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self._clock = clock
+        self._requests = (
+            TokenBucket(requests_per_minute * headroom, burst_seconds, clock) if requests_per_minute else None
+        )
+        self._tokens = TokenBucket(tokens_per_minute * headroom, burst_seconds, clock) if tokens_per_minute else None
+        self._max_queue = max_queue
+        self._deadlines = {**self.DEFAULT_DEADLINES, **(deadlines or {})}
+        self._cond = threading.Condition()
+        self._waiting: List[list] = []  # heap of [lane rank, seq, tokens, lane]
+        self._seq = itertools.count()
+        self._queued = {name: 0 for name in LANES}
+        self._admitted = {name: 0 for name in LANES}
+        self._rejected = {name: 0 for name in LANES}
+        self._waited_seconds = 0.0
+
+    def acquire(self, tokens: float, deadline_seconds: Optional[float] = None) -> float:
+        """Block until one request of ``tokens`` fits the quotas; returns the seconds waited."""
+        name = current_lane()
+        started = self._clock()
+        deadline = started + (deadline_seconds if deadline_seconds is not None else self._deadlines[name])
+        with self._cond:
+            if self._queued[name] >= self._max_queue:
+                self._rejected[name] += 1
+                raise QuotaRejectedError(f"{name} quota queue is full")
+            ticket = [_LANE_RANK[name], next(self._seq), tokens, name]
+            heapq.heappush(self._waiting, ticket)
+            self._queued[name] += 1
+            try:
+                while True:
+                    wait = self._estimated_wait(ticket)
+                    now = self._clock()
+                    if wait <= 0 and self._waiting[0] is ticket:
+                        heapq.heappop(self._waiting)
+                        self._take(tokens)
+                        self._admitted[name] += 1
+                        self._waited_seconds += now - started
+                        return now - started
+                    if now + wait > deadline:
+                        self._rejected[name] += 1
+                        raise QuotaRejectedError(
+                            f"{name} call would wait {wait:.1f}s for quota, past its deadline"
+                        )
+                    self._cond.wait(timeout=max(0.001, wait) if self._waiting[0] is ticket else deadline - now)
+            except BaseException:
+                if ticket in self._waiting:
+                    self._waiting.remove(ticket)
+                    heapq.heapify(self._waiting)
+                raise
+            finally:
+                self._queued[name] -= 1
+                self._cond.notify_all()
+
+    def _estimated_wait(self, ticket: list) -> float:
+        """Time until the buckets cover every ticket ahead of this one plus this one."""
+        ahead = [other for other in self._waiting if other[:2] <= ticket[:2]]
+        waits = []
+        if self._requests is not None:
+            waits.append(self._requests.wait_time(len(ahead)))
+        if self._tokens is not None:
+            waits.append(self._tokens.wait_time(sum(self._tokens.clamp(other[2]) for other in ahead)))
+        return max(waits, default=0.0)
+
+    def _take(self, tokens: float) -> None:
+        if self._requests is not None:
+            self._requests.take(1)
+        if self._tokens is not None:
+            self._tokens.take(tokens)
+
+    def record_usage(self, estimated: float, actual: Optional[float]) -> None:
+        """Correct the token bucket once the upstream reports what a call really used."""
+        if actual is None or self._tokens is None:
+            return
+        with self._cond:
+            self._tokens.adjust(actual - estimated)
+            self._cond.notify_all()
+
+    def stats(self) -> dict:
+        with self._cond:
+            admitted = sum(self._admitted.values())
+            return {
+                "queued": dict(self._queued),
+                "admitted": dict(self._admitted),
+                "rejected": dict(self._rejected),
+                "avg_wait_ms": round(self._waited_seconds / admitted * 1000, 1) if admitted else 0.0,
+                "requests_per_minute": round(self._requests.rate * 60, 1) if self._requests else None,
+                "tokens_per_minute": round(self._tokens.rate * 60, 1) if self._tokens else None,
+            }
+
+
+_SHARED: Dict[tuple, QuotaScheduler] = {}
+_SHARED_LOCK = threading.Lock()
+
+
+def shared_scheduler(**config) -> QuotaScheduler:
+    """One scheduler per quota configuration per process, shared by every classifier instance."""
+    key = tuple(sorted((name, tuple(sorted(value.items())) if isinstance(value, dict) else value)
+                       for name, value in config.items()))
+    with _SHARED_LOCK:
+        scheduler = _SHARED.get(key)
+        if scheduler is None:
+            scheduler = _SHARED[key] = QuotaScheduler(**config)
+    return scheduler
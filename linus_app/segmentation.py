@@ -0,0 +1,128 @@
+"""Split raw transcript text into segments sized for classification.
+
+Lines are consumed lazily, so a long transcript (or an upload still in
+flight) is segmented as it is read. Speaker turns (``Name: ...``), timestamp
+lines (``[00:12:34]``) and blank lines close a unit; a unit longer than
+``max_chars`` is cut at sentence ends (or, for one overlong sentence, at a
+comma or hard at ``max_chars``). A unit shorter than ``min_chars`` is not
+sent alone but joined to the next one while the result stays within
+``max_chars``.
+"""
+
+from __future__ import annotations
+
+import re
+import uuid
+from typing import Iterable, Iterator, List, Optional
+
+DEFAULT_MIN_CHARS = 40
+DEFAULT_MAX_CHARS = 400
+
+_TIMESTAMP = re.compile(r"^\s*[\[(]?(\d{1,2}:)?\d{1,2}:\d{2}(\.\d+)?[\])]?\s*")
+# "Name:" / "Name：" / "[Name]" at the start of a line, with a short name and no sentence punctuation.
+_NAME = r"[^\s:：。！？!?,，]{1,24}(?: [^\s:：。！？!?,，]{1,12})?"
+_SPEAKER = re.compile(rf"^\s*(?:\[[^\]\n]{{1,24}}\]|{_NAME}\s*[:：])\s*")
+_SENTENCE_END = re.compile(r"(?<=[。！？!?；;…])|(?<=\.)(?=\s)")
+_SOFT_BREAK = re.compile(r"(?<=[，,、：:])")
+
+
+def _lines(transcript: str | Iterable[str]) -> Iterator[str]:
+    if isinstance(transcript, str):
+        # splitlines would build the whole list up front; walk the string instead.
+        start = 0
+        while start < len(transcript):
+            end = transcript.find("\n", start)
+            if end == -1:
+                end = len(transcript)
+            yield transcript[start:end]
+            start = end + 1
+        return
+    yield from transcript
+
+
+def _units(lines: Iterable[str]) -> Iterator[str]:
+    """Text between structural boundaries: blank lines, timestamps and speaker turns."""
+    current: List[str] = []
+    for raw in lines:
+        line = raw.rstrip("\r\n")
+        stamp = _TIMESTAMP.match(line)
+        if stamp:
+            line = line[stamp.end():]
+        if not line.strip() or stamp or _SPEAKER.match(line):
+            if current:
+                yield " ".join(current)
+                current = []
+        if line.strip():
+            current.append(line.strip())
+    if current:
+        yield " ".join(current)
+
+
+def _fit(unit: str, max_chars: int) -> Iterator[str]:
+    """Cut a unit into pieces of at most ``max_chars``, preferring sentence ends, then commas."""
+    if len(unit) <= max_chars:
+        yield unit
+        return
+    piece = ""
+    for sentence in (part for part in _SENTENCE_END.split(unit) if part):
+        pieces = [sentence] if len(sentence) <= max_chars else list(_cut(sentence, max_chars))
+        for part in pieces:
+            if piece and len(piece) + len(part) > max_chars:
+                yield piece.strip()
+                piece = ""
+            piece += part
+    if piece.strip():
+        yield piece.strip()
+
+
+def _cut(sentence: str, max_chars: int) -> Iterator[str]:
+    piece = ""
+    for clause in (part for part in _SOFT_BREAK.split(sentence) if part):
+        while len(clause) > max_chars:
+            if piece:
+                yield piece
+                piece = ""
+            yield clause[:max_chars]
+            clause = clause[max_chars:]
+        if len(piece) + len(clause) > max_chars:
+            yield piece
+            piece = ""
+        piece += clause
+    if piece:
+        yield piece
+
+
+def split_transcript(
+    transcript: str | Iterable[str],
+    min_chars: int = DEFAULT_MIN_CHARS,
+    max_chars: int = DEFAULT_MAX_CHARS,
+) -> Iterator[str]:
+    """Segment texts of ``min_chars``..``max_chars`` (the last one may be shorter)."""
+    carry = ""
+    for unit in _units(_lines(transcript)):
+        for piece in _fit(unit, max_chars):
+            if carry:
+                if len(carry) + 1 + len(piece) <= max_chars:
+                    piece = f"{carry} {piece}"
+                else:
+                    yield carry
+                carry = ""
+            if len(piece) < min_chars:
+                carry = piece
+            else:
+                yield piece
+    if carry:
+        yield carry
+
+
+def segment_transcript(
+    transcript: str | Iterable[str],
+    source: str = "transcript",
+    min_chars: int = DEFAULT_MIN_CHARS,
+    max_chars: int = DEFAULT_MAX_CHARS,
+    id_prefix: Optional[str] = None,
+) -> Iterator[dict]:
+    """Segment items shaped like the ``segments`` entries of ``post_segments``."""
+    prefix = id_prefix or f"seg-{uuid.uuid4().hex[:8]}"
+    for number, text in enumerate(split_transcript(transcript, min_chars, max_chars), start=1):
+        yield {"segment_id": f"{prefix}-{number:04d}", "source": source, "text": text}
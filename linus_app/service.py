@@ -2,59 +2,226 @@
 
 from __future__ import annotations
 
+import json
 import os
 import sys
+import threading
+import time
 import uuid
+from contextvars import copy_context
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
-from pathlib import Path
-from typing import Dict, List
+from itertools import chain, islice
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 
 from .classifier import ClassificationError
-from .classifier_factory import build_classifier
+from .classifier_factory import build_classifier, build_shadow_classifier
 from .config import GRID_DEFINITIONS
 from .integrator import GridIntegrator
 from .mandala_blueprint import get_mandala
 from .models import GridAssignment, Segment
-from .storage import PersistentStore
+from .pagination import DEFAULT_LIMIT, MAX_LIMIT, paginate
+from .quota import INTERACTIVE, LANES, lane
+from .segmentation import DEFAULT_MAX_CHARS, DEFAULT_MIN_CHARS, segment_transcript
+from .shadow import ShadowRunner
+from .streaming import read_ahead
+from .storage_factory import build_store
 from .views import (
     format_segment_result,
     format_grid_response,
     format_segment_log,
     format_all_grids,
+    format_export_stream,
+    format_grid_page,
+    format_grid_summary,
 )
 
+EXPORT_FORMATS = ("ndjson", "csv")
+GRID_ITEM_KINDS = ("entries", "needs_review")
+# Upstream classification calls in flight per post_segments request.
+DEFAULT_CLASSIFY_CONCURRENCY = 4
+# Segments classified and integrated together by /api/segments/stream.
+DEFAULT_STREAM_WINDOW = 20
+# /api/grids returns summaries with this many of the newest entries unless asked for the full view.
+DEFAULT_LATEST_ENTRIES = 5
+# Only these views are kept in the grid response caches; any other ?latest=N is encoded per request.
+_CACHED_VARIANTS = (None, DEFAULT_LATEST_ENTRIES)
+
 
 class LinusService:
     def __init__(self):
-        self._classifier, self._fallback_classifier = build_classifier()
-        self._using_gemini = self._classifier is not self._fallback_classifier
-        self._integrator = GridIntegrator(GRID_DEFINITIONS)
-        state_path = Path(os.getenv("LINUS_STATE_PATH", "data/linus_state.json"))
-        debounce = float(os.getenv("LINUS_SAVE_DEBOUNCE", "0.5"))
-        self._store = PersistentStore(state_path, debounce_seconds=debounce)
+        (self._classifier_name, self._classifier), (self._fallback_name, self._fallback_classifier) = (
+            build_classifier()
+        )
+        shadow = build_shadow_classifier()
+        # Candidate classifier compared off the request path; it never reaches the integrator.
+        self._shadow = ShadowRunner(shadow[1], shadow[0]) if shadow else None
+        # Both roles may wrap the same trainable model; feed it through one of them only.
+        learners = [next((clf for clf in (self._classifier, self._fallback_classifier) if clf.trainable), None)]
+        if self._shadow is not None:
+            learners.append(self._shadow.classifier if self._shadow.classifier.trainable else None)
+        self._learners = [learner for learner in learners if learner is not None]
+        concurrency = os.getenv("LINUS_CLASSIFY_CONCURRENCY")
+        self._classify_concurrency = max(1, int(concurrency)) if concurrency else DEFAULT_CLASSIFY_CONCURRENCY
+        # Workers start on first use, so the pool costs nothing for single-segment posts.
+        self._classify_pool = ThreadPoolExecutor(
+            max_workers=self._classify_concurrency, thread_name_prefix="linus-classify"
+        )
+        # Classification runs outside this lock; integration and saving are applied one post at a time.
+        # Grid responses are cached under it too, so a cached body always matches its cell version.
+        # Reentrant because get_all_grids_response builds on get_grid_response.
+        self._integrate_lock = threading.RLock()
+        # Encoded grid responses keyed by cell version; the epoch keeps ETags unique across restarts.
+        self._epoch = uuid.uuid4().hex[:8]
+        self._grid_cache: Dict[Tuple[int, str], Tuple[int, bytes, str]] = {}
+        self._all_grids_cache: Dict[str, Tuple[Tuple[int, ...], bytes, str]] = {}
+        max_age_days = os.getenv("LINUS_LOG_MAX_AGE_DAYS")
+        max_segments = os.getenv("LINUS_LOG_MAX_SEGMENTS")
+        self._integrator = GridIntegrator(
+            GRID_DEFINITIONS,
+            log_max_age_seconds=float(max_age_days) * 86400 if max_age_days else None,
+            log_max_segments=int(max_segments) if max_segments else None,
+            similarity=os.getenv("LINUS_SIMILARITY", "keywords").lower(),
+        )
+        started = time.perf_counter()
+        self._store = build_store()
         self._store.hydrate(self._integrator.cells, self._integrator.logs)
+        self._integrator.set_loaders(self._store.load_cell, self._store.load_logs)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        print(f"[Storage] {type(self._store).__name__} ready in {elapsed_ms:.1f} ms", file=sys.stderr)
+        if self._learners:
+            self._train_from_store()
+        if self._enforce_log_retention():
+            self._save()
 
     def post_segments(self, payload: Dict) -> Dict:
-        segments = payload.get("segments", [])
-        results = []
-        for item in segments:
-            segment = self._build_segment(item)
-            assignments, classifier_used, classifier_error = self._classify_segment(segment)
+        # "bulk" posts (re-classification, imports) queue behind interactive ones for Gemini quota.
+        priority = payload.get("priority", INTERACTIVE)
+        if priority not in LANES:
+            raise ValueError(f"Unknown priority {priority}")
+        transcript = payload.get("transcript")
+        if transcript:
+            # Segmented lazily and ingested a pool-full of windows at a time, so a long
+            # transcript never has all of its segments classified in one go.
+            segmented = self._transcript_items(transcript, payload.get("source", "transcript"))
+            items = chain(payload.get("segments", []), segmented)
+            window = self._stream_window() * self._classify_concurrency
+            results = []
+            while chunk := list(islice(items, window)):
+                results.extend(self._ingest(chunk, priority))
+        else:
+            results = self._ingest(payload.get("segments", []), priority)
+        response = {"results": results}
+        circuit = self._classifier.circuit_state()
+        if circuit is not None:
+            response["classifier_circuit"] = circuit
+        return response
+
+    def stream_segments(self, lines: Iterable[bytes | str], priority: str = INTERACTIVE) -> Iterator[Dict]:
+        """Ingest NDJSON segment lines as they arrive and yield each segment's result.
+
+        Each line is one item shaped like an entry of ``post_segments``' ``segments``.
+        Lines are classified and integrated in windows of whatever has arrived (at most
+        ``LINUS_STREAM_WINDOW``), so only a bounded number are held at once. An invalid
+        line yields an error record and the stream goes on; the last record is a summary.
+        """
+        if priority not in LANES:
+            raise ValueError(f"Unknown priority {priority}")
+        return self._stream(self._ndjson_records(lines), priority, self._stream_window())
+
+    def stream_transcript(
+        self, lines: Iterable[bytes | str], source: str = "transcript", priority: str = INTERACTIVE
+    ) -> Iterator[Dict]:
+        """Like ``stream_segments`` for raw transcript text, segmented on the server as it arrives."""
+        if priority not in LANES:
+            raise ValueError(f"Unknown priority {priority}")
+        text = (line.decode("utf-8") if isinstance(line, bytes) else line for line in lines)
+        records = (
+            (number, item, None) for number, item in enumerate(self._transcript_items(text, source), start=1)
+        )
+        return self._stream(records, priority, self._stream_window())
+
+    @staticmethod
+    def _stream_window() -> int:
+        return max(1, int(os.getenv("LINUS_STREAM_WINDOW", str(DEFAULT_STREAM_WINDOW))))
+
+    @staticmethod
+    def _transcript_items(transcript: str | Iterable[str], source: str) -> Iterator[Dict]:
+        return segment_transcript(
+            transcript,
+            source=source,
+            min_chars=int(os.getenv("LINUS_SEGMENT_MIN_CHARS", str(DEFAULT_MIN_CHARS))),
+            max_chars=int(os.getenv("LINUS_SEGMENT_MAX_CHARS", str(DEFAULT_MAX_CHARS))),
+        )
+
+    @staticmethod
+    def _ndjson_records(lines: Iterable[bytes | str]) -> Iterator[Tuple[int, Optional[Dict], Optional[str]]]:
+        for number, line in enumerate(lines, start=1):
+            if not line.strip():
+                continue
+            try:
+                item = json.loads(line)
+            except ValueError as exc:
+                yield number, None, f"invalid JSON: {exc}"
+                continue
+            if not isinstance(item, dict):
+                yield number, None, "each line must be a JSON object"
+                continue
+            yield number, item, None
+
+    def _stream(
+        self, records: Iterator[Tuple[int, Optional[Dict], Optional[str]]], priority: str, window: int
+    ) -> Iterator[Dict]:
+        counts = {"segments": 0, "errors": 0}
+        for batch in read_ahead(records, window):
+            items = [item for _, item, _ in batch if item is not None]
+            results = iter(self._ingest(items, priority)) if items else iter(())
+            for number, item, error in batch:
+                if item is None:
+                    counts["errors"] += 1
+                    yield {"line": number, "error": error}
+                else:
+                    counts["segments"] += 1
+                    yield next(results)
+        summary = {"done": True, **counts}
+        circuit = self._classifier.circuit_state()
+        if circuit is not None:
+            summary["classifier_circuit"] = circuit
+        yield summary
+
+    def _ingest(self, items: List[Dict], priority: str) -> List[Dict]:
+        """Classify, integrate and save one group of segment items; one result per item."""
+        segments = [self._build_segment(item) for item in items]
+        started = time.perf_counter()
+        with lane(priority):
+            classifications = self._classify_segments(segments)
+        if self._shadow is not None and segments:
+            self._shadow.submit(
+                [segment.text for segment in segments],
+                [assignments for assignments, _, _ in classifications],
+                (time.perf_counter() - started) * 1000,
+            )
+        for segment, (assignments, _, _) in zip(segments, classifications):
             segment.assignments = assignments
-            outcome = self._integrator.process(segment, assignments)
-            result_payload = format_segment_result(segment, classifier_used, classifier_error, outcome)
-            results.append(result_payload)
-        self._store.schedule_save(self._integrator.cells, self._integrator.logs)
-        return {"results": results}
+        with self._integrate_lock:
+            # One pass over the group: each touched summary is rebuilt once, one change set is saved.
+            outcomes = self._integrator.process_batch((segment, segment.assignments) for segment in segments)
+            results = [
+                format_segment_result(segment, classifier_used, classifier_error, outcome)
+                for segment, (_, classifier_used, classifier_error), outcome in zip(segments, classifications, outcomes)
+            ]
+            self._enforce_log_retention()
+            self._save()
+        return results
 
     def get_grid(self, grid_id: int) -> Dict:
-        cell = self._integrator.cells.get(grid_id)
+        cell = self._integrator.cell(grid_id)
         if not cell:
             raise KeyError(f"Unknown grid_id {grid_id}")
         return format_grid_response(cell, grid_id)
 
     def get_segment_log(self, segment_id: str) -> Dict:
-        logs = self._integrator.logs.get(segment_id, [])
+        logs = self._integrator.segment_log(segment_id)
         return format_segment_log(segment_id, logs)
 
     def get_all_grids(self) -> Dict:
@@ -64,9 +231,145 @@ class LinusService:
             grids.append(payload)
         return format_all_grids(grids)
 
+    def get_grid_items(
+        self,
+        grid_id: int,
+        kind: str = "entries",
+        limit: int = DEFAULT_LIMIT,
+        before: Optional[str] = None,
+        after: Optional[str] = None,
+    ) -> Dict:
+        """Cursor-paginated entries or needs_review items of one grid, newest first."""
+        if kind not in GRID_ITEM_KINDS:
+            raise ValueError(f"Unknown item kind {kind}")
+        cell = self._integrator.cell(grid_id)
+        if not cell:
+            raise KeyError(f"Unknown grid_id {grid_id}")
+        items = cell.entries if kind == "entries" else cell.needs_review
+        page, next_cursor, prev_cursor = paginate(items, limit=limit, before=before, after=after)
+        return format_grid_page(grid_id, kind, page, next_cursor, prev_cursor, len(items))
+
+    def get_grids_overview(self, latest: int = DEFAULT_LATEST_ENTRIES) -> Dict:
+        grids = []
+        for grid_id in sorted(self._integrator.cells.keys()):
+            grids.append(format_grid_summary(self._integrator.cell(grid_id), grid_id, latest))
+        return format_all_grids(grids)
+
+    def get_grid_response(self, grid_id: int, latest: Optional[int] = None) -> Tuple[bytes, str]:
+        """Encoded grid payload and its ETag, re-encoded only when the cell changed.
+
+        ``latest=None`` is the full ``get_grid`` payload, otherwise the summary view
+        with ``latest`` clamped to ``0..MAX_LIMIT``.
+        """
+        latest = self._clamp_latest(latest)
+        variant = "full" if latest is None else f"latest{latest}"
+        with self._integrate_lock:
+            cell = self._integrator.cell(grid_id)
+            if not cell:
+                raise KeyError(f"Unknown grid_id {grid_id}")
+            version = cell.version
+            cached = self._grid_cache.get((grid_id, variant))
+            if cached and cached[0] == version:
+                return cached[1], cached[2]
+            if latest is None:
+                payload = format_grid_response(cell, grid_id)
+            else:
+                payload = format_grid_summary(cell, grid_id, latest)
+            body = json.dumps(payload).encode("utf-8")
+            etag = f'"{self._epoch}-{grid_id}-{variant}-{version}"'
+            if latest in _CACHED_VARIANTS:
+                self._grid_cache[(grid_id, variant)] = (version, body, etag)
+            return body, etag
+
+    @staticmethod
+    def _clamp_latest(latest: Optional[int]) -> Optional[int]:
+        return None if latest is None else max(0, min(int(latest), MAX_LIMIT))
+
+    def get_all_grids_response(self, latest: Optional[int] = DEFAULT_LATEST_ENTRIES) -> Tuple[bytes, str]:
+        latest = self._clamp_latest(latest)
+        variant = "full" if latest is None else f"latest{latest}"
+        with self._integrate_lock:
+            grid_ids = sorted(self._integrator.cells.keys())
+            versions = tuple(self._integrator.cell(grid_id).version for grid_id in grid_ids)
+            cached = self._all_grids_cache.get(variant)
+            if cached and cached[0] == versions:
+                return cached[1], cached[2]
+            # Stitch the cached per-grid bodies instead of re-encoding; same shape as format_all_grids.
+            parts = [self.get_grid_response(grid_id, latest)[0] for grid_id in grid_ids]
+            body = b'{"grids": [' + b", ".join(parts) + b"]}"
+            etag = f'"{self._epoch}-all-{variant}-{".".join(str(version) for version in versions)}"'
+            if latest in _CACHED_VARIANTS:
+                self._all_grids_cache[variant] = (versions, body, etag)
+            return body, etag
+
+    def get_stats(self) -> Dict:
+        return {
+            "classifier": self._classifier_name,
+            "classifier_circuit": self._classifier.circuit_state(),
+            "classification": self._classifier.stats(),
+        }
+
+    def get_shadow_stats(self) -> Dict:
+        if self._shadow is None:
+            return {"enabled": False}
+        return {"enabled": True, **self._shadow.stats()}
+
     def export_state(self) -> Dict:
         return self._store.snapshot(self._integrator.cells, self._integrator.logs)
 
+    def stream_export(
+        self,
+        fmt: str = "ndjson",
+        grid_id: Optional[int] = None,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+    ) -> Iterator[bytes]:
+        """One record per line, read straight from the store; ``since``/``until`` are ISO dates or datetimes."""
+        if fmt not in EXPORT_FORMATS:
+            raise ValueError(f"Unsupported export format {fmt}")
+        if grid_id is not None and grid_id not in self._integrator.cells:
+            raise KeyError(f"Unknown grid_id {grid_id}")
+        records = self._store.iter_records(
+            self._integrator.cells,
+            self._integrator.logs,
+            grid_id=grid_id,
+            since=self._parse_bound(since),
+            until=self._parse_bound(until),
+        )
+        return format_export_stream(records, fmt)
+
+    @staticmethod
+    def _parse_bound(value: Optional[str]) -> Optional[float]:
+        if not value:
+            return None
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        if parsed.tzinfo is None:
+            parsed = parsed.replace(tzinfo=timezone.utc)
+        return parsed.timestamp()
+
+    def _enforce_log_retention(self) -> int:
+        evicted = self._integrator.evict_logs()
+        # Archive before the save that drops them from the state file.
+        self._store.archive_logs(evicted)
+        return len(evicted)
+
+    def _train_from_store(self) -> None:
+        started = time.perf_counter()
+        records = self._store.iter_records(self._integrator.cells, self._integrator.logs)
+        examples = [(record["snippet"], record["grid_id"]) for record in records if record["type"] == "entry"]
+        learned = 0
+        for learner in self._learners:
+            learned = learner.learn(examples)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        print(f"[Classifier] n-gram model trained on {learned} entries in {elapsed_ms:.1f} ms", file=sys.stderr)
+
+    def _save(self) -> None:
+        changes = self._integrator.drain_changes()
+        if changes.entries:
+            for learner in self._learners:
+                learner.learn((entry.snippet, grid_id) for grid_id, entry in changes.entries)
+        self._store.schedule_save(self._integrator.cells, self._integrator.logs, changes)
+
     @staticmethod
     def _build_segment(item: Dict) -> Segment:
         segment_id = item.get("segment_id") or f"seg-{uuid.uuid4().hex[:8]}"
@@ -86,17 +389,40 @@ class LinusService:
             assignments=[],
         )
 
+    def _classify_segments(self, segments: List[Segment]) -> List[tuple[List[GridAssignment], str, str | None]]:
+        if len(segments) == 1:
+            return [self._classify_segment(segments[0])]
+        # Several paragraphs share one upstream request; failed items fall back one by one.
+        texts = [segment.text for segment in segments]
+        batch_size = self._classifier.parallel_batch_size
+        if not batch_size or self._classify_concurrency == 1 or len(texts) <= batch_size:
+            batch = self._classifier.classify_batch(texts)
+        else:
+            # Batches run concurrently but are collected in order, so integration stays deterministic.
+            # Each worker runs in a copy of this context so it keeps the request's quota lane.
+            chunks = [texts[start:start + batch_size] for start in range(0, len(texts), batch_size)]
+            futures = [
+                self._classify_pool.submit(copy_context().run, self._classifier.classify_batch, chunk) for chunk in chunks
+            ]
+            batch = [result for future in futures for result in future.result()]
+        return [self._resolve_classification(segment, result) for segment, result in zip(segments, batch)]
+
     def _classify_segment(self, segment: Segment) -> tuple[List[GridAssignment], str, str | None]:
-        classifier_name = "rule_based"
-        error_reason = None
         try:
-            assignments = self._classifier.classify(segment.text)
-            classifier_name = "gemini" if self._using_gemini else "rule_based"
+            result = self._classifier.classify(segment.text)
         except ClassificationError as exc:
-            error_reason = str(exc)
-            print(f"[Classifier] Gemini failed for segment {segment.id}: {error_reason}", file=sys.stderr)
-            assignments = self._fallback_classifier.classify(segment.text)
-            classifier_name = "rule_based_fallback"
-        return assignments, classifier_name, error_reason
+            result = exc
+        return self._resolve_classification(segment, result)
+
+    def _resolve_classification(
+        self, segment: Segment, result: List[GridAssignment] | ClassificationError
+    ) -> tuple[List[GridAssignment], str, str | None]:
+        if not isinstance(result, ClassificationError):
+            tier = result[0].tier if result else None
+            return result, tier or self._classifier_name, None
+        error_reason = str(result)
+        print(f"[Classifier] {self._classifier_name} failed for segment {segment.id}: {error_reason}", file=sys.stderr)
+        assignments = self._fallback_classifier.classify(segment.text)
+        return assignments, f"{self._fallback_name}_fallback", error_reason
 
     # _augment_outcome moved to views.py
@@ -0,0 +1,129 @@
+"""Shadow classification: compare a candidate classifier against the live one.
+
+The shadow classifier sees the same segments as the primary, but on its own
+worker thread after the request has been classified, so it never delays a
+post or touches the grids. Per segment it records whether both picked the
+same primary grid, the confidence difference and each side's latency.
+"""
+
+from __future__ import annotations
+
+import sys
+import threading
+import time
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Sequence
+
+from .classifier import BaseClassifier, ClassificationError
+from .models import GridAssignment
+from .quota import BULK, lane
+
+
+def _top(assignments: List[GridAssignment]) -> Optional[GridAssignment]:
+    return next((a for a in assignments if not a.secondary), assignments[0] if assignments else None)
+
+
+def _percentile(samples: Sequence[float], pct: float) -> float:
+    ordered = sorted(samples)
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))]
+
+
+class ShadowRunner:
+    # Latency percentiles cover this many of the most recent segments.
+    LATENCY_WINDOW = 1000
+
+    def __init__(self, classifier: BaseClassifier, name: str, max_pending: int = 64):
+        self.classifier = classifier
+        self.name = name
+        self._max_pending = max_pending
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="linus-shadow")
+        self._cond = threading.Condition()
+        self._pending = 0
+        self._compared = 0
+        self._agreed = 0
+        self._confidence_delta = 0.0
+        self._abs_confidence_delta = 0.0
+        self._errors = 0
+        self._dropped = 0
+        self._disagreements: Counter = Counter()
+        self._primary_ms: deque = deque(maxlen=self.LATENCY_WINDOW)
+        self._shadow_ms: deque = deque(maxlen=self.LATENCY_WINDOW)
+
+    def submit(self, texts: Sequence[str], primary: Sequence[List[GridAssignment]], primary_ms: float) -> bool:
+        """Queue one post for shadow classification; dropped (and counted) when the backlog is full."""
+        with self._cond:
+            if self._pending >= self._max_pending:
+                self._dropped += len(texts)
+                return False
+            self._pending += 1
+        self._executor.submit(self._run, list(texts), list(primary), primary_ms)
+        return True
+
+    def _run(self, texts: List[str], primary: List[List[GridAssignment]], primary_ms: float) -> None:
+        try:
+            started = time.perf_counter()
+            # Shadow calls never compete with live posts for upstream quota.
+            with lane(BULK):
+                results = self.classifier.classify_batch(texts)
+            shadow_ms = (time.perf_counter() - started) * 1000
+            self._record(primary, results, primary_ms / len(texts), shadow_ms / len(texts))
+        except Exception as exc:  # a broken candidate must not take the worker down
+            print(f"[Shadow] {self.name} failed: {exc}", file=sys.stderr)
+            with self._cond:
+                self._errors += len(texts)
+        finally:
+            with self._cond:
+                self._pending -= 1
+                self._cond.notify_all()
+
+    def _record(self, primary, results, primary_ms: float, shadow_ms: float) -> None:
+        with self._cond:
+            for expected, actual in zip(primary, results):
+                self._primary_ms.append(primary_ms)
+                self._shadow_ms.append(shadow_ms)
+                if isinstance(actual, ClassificationError):
+                    self._errors += 1
+                    continue
+                live, candidate = _top(expected), _top(actual)
+                if live is None or candidate is None:
+                    continue
+                self._compared += 1
+                if live.grid_id == candidate.grid_id:
+                    self._agreed += 1
+                else:
+                    self._disagreements[f"{live.grid_id}->{candidate.grid_id}"] += 1
+                delta = candidate.confidence - live.confidence
+                self._confidence_delta += delta
+                self._abs_confidence_delta += abs(delta)
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until every queued post has been compared."""
+        with self._cond:
+            return self._cond.wait_for(lambda: self._pending == 0, timeout)
+
+    def stats(self) -> dict:
+        with self._cond:
+            compared = self._compared
+            return {
+                "shadow": self.name,
+                "compared": compared,
+                "agreed": self._agreed,
+                "agreement_rate": round(self._agreed / compared, 3) if compared else None,
+                "avg_confidence_delta": round(self._confidence_delta / compared, 3) if compared else None,
+                "avg_abs_confidence_delta": round(self._abs_confidence_delta / compared, 3) if compared else None,
+                # "primary grid->shadow grid": segments
+                "disagreements": dict(self._disagreements.most_common()),
+                "shadow_errors": self._errors,
+                "dropped": self._dropped,
+                "pending": self._pending,
+                "latency_ms": {
+                    "primary_p50": round(_percentile(self._primary_ms, 50), 3),
+                    "primary_p95": round(_percentile(self._primary_ms, 95), 3),
+                    "shadow_p50": round(_percentile(self._shadow_ms, 50), 3),
+                    "shadow_p95": round(_percentile(self._shadow_ms, 95), 3),
+                },
+                "classifier": self.classifier.stats(),
+            }
@@ -0,0 +1,90 @@
+"""Compact binary snapshot file that can be opened without parsing its contents.
+
+Layout::
+
+    header  "LNSNAP1\n" + uint64 index_offset + uint64 index_length
+    blocks  one UTF-8 JSON document per cell and per segment log, back to back
+    index   JSON {"cells": {grid_id: [offset, length]}, "logs": {segment_id: [offset, length]}}
+
+Opening a snapshot maps the file and reads only the index; a block is decoded
+when its cell or segment log is first requested.
+"""
+
+from __future__ import annotations
+
+import json
+import mmap
+import os
+import struct
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Tuple
+
+MAGIC = b"LNSNAP1\n"
+_HEADER = struct.Struct("<8sQQ")
+
+
+class SnapshotFormatError(Exception):
+    """Raised when a file is not a readable snapshot."""
+
+
+class SnapshotFile:
+    def __init__(self, path: Path):
+        self._fh = path.open("rb")
+        try:
+            self._map = mmap.mmap(self._fh.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError as exc:  # empty file
+            self._fh.close()
+            raise SnapshotFormatError(f"empty snapshot {path}") from exc
+        magic, index_offset, index_length = _HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            self.close()
+            raise SnapshotFormatError(f"bad magic in {path}")
+        index = json.loads(self._map[index_offset:index_offset + index_length])
+        self._cells: Dict[int, Tuple[int, int]] = {int(key): tuple(span) for key, span in index["cells"].items()}
+        self._logs: Dict[str, Tuple[int, int]] = {key: tuple(span) for key, span in index["logs"].items()}
+
+    def cell_ids(self) -> Iterable[int]:
+        return self._cells.keys()
+
+    def segment_ids(self) -> Iterable[str]:
+        return self._logs.keys()
+
+    def cell_block(self, grid_id: int) -> Optional[bytes]:
+        return self._block(self._cells.get(grid_id))
+
+    def log_block(self, segment_id: str) -> Optional[bytes]:
+        return self._block(self._logs.get(segment_id))
+
+    def _block(self, span: Optional[Tuple[int, int]]) -> Optional[bytes]:
+        if span is None:
+            return None
+        offset, length = span
+        return self._map[offset:offset + length]
+
+    def close(self) -> None:
+        self._map.close()
+        self._fh.close()
+
+
+def write_snapshot(
+    path: Path,
+    cells: Iterable[Tuple[int, bytes]],
+    logs: Iterable[Tuple[str, bytes]],
+) -> None:
+    """Atomically write a snapshot from already-encoded blocks."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + ".tmp")
+    index: dict = {"cells": {}, "logs": {}}
+    with tmp_path.open("wb") as fh:
+        fh.write(_HEADER.pack(MAGIC, 0, 0))
+        offset = _HEADER.size
+        for section, blocks in (("cells", cells), ("logs", logs)):
+            for key, block in blocks:
+                fh.write(block)
+                index[section][str(key)] = [offset, len(block)]
+                offset += len(block)
+        encoded_index = json.dumps(index, ensure_ascii=False).encode("utf-8")
+        fh.write(encoded_index)
+        fh.seek(0)
+        fh.write(_HEADER.pack(MAGIC, offset, len(encoded_index)))
+    os.replace(tmp_path, path)
@@ -0,0 +1,241 @@
+"""SQLite persistence backend (``LINUS_STATE_PATH=sqlite:///path/to/linus.db``).
+
+Entries, review items and insight logs live in indexed tables; nothing but
+the per-grid summaries is read at startup. Cells and segment logs are
+loaded on first use through ``load_cell`` / ``load_logs``.
+"""
+
+from __future__ import annotations
+
+import json
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from .models import ChangeSet, GridCell, GridEntry, InsightLogEntry
+from .storage import BaseStore, _entry_record, _entry_to_dict, _log_record, _log_to_dict
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS summaries (
+    grid_id INTEGER PRIMARY KEY,
+    summary TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS entries (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    grid_id INTEGER NOT NULL,
+    segment_id TEXT NOT NULL,
+    source TEXT NOT NULL,
+    snippet TEXT NOT NULL,
+    status TEXT NOT NULL,
+    related_grids TEXT NOT NULL,
+    confidence REAL NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_entries_grid ON entries (grid_id, created_at);
+CREATE INDEX IF NOT EXISTS idx_entries_segment ON entries (segment_id);
+CREATE INDEX IF NOT EXISTS idx_entries_created ON entries (created_at);
+CREATE TABLE IF NOT EXISTS review_items (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    grid_id INTEGER NOT NULL,
+    segment_id TEXT NOT NULL,
+    source TEXT NOT NULL,
+    snippet TEXT NOT NULL,
+    status TEXT NOT NULL,
+    related_grids TEXT NOT NULL,
+    confidence REAL NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_review_grid ON review_items (grid_id, created_at);
+CREATE INDEX IF NOT EXISTS idx_review_segment ON review_items (segment_id);
+CREATE INDEX IF NOT EXISTS idx_review_created ON review_items (created_at);
+CREATE TABLE IF NOT EXISTS insight_logs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    segment_id TEXT NOT NULL,
+    grid_id INTEGER NOT NULL,
+    action TEXT NOT NULL,
+    similarity REAL NOT NULL,
+    comment TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_logs_segment ON insight_logs (segment_id);
+CREATE INDEX IF NOT EXISTS idx_logs_grid ON insight_logs (grid_id, created_at);
+CREATE INDEX IF NOT EXISTS idx_logs_created ON insight_logs (created_at);
+"""
+
+_ENTRY_COLUMNS = "grid_id, segment_id, source, snippet, status, related_grids, confidence, created_at"
+
+
+def _entry_row(grid_id: int, entry: GridEntry) -> tuple:
+    return (
+        grid_id,
+        entry.segment_id,
+        entry.source,
+        entry.snippet,
+        entry.status,
+        json.dumps(list(entry.related_grids)),
+        entry.confidence,
+        entry.created_ts,
+    )
+
+
+def _entry_from_row(row: sqlite3.Row) -> GridEntry:
+    return GridEntry(
+        segment_id=row["segment_id"],
+        source=row["source"],
+        snippet=row["snippet"],
+        status=row["status"],
+        related_grids=json.loads(row["related_grids"]),
+        confidence=row["confidence"],
+        created_ts=row["created_at"],
+    )
+
+
+def _log_row(log: InsightLogEntry) -> tuple:
+    return (log.segment_id, log.grid_id, log.action, log.similarity, log.comment, log.created_ts)
+
+
+def _log_from_row(row: sqlite3.Row) -> InsightLogEntry:
+    return InsightLogEntry(
+        segment_id=row["segment_id"],
+        grid_id=row["grid_id"],
+        action=row["action"],
+        similarity=row["similarity"],
+        comment=row["comment"],
+        created_ts=row["created_at"],
+    )
+
+
+def _filters(grid_id: Optional[int], since: Optional[float], until: Optional[float]) -> Tuple[str, tuple]:
+    clauses, params = [], []
+    if grid_id is not None:
+        clauses.append("grid_id = ?")
+        params.append(grid_id)
+    if since is not None:
+        clauses.append("created_at >= ?")
+        params.append(since)
+    if until is not None:
+        clauses.append("created_at < ?")
+        params.append(until)
+    return (" WHERE " + " AND ".join(clauses) if clauses else ""), tuple(params)
+
+
+class SQLiteStore(BaseStore):
+    def __init__(self, path: Path):
+        self._path = path
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(path), check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+
+    def hydrate(self, cells: Dict[int, GridCell], logs: Dict[str, List[InsightLogEntry]]) -> None:
+        with self._lock:
+            rows = self._conn.execute("SELECT grid_id, summary FROM summaries").fetchall()
+        for row in rows:
+            cell = cells.get(row["grid_id"])
+            if cell:
+                cell.summary = json.loads(row["summary"])
+
+    def load_cell(self, cell: GridCell) -> None:
+        grid_id = cell.definition.grid_id
+        with self._lock:
+            entries = self._conn.execute(
+                f"SELECT {_ENTRY_COLUMNS} FROM entries WHERE grid_id = ? ORDER BY id", (grid_id,)
+            ).fetchall()
+            review = self._conn.execute(
+                f"SELECT {_ENTRY_COLUMNS} FROM review_items WHERE grid_id = ? ORDER BY id", (grid_id,)
+            ).fetchall()
+        cell.entries = [_entry_from_row(row) for row in entries]
+        cell.needs_review = [_entry_from_row(row) for row in review]
+
+    def load_logs(self, segment_id: str) -> List[InsightLogEntry]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT * FROM insight_logs WHERE segment_id = ? ORDER BY id", (segment_id,)
+            ).fetchall()
+        return [_log_from_row(row) for row in rows]
+
+    def save_now(
+        self,
+        cells: Dict[int, GridCell],
+        logs: Dict[str, List[InsightLogEntry]],
+        changes: Optional[ChangeSet] = None,
+    ) -> None:
+        # Rows are append-only, so without a change set only the summaries can be written safely:
+        # cells that were never loaded are empty in memory and must not overwrite the tables.
+        summaries = changes.summaries if changes is not None else set(cells)
+        with self._lock, self._conn:
+            if changes is not None:
+                self._conn.executemany(
+                    f"INSERT INTO entries ({_ENTRY_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    [_entry_row(grid_id, entry) for grid_id, entry in changes.entries],
+                )
+                self._conn.executemany(
+                    f"INSERT INTO review_items ({_ENTRY_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    [_entry_row(grid_id, entry) for grid_id, entry in changes.needs_review],
+                )
+                self._conn.executemany(
+                    "INSERT INTO insight_logs (segment_id, grid_id, action, similarity, comment, created_at)"
+                    " VALUES (?, ?, ?, ?, ?, ?)",
+                    [_log_row(log) for log in changes.logs],
+                )
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO summaries (grid_id, summary) VALUES (?, ?)",
+                [
+                    (grid_id, json.dumps(cells[grid_id].summary, ensure_ascii=False))
+                    for grid_id in sorted(summaries)
+                    if grid_id in cells
+                ],
+            )
+
+    def schedule_save(
+        self,
+        cells: Dict[int, GridCell],
+        logs: Dict[str, List[InsightLogEntry]],
+        changes: Optional[ChangeSet] = None,
+    ) -> None:
+        # One WAL transaction per post is cheap enough to run inline.
+        self.save_now(cells, logs, changes)
+
+    def snapshot(self, cells: Dict[int, GridCell], logs: Dict[str, List[InsightLogEntry]]) -> dict:
+        state: dict = {"cells": {}, "logs": {}}
+        for grid_id, cell in cells.items():
+            state["cells"][str(grid_id)] = {"summary": list(cell.summary), "entries": [], "needs_review": []}
+        with self._lock:
+            for table, key in (("entries", "entries"), ("review_items", "needs_review")):
+                for row in self._conn.execute(f"SELECT {_ENTRY_COLUMNS} FROM {table} ORDER BY id"):
+                    payload = state["cells"].setdefault(
+                        str(row["grid_id"]), {"summary": [], "entries": [], "needs_review": []}
+                    )
+                    payload[key].append(_entry_to_dict(_entry_from_row(row)))
+            for row in self._conn.execute("SELECT * FROM insight_logs ORDER BY id"):
+                state["logs"].setdefault(row["segment_id"], []).append(_log_to_dict(_log_from_row(row)))
+        return state
+
+    def iter_records(
+        self,
+        cells: Dict[int, GridCell],
+        logs: Dict[str, List[InsightLogEntry]],
+        grid_id: Optional[int] = None,
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+    ) -> Iterator[dict]:
+        # A private read connection streams rows from a WAL snapshot without holding the writer lock.
+        where, params = _filters(grid_id, since, until)
+        reader = sqlite3.connect(f"{self._path.resolve().as_uri()}?mode=ro", uri=True)
+        reader.row_factory = sqlite3.Row
+        try:
+            for table, kind in (("entries", "entry"), ("review_items", "needs_review")):
+                for row in reader.execute(f"SELECT {_ENTRY_COLUMNS} FROM {table}{where} ORDER BY id", params):
+                    yield _entry_record(kind, row["grid_id"], _entry_from_row(row))
+            for row in reader.execute(f"SELECT * FROM insight_logs{where} ORDER BY id", params):
+                yield _log_record(_log_from_row(row))
+        finally:
+            reader.close()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
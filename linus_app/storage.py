@@ -1,24 +1,40 @@
-"""JSON persistence for grid state."""
+"""JSON persistence for grid state.
+
+Two modes are supported:
+
+* snapshot (default): every save rewrites the whole state document.
+* journal: every save appends only the new entries, review items, summaries
+  and logs to ``<state>.journal``; a background compactor folds the journal
+  into the checkpoint document once it grows past ``compact_bytes``.
+
+A state path ending in ``.snap`` switches snapshot mode to the binary format
+in ``snapshot.py``: startup reads only its index and cells / segment logs are
+decoded the first time the integrator asks for them.
+"""
 
 from __future__ import annotations
 
 import json
 import os
 import threading
+import time
+from abc import ABC, abstractmethod
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Dict, Iterator, List, Optional, Set, Tuple
 
-from .models import GridCell, GridEntry, InsightLogEntry
+from .archive import LogArchive
+from .models import ChangeSet, GridCell, GridEntry, InsightLogEntry, to_epoch
+from .snapshot import SnapshotFile, SnapshotFormatError, write_snapshot
 
 
-def _parse_dt(value: str | None) -> datetime:
+def _parse_ts(value: str | None) -> float:
     if not value:
-        return datetime.utcnow()
+        return time.time()
     try:
-        return datetime.fromisoformat(value)
+        return to_epoch(datetime.fromisoformat(value))
     except Exception:
-        return datetime.utcnow()
+        return time.time()
 
 
 def _entry_from_dict(data: dict) -> GridEntry:
@@ -29,7 +45,7 @@ def _entry_from_dict(data: dict) -> GridEntry:
         status=data.get("status", "new_entry"),
         related_grids=data.get("related_grids", []),
         confidence=data.get("confidence", 0.0),
-        created_at=_parse_dt(data.get("created_at")),
+        created_ts=_parse_ts(data.get("created_at")),
     )
 
 
@@ -39,7 +55,7 @@ def _entry_to_dict(entry: GridEntry) -> dict:
         "source": entry.source,
         "snippet": entry.snippet,
         "status": entry.status,
-        "related_grids": entry.related_grids,
+        "related_grids": list(entry.related_grids),
         "confidence": entry.confidence,
         "created_at": entry.created_at.isoformat(),
     }
@@ -52,7 +68,7 @@ def _log_from_dict(segment_id: str, data: dict) -> InsightLogEntry:
         action=data["action"],
         similarity=data.get("similarity", 0.0),
         comment=data.get("comment", ""),
-        created_at=_parse_dt(data.get("created_at")),
+        created_ts=_parse_ts(data.get("created_at")),
     )
 
 
@@ -66,24 +82,246 @@ def _log_to_dict(log: InsightLogEntry) -> dict:
     }
 
 
-class PersistentStore:
-    def __init__(self, path: Path, debounce_seconds: Optional[float] = None):
+def _cell_to_dict(cell: GridCell) -> dict:
+    return {
+        "summary": list(cell.summary),
+        "entries": [_entry_to_dict(entry) for entry in list(cell.entries)],
+        "needs_review": [_entry_to_dict(entry) for entry in list(cell.needs_review)],
+    }
+
+
+def _encode(payload) -> str:
+    return json.dumps(payload, ensure_ascii=False)
+
+
+def _in_window(created_ts: float, since: Optional[float], until: Optional[float]) -> bool:
+    return (since is None or created_ts >= since) and (until is None or created_ts < until)
+
+
+def _entry_record(kind: str, grid_id: int, entry: GridEntry) -> dict:
+    return {"type": kind, "grid_id": grid_id, **_entry_to_dict(entry)}
+
+
+def _log_record(log: InsightLogEntry) -> dict:
+    return {"type": "log", "segment_id": log.segment_id, **_log_to_dict(log)}
+
+
+def _cell_records(
+    grid_id: int,
+    entries: List[GridEntry],
+    needs_review: List[GridEntry],
+    since: Optional[float],
+    until: Optional[float],
+) -> Iterator[dict]:
+    for kind, items in (("entry", entries), ("needs_review", needs_review)):
+        for entry in items:
+            if _in_window(entry.created_ts, since, until):
+                yield _entry_record(kind, grid_id, entry)
+
+
+def _log_records(
+    history: List[InsightLogEntry],
+    grid_id: Optional[int],
+    since: Optional[float],
+    until: Optional[float],
+) -> Iterator[dict]:
+    for log in history:
+        if (grid_id is None or log.grid_id == grid_id) and _in_window(log.created_ts, since, until):
+            yield _log_record(log)
+
+
+def _empty_state() -> dict:
+    return {"cells": {}, "logs": {}}
+
+
+def _journal_records(changes: ChangeSet, cells: Dict[int, GridCell]) -> List[dict]:
+    records: List[dict] = []
+    for grid_id, entry in changes.entries:
+        records.append({"op": "entry", "grid_id": grid_id, "entry": _entry_to_dict(entry)})
+    for grid_id, entry in changes.needs_review:
+        records.append({"op": "review", "grid_id": grid_id, "entry": _entry_to_dict(entry)})
+    for grid_id in sorted(changes.summaries):
+        cell = cells.get(grid_id)
+        if cell:
+            records.append({"op": "summary", "grid_id": grid_id, "summary": list(cell.summary)})
+    for segment_id, history in changes.paged_logs.items():
+        # Replay only sees the hot list, so restore the paged-in history before appending to it.
+        records.append({"op": "history", "segment_id": segment_id, "history": [_log_to_dict(log) for log in history]})
+    for log in changes.logs:
+        records.append({"op": "log", "segment_id": log.segment_id, "log": _log_to_dict(log)})
+    for segment_id in sorted(changes.evicted_logs):
+        records.append({"op": "evict", "segment_id": segment_id})
+    return records
+
+
+def _apply_record(state: dict, record: dict) -> None:
+    """Replay one journal record onto the dict form of the state."""
+    op = record.get("op")
+    if op == "log":
+        state.setdefault("logs", {}).setdefault(record["segment_id"], []).append(record["log"])
+        return
+    if op == "history":
+        state.setdefault("logs", {})[record["segment_id"]] = list(record["history"])
+        return
+    if op == "evict":
+        state.setdefault("logs", {}).pop(record["segment_id"], None)
+        return
+    cell = state.setdefault("cells", {}).setdefault(str(record["grid_id"]), {"entries": [], "needs_review": []})
+    if op == "entry":
+        cell.setdefault("entries", []).append(record["entry"])
+    elif op == "review":
+        cell.setdefault("needs_review", []).append(record["entry"])
+    elif op == "summary":
+        cell["summary"] = record["summary"]
+
+
+def _read_journal(path: Path) -> List[dict]:
+    if not path.exists():
+        return []
+    records = []
+    with path.open("r", encoding="utf-8") as fh:
+        for line in fh:
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                # A torn final line from a crash mid-append; everything before it is intact.
+                continue
+    return records
+
+
+class BaseStore(ABC):
+    """Persistence backend behind LinusService.
+
+    Stores that hydrate lazily override ``load_cell`` / ``load_logs``; the
+    integrator calls them the first time a cell or segment log is needed.
+    """
+
+    @abstractmethod
+    def hydrate(self, cells: Dict[int, GridCell], logs: Dict[str, List[InsightLogEntry]]) -> None:
+        ...
+
+    @abstractmethod
+    def save_now(
+        self,
+        cells: Dict[int, GridCell],
+        logs: Dict[str, List[InsightLogEntry]],
+        changes: Optional[ChangeSet] = None,
+    ) -> None:
+        ...
+
+    @abstractmethod
+    def schedule_save(
+        self,
+        cells: Dict[int, GridCell],
+        logs: Dict[str, List[InsightLogEntry]],
+        changes: Optional[ChangeSet] = None,
+    ) -> None:
+        ...
+
+    @abstractmethod
+    def snapshot(self, cells: Dict[int, GridCell], logs: Dict[str, List[InsightLogEntry]]) -> dict:
+        ...
+
+    @abstractmethod
+    def iter_records(
+        self,
+        cells: Dict[int, GridCell],
+        logs: Dict[str, List[InsightLogEntry]],
+        grid_id: Optional[int] = None,
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+    ) -> Iterator[dict]:
+        """Yield one flat dict per entry, review item and log, filtered by grid and epoch window."""
+        ...
+
+    def load_cell(self, cell: GridCell) -> None:
+        return None
+
+    def load_logs(self, segment_id: str) -> List[InsightLogEntry]:
+        return []
+
+    def archive_logs(self, evicted: Dict[str, List[InsightLogEntry]]) -> None:
+        """Keep segment logs the integrator evicted from memory reachable via ``load_logs``."""
+        return None
+
+
+BINARY_SUFFIX = ".snap"
+
+
+class PersistentStore(BaseStore):
+    def __init__(
+        self,
+        path: Path,
+        debounce_seconds: Optional[float] = None,
+        journal: bool = False,
+        compact_bytes: Optional[int] = None,
+    ):
         self._path = path
+        self._journal = journal
+        self._binary = path.suffix == BINARY_SUFFIX
+        if self._binary and journal:
+            raise ValueError("journal mode keeps a JSON checkpoint; use a .json state path")
+        self._snapshot: Optional[SnapshotFile] = None
+        self._materialized_cells: Set[int] = set()
+        self._archive = LogArchive(path.with_name(path.name + ".archive"))
+        # Segments spilled to the archive since the last binary write; their snapshot blocks are stale.
+        self._archived_segments: Set[str] = set()
+        self._journal_path = path.with_name(path.name + ".journal")
+        self._sealed_path = path.with_name(path.name + ".journal.sealed")
+        self._seq = 0
         self._state = self._load()
         self._lock = threading.Lock()
-        self._pending: Optional[dict] = None
+        self._compact_lock = threading.Lock()
+        self._compactor: Optional[threading.Thread] = None
+        self._flush_lock = threading.Lock()
         self._timer: Optional[threading.Timer] = None
+        # Snapshot mode keeps the encoded JSON of every cell / segment log and only
+        # re-encodes what the integrator reported as dirty since the last flush.
+        self._cell_fragments: Dict[int, str] = {}
+        self._log_fragments: Dict[str, str] = {}
+        self._dirty_cells: Set[int] = set()
+        self._dirty_logs: Set[str] = set()
+        self._dirty_all = True
+        self._live: Optional[Tuple[Dict[int, GridCell], Dict[str, List[InsightLogEntry]]]] = None
         default_debounce = float(os.getenv("LINUS_SAVE_DEBOUNCE", "0.5"))
         self._debounce_seconds = debounce_seconds if debounce_seconds is not None else default_debounce
+        default_compact = int(os.getenv("LINUS_JOURNAL_COMPACT_BYTES", str(4 * 1024 * 1024)))
+        self._compact_bytes = compact_bytes if compact_bytes is not None else default_compact
 
     def _load(self) -> dict:
+        if self._binary:
+            self._snapshot = self._open_snapshot()
+            return _empty_state()
+        state = self._read_checkpoint()
+        if not self._journal:
+            return state
+        # Replay sealed (mid-compaction) records first, then the live journal.
+        # Records already folded into the checkpoint carry seq <= journal_seq.
+        folded_seq = self._seq = int(state.get("journal_seq", 0))
+        for record in _read_journal(self._sealed_path) + _read_journal(self._journal_path):
+            seq = int(record.get("seq", 0))
+            if seq <= folded_seq:
+                continue
+            _apply_record(state, record)
+            self._seq = max(self._seq, seq)
+        return state
+
+    def _open_snapshot(self) -> Optional[SnapshotFile]:
+        if not self._path.exists():
+            return None
+        try:
+            return SnapshotFile(self._path)
+        except (OSError, SnapshotFormatError, ValueError):
+            return None
+
+    def _read_checkpoint(self) -> dict:
         if not self._path.exists():
-            return {"cells": {}, "logs": {}}
+            return _empty_state()
         try:
             with self._path.open("r", encoding="utf-8") as fh:
                 return json.load(fh)
         except Exception:
-            return {"cells": {}, "logs": {}}
+            return _empty_state()
 
     def hydrate(self, cells: Dict[int, GridCell], logs: Dict[str, List[InsightLogEntry]]) -> None:
         for grid_id_str, payload in self._state.get("cells", {}).items():
@@ -98,50 +336,292 @@ class PersistentStore:
         for segment_id, entries in self._state.get("logs", {}).items():
             logs[segment_id] = [_log_from_dict(segment_id, item) for item in entries]
 
+    def load_cell(self, cell: GridCell) -> None:
+        grid_id = cell.definition.grid_id
+        with self._lock:
+            self._materialized_cells.add(grid_id)
+            block = self._snapshot.cell_block(grid_id) if self._snapshot else None
+        if block is None:
+            return
+        payload = json.loads(block)
+        cell.summary = payload.get("summary", cell.summary)
+        cell.entries = [_entry_from_dict(item) for item in payload.get("entries", [])]
+        cell.needs_review = [_entry_from_dict(item) for item in payload.get("needs_review", [])]
+
+    def load_logs(self, segment_id: str) -> List[InsightLogEntry]:
+        with self._lock:
+            block = None
+            if self._snapshot and segment_id not in self._archived_segments:
+                block = self._snapshot.log_block(segment_id)
+        history = json.loads(block) if block is not None else self._archive.load(segment_id)
+        return [_log_from_dict(segment_id, item) for item in history]
+
+    def archive_logs(self, evicted: Dict[str, List[InsightLogEntry]]) -> None:
+        if not evicted:
+            return
+        self._archive.spill(
+            {segment_id: [_log_to_dict(log) for log in history] for segment_id, history in evicted.items()}
+        )
+        with self._lock:
+            self._archived_segments.update(evicted)
+
     def _serialize(self, cells: Dict[int, GridCell], logs: Dict[str, List[InsightLogEntry]]) -> dict:
         return {
-            "cells": {
-                str(grid_id): {
-                    "summary": cell.summary,
-                    "entries": [_entry_to_dict(entry) for entry in cell.entries],
-                    "needs_review": [_entry_to_dict(entry) for entry in cell.needs_review],
-                }
-                for grid_id, cell in cells.items()
-            },
+            "cells": {str(grid_id): _cell_to_dict(cell) for grid_id, cell in cells.items()},
             "logs": {
                 segment_id: [_log_to_dict(log) for log in entries]
                 for segment_id, entries in logs.items()
             },
         }
 
-    def save_now(self, cells: Dict[int, GridCell], logs: Dict[str, List[InsightLogEntry]]) -> None:
-        state = self._serialize(cells, logs)
-        self._write_state(state)
+    def save_now(
+        self,
+        cells: Dict[int, GridCell],
+        logs: Dict[str, List[InsightLogEntry]],
+        changes: Optional[ChangeSet] = None,
+    ) -> None:
+        if self._journal:
+            self._save_journal(cells, logs, changes)
+            return
+        self._mark_dirty(cells, logs, changes)
+        self._flush_pending()
 
-    def schedule_save(self, cells: Dict[int, GridCell], logs: Dict[str, List[InsightLogEntry]]) -> None:
+    def schedule_save(
+        self,
+        cells: Dict[int, GridCell],
+        logs: Dict[str, List[InsightLogEntry]],
+        changes: Optional[ChangeSet] = None,
+    ) -> None:
+        if self._journal:
+            # Appends are small; they go out immediately so a crash loses nothing already acknowledged.
+            self._save_journal(cells, logs, changes)
+            return
         if self._debounce_seconds <= 0:
-            self.save_now(cells, logs)
+            self.save_now(cells, logs, changes)
             return
+        # Only bookkeeping happens on the request thread; encoding runs in _flush_pending.
+        self._mark_dirty(cells, logs, changes)
         with self._lock:
-            self._pending = self._serialize(cells, logs)
             if self._timer and self._timer.is_alive():
                 return
             self._timer = threading.Timer(self._debounce_seconds, self._flush_pending)
             self._timer.daemon = True
             self._timer.start()
 
+    def _mark_dirty(
+        self,
+        cells: Dict[int, GridCell],
+        logs: Dict[str, List[InsightLogEntry]],
+        changes: Optional[ChangeSet],
+    ) -> None:
+        with self._lock:
+            self._live = (cells, logs)
+            if changes is None:
+                self._dirty_all = True
+                return
+            self._dirty_cells.update(changes.touched_cells)
+            self._dirty_logs.update(changes.touched_segments)
+
     def _flush_pending(self) -> None:
+        with self._flush_lock:
+            with self._lock:
+                live = self._live
+                dirty_all, dirty_cells, dirty_logs = self._dirty_all, self._dirty_cells, self._dirty_logs
+                self._dirty_all, self._dirty_cells, self._dirty_logs = False, set(), set()
+                self._timer = None
+            if live is None:
+                return
+            cells, logs = live
+            if dirty_all:
+                # Cells still sitting unread in the binary snapshot are empty in memory; keep their blocks.
+                dirty_cells = {grid_id for grid_id in cells if not self._is_lazy_cell(grid_id)}
+                dirty_logs = set(list(logs))
+                self._log_fragments = {key: value for key, value in self._log_fragments.items() if key in logs}
+            for grid_id in dirty_cells:
+                cell = cells.get(grid_id)
+                if cell:
+                    self._cell_fragments[grid_id] = _encode(_cell_to_dict(cell))
+            for segment_id in dirty_logs:
+                entries = logs.get(segment_id)
+                if entries is None:
+                    self._log_fragments.pop(segment_id, None)
+                    continue
+                self._log_fragments[segment_id] = _encode([_log_to_dict(log) for log in list(entries)])
+            if self._binary:
+                self._write_binary()
+            else:
+                self._write_fragments()
+
+    def _is_lazy_cell(self, grid_id: int) -> bool:
+        return (
+            self._snapshot is not None
+            and grid_id not in self._materialized_cells
+            and self._snapshot.cell_block(grid_id) is not None
+        )
+
+    def _write_binary(self) -> None:
         with self._lock:
-            state = self._pending
-            self._pending = None
-            self._timer = None
-        if state:
-            self._write_state(state)
+            previous = self._snapshot
+            cell_ids = sorted(set(self._cell_fragments) | set(previous.cell_ids() if previous else ()))
+            segment_ids = list(self._log_fragments)
+            if previous:
+                segment_ids += [
+                    key
+                    for key in previous.segment_ids()
+                    if key not in self._log_fragments and key not in self._archived_segments
+                ]
+            cells = [
+                (grid_id, self._cell_fragments[grid_id].encode("utf-8"))
+                if grid_id in self._cell_fragments
+                else (grid_id, previous.cell_block(grid_id))
+                for grid_id in cell_ids
+            ]
+            logs = [
+                (segment_id, self._log_fragments[segment_id].encode("utf-8"))
+                if segment_id in self._log_fragments
+                else (segment_id, previous.log_block(segment_id))
+                for segment_id in segment_ids
+            ]
+            write_snapshot(self._path, cells, logs)
+            self._snapshot = SnapshotFile(self._path)
+            # Only a segment archived while this write was being assembled can still be in the file.
+            self._archived_segments.intersection_update(self._snapshot.segment_ids())
+            if previous:
+                previous.close()
+
+    def _write_fragments(self) -> None:
+        cells = ", ".join(
+            f"{_encode(str(grid_id))}: {fragment}" for grid_id, fragment in sorted(self._cell_fragments.items())
+        )
+        logs = ", ".join(f"{_encode(segment_id)}: {fragment}" for segment_id, fragment in self._log_fragments.items())
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self._path.with_name(self._path.name + ".tmp")
+        with tmp_path.open("w", encoding="utf-8") as fh:
+            fh.write(f'{{"cells": {{{cells}}}, "logs": {{{logs}}}}}')
+        os.replace(tmp_path, self._path)
 
     def _write_state(self, state: dict) -> None:
         self._path.parent.mkdir(parents=True, exist_ok=True)
-        with self._path.open("w", encoding="utf-8") as fh:
+        tmp_path = self._path.with_name(self._path.name + ".tmp")
+        with tmp_path.open("w", encoding="utf-8") as fh:
             json.dump(state, fh, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self._path)
+
+    def _save_journal(
+        self,
+        cells: Dict[int, GridCell],
+        logs: Dict[str, List[InsightLogEntry]],
+        changes: Optional[ChangeSet],
+    ) -> None:
+        if changes is None:
+            # Caller cannot say what changed: fall back to a full checkpoint.
+            self._checkpoint_full(cells, logs)
+            return
+        records = _journal_records(changes, cells)
+        if not records:
+            return
+        with self._lock:
+            lines = []
+            for record in records:
+                self._seq += 1
+                record["seq"] = self._seq
+                lines.append(json.dumps(record, ensure_ascii=False))
+            self._journal_path.parent.mkdir(parents=True, exist_ok=True)
+            with self._journal_path.open("a", encoding="utf-8") as fh:
+                fh.write("\n".join(lines) + "\n")
+                fh.flush()
+                os.fsync(fh.fileno())
+            size = self._journal_path.stat().st_size
+        if size >= self._compact_bytes:
+            self._start_compaction()
+
+    def _checkpoint_full(self, cells: Dict[int, GridCell], logs: Dict[str, List[InsightLogEntry]]) -> None:
+        with self._compact_lock:
+            with self._lock:
+                state = self._serialize(cells, logs)
+                state["journal_seq"] = self._seq
+                self._write_state(state)
+                for path in (self._sealed_path, self._journal_path):
+                    if path.exists():
+                        path.unlink()
+
+    def _start_compaction(self) -> None:
+        with self._lock:
+            if self._compactor and self._compactor.is_alive():
+                return
+            self._compactor = threading.Thread(target=self.compact, name="linus-journal-compactor", daemon=True)
+            self._compactor.start()
+
+    def compact(self) -> None:
+        """Fold the journal into the checkpoint without touching in-memory state."""
+        with self._compact_lock:
+            with self._lock:
+                # A sealed file left over from an interrupted compaction is folded first;
+                # new appends keep flowing into a fresh journal meanwhile.
+                if not self._sealed_path.exists() and self._journal_path.exists():
+                    os.replace(self._journal_path, self._sealed_path)
+            if not self._sealed_path.exists():
+                return
+            state = self._read_checkpoint()
+            folded_seq = int(state.get("journal_seq", 0))
+            for record in _read_journal(self._sealed_path):
+                seq = int(record.get("seq", 0))
+                if seq <= folded_seq:
+                    continue
+                _apply_record(state, record)
+                state["journal_seq"] = seq
+            self._write_state(state)
+            self._sealed_path.unlink()
+
+    def iter_records(
+        self,
+        cells: Dict[int, GridCell],
+        logs: Dict[str, List[InsightLogEntry]],
+        grid_id: Optional[int] = None,
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+    ) -> Iterator[dict]:
+        for cell_id, cell in list(cells.items()):
+            if grid_id is not None and cell_id != grid_id:
+                continue
+            with self._lock:
+                block = self._snapshot.cell_block(cell_id) if self._is_lazy_cell(cell_id) else None
+            if block is not None:
+                payload = json.loads(block)
+                entries = [_entry_from_dict(item) for item in payload.get("entries", [])]
+                needs_review = [_entry_from_dict(item) for item in payload.get("needs_review", [])]
+            else:
+                entries, needs_review = list(cell.entries), list(cell.needs_review)
+            yield from _cell_records(cell_id, entries, needs_review, since, until)
+
+        for history in list(logs.values()):
+            yield from _log_records(list(history), grid_id, since, until)
+        with self._lock:
+            lazy_segments = [
+                segment_id
+                for segment_id in (self._snapshot.segment_ids() if self._snapshot else ())
+                if segment_id not in logs and segment_id not in self._archived_segments
+            ]
+        for segment_id in lazy_segments:
+            yield from _log_records(self.load_logs(segment_id), grid_id, since, until)
+        # Evicted logs last, unless a newer copy was already streamed from memory or the snapshot.
+        streamed = set(lazy_segments)
+        for segment_id, history in self._archive.iter_all():
+            if segment_id not in logs and segment_id not in streamed:
+                yield from _log_records([_log_from_dict(segment_id, item) for item in history], grid_id, since, until)
 
     def snapshot(self, cells: Dict[int, GridCell], logs: Dict[str, List[InsightLogEntry]]) -> dict:
-        return self._serialize(cells, logs)
+        state = self._serialize(cells, logs)
+        with self._lock:
+            if self._snapshot is not None:
+                # Blocks nobody has asked for yet are exported straight from the binary snapshot.
+                for grid_id in self._snapshot.cell_ids():
+                    if grid_id not in self._materialized_cells:
+                        state["cells"][str(grid_id)] = json.loads(self._snapshot.cell_block(grid_id))
+                for segment_id in self._snapshot.segment_ids():
+                    if segment_id not in logs and segment_id not in self._archived_segments:
+                        state["logs"][segment_id] = json.loads(self._snapshot.log_block(segment_id))
+        # Evicted logs are part of the state too; memory and newer snapshot blocks take precedence.
+        for segment_id, history in self._archive.iter_all():
+            state["logs"].setdefault(segment_id, history)
+        return state
@@ -0,0 +1,20 @@
+"""Factory for picking the persistence backend from LINUS_STATE_PATH."""
+
+from pathlib import Path
+import os
+
+from .sqlite_store import SQLiteStore
+from .storage import BaseStore, PersistentStore
+
+SQLITE_SCHEME = "sqlite:///"
+
+
+def build_store() -> BaseStore:
+    """``sqlite:///path`` selects SQLite; anything else is a JSON state file."""
+    location = os.getenv("LINUS_STATE_PATH", "data/linus_state.json")
+    if location.startswith(SQLITE_SCHEME):
+        return SQLiteStore(Path(location[len(SQLITE_SCHEME):]))
+
+    debounce = float(os.getenv("LINUS_SAVE_DEBOUNCE", "0.5"))
+    journal = os.getenv("LINUS_STORAGE_MODE", "snapshot").lower() == "journal"
+    return PersistentStore(Path(location), debounce_seconds=debounce, journal=journal)
@@ -0,0 +1,73 @@
+"""Bounded read-ahead for streamed ingest.
+
+``read_ahead`` pulls items from a (possibly slow, blocking) source on a
+helper thread into a bounded queue and hands the consumer whatever has
+arrived, up to ``window`` items at a time. Fast uploads are processed in
+full windows; a slow trickle is processed line by line instead of waiting
+for a window to fill. When the consumer falls behind the queue fills up and
+the reader stops pulling, which pushes back on the sender.
+"""
+
+from __future__ import annotations
+
+import queue
+import threading
+from typing import Iterable, Iterator, List, TypeVar
+
+T = TypeVar("T")
+
+_DONE = object()
+
+
+class _Failed:
+    def __init__(self, exc: BaseException):
+        self.exc = exc
+
+
+def read_ahead(items: Iterable[T], window: int, buffer_windows: int = 2) -> Iterator[List[T]]:
+    """Yield lists of 1..``window`` items in source order; at most ``window * buffer_windows`` are buffered."""
+    buffer: queue.Queue = queue.Queue(maxsize=window * buffer_windows)
+    stop = threading.Event()
+
+    def put(item) -> bool:
+        while not stop.is_set():
+            try:
+                buffer.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def reader() -> None:
+        try:
+            for item in items:
+                if not put(item):
+                    return
+        except BaseException as exc:  # handed to the consumer, which re-raises it in order
+            put(_Failed(exc))
+            return
+        put(_DONE)
+
+    threading.Thread(target=reader, name="linus-read-ahead", daemon=True).start()
+    try:
+        while True:
+            batch: List[T] = []
+            item = buffer.get()
+            while True:
+                if item is _DONE or isinstance(item, _Failed):
+                    if batch:
+                        yield batch
+                    if isinstance(item, _Failed):
+                        raise item.exc
+                    return
+                batch.append(item)
+                if len(batch) >= window:
+                    break
+                try:
+                    item = buffer.get_nowait()
+                except queue.Empty:
+                    break
+            yield batch
+    finally:
+        # The consumer went away (finished, failed or the client disconnected): release the reader.
+        stop.set()
@@ -1,5 +1,8 @@
-from typing import Dict, List, Any
-from .models import Segment, GridAssignment
+import csv
+import io
+import json
+from typing import Dict, Iterable, Iterator, List, Any
+from .models import Segment
 from .mandala_blueprint import get_mandala
 
 def format_segment_result(segment: Segment, classifier_used: str, classifier_error: str | None, outcome: Dict) -> Dict:
@@ -37,6 +40,26 @@ def format_grid_response(cell: Any, grid_id: int) -> Dict:
         payload["mandala"] = mandala
     return payload
 
+def format_grid_summary(cell: Any, grid_id: int, latest: int) -> Dict:
+    payload = cell.to_summary_dict(latest)
+    mandala = get_mandala(grid_id)
+    if mandala:
+        payload["mandala"] = mandala
+    return payload
+
+def format_grid_page(
+    grid_id: int, kind: str, page: List[Any], next_cursor: str | None, prev_cursor: str | None, total: int
+) -> Dict:
+    formatter = (lambda entry: entry.to_dict()) if kind == "entries" else (lambda entry: entry.to_review_dict())
+    return {
+        "grid_id": grid_id,
+        "kind": kind,
+        "items": [formatter(entry) for entry in page],
+        "total": total,
+        "next_cursor": next_cursor,
+        "prev_cursor": prev_cursor,
+    }
+
 def format_segment_log(segment_id: str, logs: List[Any]) -> Dict:
     return {
         "segment_id": segment_id,
@@ -45,3 +68,42 @@ def format_segment_log(segment_id: str, logs: List[Any]) -> Dict:
 
 def format_all_grids(grids: List[Dict]) -> Dict:
     return {"grids": grids}
+
+
+EXPORT_COLUMNS = [
+    "type",
+    "grid_id",
+    "segment_id",
+    "source",
+    "snippet",
+    "status",
+    "related_grids",
+    "confidence",
+    "action",
+    "similarity",
+    "comment",
+    "created_at",
+]
+
+
+def format_export_stream(records: Iterable[Dict], fmt: str, chunk_size: int = 64 * 1024) -> Iterator[bytes]:
+    """Encode export records as NDJSON or CSV, yielding roughly chunk_size bytes at a time."""
+    buffer = io.StringIO()
+    writer = None
+    if fmt == "csv":
+        writer = csv.DictWriter(buffer, fieldnames=EXPORT_COLUMNS, extrasaction="ignore")
+        writer.writeheader()
+    for record in records:
+        if writer:
+            if "related_grids" in record:
+                record = dict(record, related_grids=";".join(str(grid) for grid in record["related_grids"]))
+            writer.writerow(record)
+        else:
+            buffer.write(json.dumps(record, ensure_ascii=False))
+            buffer.write("\n")
+        if buffer.tell() >= chunk_size:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
@@ -5,9 +5,12 @@ from __future__ import annotations
 import json
 from http.server import ThreadingHTTPServer, SimpleHTTPRequestHandler
 from pathlib import Path
-from typing import Any
+from typing import Any, Iterable, Iterator, List
+from urllib.parse import parse_qs, urlsplit
 
 from linus_app import LinusService
+from linus_app.pagination import DEFAULT_LIMIT
+from linus_app.service import DEFAULT_LATEST_ENTRIES
 import os
 
 def load_env():
@@ -34,7 +37,16 @@ API_PREFIX = "/api"
 service = LinusService()
 
 
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    """If-None-Match check: ``*`` or any listed entity tag equal to ``etag`` (weak comparison)."""
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in tags or etag in (tag[2:] if tag.startswith("W/") else tag for tag in tags)
+
+
 class LinusHandler(SimpleHTTPRequestHandler):
+    # HTTP/1.1 so streamed responses can use chunked transfer encoding.
+    protocol_version = "HTTP/1.1"
+
     def __init__(self, *args, **kwargs):
         super().__init__(*args, directory=str(FRONTEND_DIR), **kwargs)
 
@@ -49,9 +61,15 @@ class LinusHandler(SimpleHTTPRequestHandler):
             if self.path.startswith(f"{API_PREFIX}/grids"):
                 self._handle_grids_get()
                 return
-            if self.path == f"{API_PREFIX}/export":
-                payload = service.export_state()
-                self._send_json(payload)
+            url = urlsplit(self.path)
+            if url.path == f"{API_PREFIX}/export":
+                self._handle_export(parse_qs(url.query))
+                return
+            if url.path == f"{API_PREFIX}/stats":
+                self._send_json(service.get_stats())
+                return
+            if url.path == f"{API_PREFIX}/shadow":
+                self._send_json(service.get_shadow_stats())
                 return
             if self.path.startswith(f"{API_PREFIX}/segments/") and self.path.endswith("/log"):
                 segment_id = self.path.split("/")[-2]
@@ -64,35 +82,172 @@ class LinusHandler(SimpleHTTPRequestHandler):
 
     def do_POST(self) -> None:  # noqa: N802
         try:
+            url = urlsplit(self.path)
+            if url.path == f"{API_PREFIX}/segments/stream":
+                self._handle_segment_stream(parse_qs(url.query))
+                return
             if self.path == f"{API_PREFIX}/segments":
                 length = int(self.headers.get("Content-Length", "0"))
                 body = self.rfile.read(length)
                 payload = json.loads(body or "{}")
-                response = service.post_segments(payload)
+                try:
+                    response = service.post_segments(payload)
+                except ValueError as exc:
+                    self._send_json({"error": str(exc)}, status=400)
+                    return
                 self._send_json(response)
                 return
-            super().do_POST()
+            self._send_json({"error": "not found"}, status=404, close=True)
         except Exception as e:
-            self._send_json({"error": str(e)}, status=500)
+            # The body may be partly unread; it must not be parsed as the next request.
+            self._send_json({"error": str(e)}, status=500, close=True)
 
     def _handle_grids_get(self) -> None:
-        parts = self.path.split("/")
-        if len(parts) == 4 and parts[-1].isdigit():
-            grid_id = int(parts[-1])
-            try:
-                payload = service.get_grid(grid_id)
-            except KeyError:
-                self._send_json({"error": "grid not found"}, status=404)
+        url = urlsplit(self.path)
+        query = parse_qs(url.query)
+        parts = url.path.rstrip("/").split("/")
+        try:
+            if len(parts) == 5 and parts[3].isdigit():
+                payload = service.get_grid_items(
+                    int(parts[3]),
+                    parts[4],
+                    limit=int(query.get("limit", [DEFAULT_LIMIT])[0]),
+                    before=query.get("before", [None])[0],
+                    after=query.get("after", [None])[0],
+                )
+                self._send_json(payload)
                 return
-        else:
-            payload = service.get_all_grids()
-        self._send_json(payload)
+            if len(parts) == 4 and parts[-1].isdigit():
+                body, etag = service.get_grid_response(int(parts[-1]))
+            else:
+                full = query.get("view", [""])[0] == "full"
+                latest = None if full else int(query.get("latest", [DEFAULT_LATEST_ENTRIES])[0])
+                body, etag = service.get_all_grids_response(latest)
+        except KeyError:
+            self._send_json({"error": "grid not found"}, status=404)
+            return
+        except ValueError as exc:
+            self._send_json({"error": str(exc)}, status=400)
+            return
+        self._send_cached(body, etag)
+
+    def _send_cached(self, body: bytes, etag: str) -> None:
+        if _etag_matches(self.headers.get("If-None-Match", ""), etag):
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", etag)
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _handle_export(self, query: dict) -> None:
+        fmt = query.get("format", [None])[0]
+        if fmt is None:
+            self._send_json(service.export_state())
+            return
+        grid = query.get("grid", [None])[0]
+        try:
+            chunks = service.stream_export(
+                fmt,
+                grid_id=int(grid) if grid else None,
+                since=query.get("since", [None])[0],
+                until=query.get("until", [None])[0],
+            )
+        except KeyError:
+            self._send_json({"error": "grid not found"}, status=404)
+            return
+        except ValueError as exc:
+            self._send_json({"error": str(exc)}, status=400)
+            return
+        content_type = "text/csv" if fmt == "csv" else "application/x-ndjson"
+        self._send_chunked(chunks, f"{content_type}; charset=utf-8")
+
+    def _handle_segment_stream(self, query: dict) -> None:
+        # The body is read while results are written (or not at all on a 400), so whatever is
+        # not yet read stays with the client and the connection cannot be reused.
+        self.close_connection = True
+        priority = query.get("priority", ["interactive"])[0]
+        try:
+            if self.headers.get("Content-Type", "").startswith("text/plain"):
+                # Raw transcript text: segmented on the server as it is read.
+                source = query.get("source", ["transcript"])[0]
+                records = service.stream_transcript(self._request_lines(), source=source, priority=priority)
+            else:
+                records = service.stream_segments(self._request_lines(), priority=priority)
+        except ValueError as exc:
+            self._send_json({"error": str(exc)}, status=400, close=True)
+            return
+        lines = (json.dumps(record, ensure_ascii=False).encode("utf-8") + b"\n" for record in records)
+        self._send_chunked(lines, "application/x-ndjson; charset=utf-8")
+
+    def _request_lines(self) -> Iterator[bytes]:
+        """Body lines as they arrive, for both chunked and Content-Length uploads."""
+        if "chunked" in self.headers.get("Transfer-Encoding", "").lower():
+            # Pieces of the current, unfinished line; only each new chunk is scanned for newlines.
+            partial: List[bytes] = []
+            while True:
+                size = int(self.rfile.readline().split(b";", 1)[0].strip() or b"0", 16)
+                if size == 0:
+                    while self.rfile.readline() not in (b"\r\n", b"\n", b""):
+                        pass  # trailers
+                    break
+                chunk = self.rfile.read(size)
+                self.rfile.readline()  # CRLF after the chunk
+                start = 0
+                end = chunk.find(b"\n")
+                while end != -1:
+                    partial.append(chunk[start:end])
+                    yield b"".join(partial)
+                    partial = []
+                    start = end + 1
+                    end = chunk.find(b"\n", start)
+                if start < len(chunk):
+                    partial.append(chunk[start:])
+            if partial:
+                yield b"".join(partial)
+            return
+        remaining = int(self.headers.get("Content-Length", "0"))
+        partial = []
+        while remaining > 0:
+            piece = self.rfile.readline(min(remaining, 1 << 16))
+            if not piece:
+                break
+            remaining -= len(piece)
+            partial.append(piece)
+            if piece.endswith(b"\n"):
+                yield b"".join(partial)
+                partial = []
+        if partial:
+            yield b"".join(partial)
+
+    def _send_chunked(self, chunks: Iterable[bytes], content_type: str) -> None:
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        try:
+            for chunk in chunks:
+                if chunk:
+                    self.wfile.write(f"{len(chunk):X}\r\n".encode("ascii") + chunk + b"\r\n")
+            self.wfile.write(b"0\r\n\r\n")
+        except Exception as exc:
+            # Headers are already out; the only honest signal left is a truncated stream.
+            self.close_connection = True
+            self.log_error("streamed response aborted: %s", exc)
 
-    def _send_json(self, payload: Any, status: int = 200) -> None:
+    def _send_json(self, payload: Any, status: int = 200, close: bool = False) -> None:
+        """``close`` ends the keep-alive connection, for replies sent before the request body was read."""
         encoded = json.dumps(payload).encode("utf-8")
         self.send_response(status)
         self.send_header("Content-Type", "application/json; charset=utf-8")
         self.send_header("Content-Length", str(len(encoded)))
+        if close:
+            self.send_header("Connection", "close")
         self.end_headers()
         self.wfile.write(encoded)
 
@@ -4,3 +4,74 @@ from pathlib import Path
 ROOT = Path(__file__).resolve().parents[1]
 if str(ROOT) not in sys.path:
     sys.path.insert(0, str(ROOT))
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+
+class GeminiStub:
+    """Local stand-in for the generateContent endpoint.
+
+    ``respond(payload)`` returns the model's JSON answer (wrapped into a Gemini
+    response here) or a ``(status, body_bytes, headers)`` tuple for raw replies.
+    """
+
+    def __init__(self):
+        self.respond = lambda payload: {"primary": {"grid": 5, "confidence": 0.5}}
+        self.requests = []
+        self.client_ports = set()
+        self._lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # Buffer the response so headers and body leave in one segment (no Nagle / delayed-ACK stall).
+            wbufsize = -1
+
+            def do_POST(self):  # noqa: N802
+                payload = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                with stub._lock:
+                    stub.requests.append(payload)
+                    stub.client_ports.add(self.client_address[1])
+                reply = stub.respond(payload)
+                if isinstance(reply, tuple):
+                    status, body, headers = reply
+                else:
+                    status, headers = 200, {}
+                    text = json.dumps(reply, ensure_ascii=False)
+                    body = json.dumps({"candidates": [{"content": {"parts": [{"text": text}]}}]}).encode("utf-8")
+                self.send_response(status)
+                for key, value in headers.items():
+                    self.send_header(key, value)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self._server.server_address[1]}"
+        self._thread = threading.Thread(target=self._server.serve_forever, args=(0.05,), daemon=True)
+        self._thread.start()
+
+    def paragraphs(self, payload):
+        return payload["contents"][0]["parts"][-1]["text"]
+
+    def close(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+@pytest.fixture
+def gemini_stub(monkeypatch):
+    stub = GeminiStub()
+    monkeypatch.setenv("GEMINI_API_KEY", "fake-key")
+    monkeypatch.setenv("GEMINI_BASE_URL", stub.url)
+    yield stub
+    stub.close()
@@ -0,0 +1,247 @@
+import pytest
+
+from linus_app.classification_cache import CachedClassifier
+from linus_app.classifier import BaseClassifier
+from linus_app.config import GRID_DEFINITIONS
+from linus_app.matcher import KeywordMatcher, normalize
+from linus_app.models import GridAssignment
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "合約 SOW 條款需要立即補進合作文件中。",
+        "品牌活動 與 品牌 定位，社群口碑要追蹤 sop",
+        "Dashboard 指標與 損益 紀錄",
+        "沒有任何關鍵字",
+    ],
+)
+def test_matcher_agrees_with_substring_scan(text):
+    hits = KeywordMatcher(GRID_DEFINITIONS).scan(text)
+    normalized = normalize(text)
+    for grid_id, definition in GRID_DEFINITIONS.items():
+        expected = tuple(kw.lower() for kw in definition.keywords if kw.lower() in normalized)
+        assert hits.for_grid(grid_id) == expected
+        assert hits.mask(grid_id).bit_count() == len(set(expected))
+
+
+def test_integrator_similarity_matches_keyword_set_overlap():
+    import random
+
+    from linus_app.integrator import GridIntegrator
+    from linus_app.models import GridEntry
+
+    rng = random.Random(7)
+    integrator = GridIntegrator(GRID_DEFINITIONS)
+    matcher = KeywordMatcher(GRID_DEFINITIONS)
+    for grid_id, definition in GRID_DEFINITIONS.items():
+        vocabulary = list(definition.keywords) + ["然後", "我們"]
+        cell = integrator.cell(grid_id)
+        snippets = ["".join(rng.sample(vocabulary, rng.randint(0, 4))) for _ in range(30)]
+        # Entries appended directly, as a store hydrate does, carry no mask until indexed.
+        cell.entries.extend(GridEntry(f"s{i}", "t", text, "new_entry", (), 0.9, 0.0) for i, text in enumerate(snippets))
+        for _ in range(20):
+            text = "".join(rng.sample(vocabulary, rng.randint(0, 4)))
+            tokens = set(matcher.scan(text).for_grid(grid_id))
+            expected = 0.0
+            for entry in cell.entries:
+                other = set(matcher.scan(entry.snippet).for_grid(grid_id))
+                if tokens and other:
+                    expected = max(expected, len(tokens & other) / min(len(tokens), len(other)))
+            assert integrator._max_similarity(text, cell) == pytest.approx(expected)
+
+
+class CountingClassifier(BaseClassifier):
+    def __init__(self):
+        self.calls = []
+
+    def classify(self, text):
+        self.calls.append(text)
+        return [GridAssignment(grid_id=3, confidence=0.9, secondary=False, related_keywords=["合約"])]
+
+
+def test_cache_hits_normalized_text_and_survives_restart(tmp_path):
+    path = tmp_path / "cache.jsonl"
+    inner = CountingClassifier()
+    cache = CachedClassifier(inner, "gemini", "m1", GRID_DEFINITIONS, path=path)
+
+    cache.classify("合約 SOW\n條款")
+    assert cache.classify("合約SOW 條款")[0].grid_id == 3
+    assert cache.classify_batch(["合約  SOW 條款", "付款"])[0][0].related_keywords == ["合約"]
+    assert inner.calls == ["合約 SOW\n條款", "付款"]
+    assert cache.stats()["cache"]["hits"] == 2
+
+    reloaded = CachedClassifier(inner, "gemini", "m1", GRID_DEFINITIONS, path=path)
+    reloaded.classify("合約 SOW 條款")
+    other_model = CachedClassifier(inner, "gemini", "m2", GRID_DEFINITIONS, path=path)
+    other_model.classify("合約 SOW 條款")
+    assert len(inner.calls) == 3
+    assert (reloaded.stats()["cache"]["hits"], other_model.stats()["cache"]["misses"]) == (1, 1)
+
+
+def test_cache_evicts_least_recent_and_expires_by_ttl():
+    now = [0.0]
+    inner = CountingClassifier()
+    cache = CachedClassifier(inner, "gemini", "m1", GRID_DEFINITIONS, max_entries=2, ttl_seconds=10, clock=lambda: now[0])
+
+    cache.classify("a")
+    cache.classify("b")
+    cache.classify("a")
+    cache.classify("c")  # evicts "b"
+    cache.classify("b")
+    assert inner.calls == ["a", "b", "c", "b"]
+
+    now[0] = 11.0
+    cache.classify("c")
+    assert inner.calls[-1] == "c"
+
+
+def test_connection_pool_reuses_and_replaces_connections():
+    from conftest import GeminiStub
+    from linus_app.http_pool import ConnectionPool
+
+    stub = GeminiStub()
+    try:
+        pool = ConnectionPool(stub.url, max_connections=2)
+        for _ in range(3):
+            assert pool.request("POST", "/v1", body=b"{}").status == 200
+        assert (pool.stats()["connections_opened"], pool.stats()["reused"]) == (1, 2)
+
+        # A connection the server asked to close is not returned to the pool.
+        stub.respond = lambda payload: (503, b"{}", {"Connection": "close"})
+        assert pool.request("POST", "/v1", body=b"{}").status == 503
+        assert pool.request("POST", "/v1", body=b"{}").timing.reused is False
+        assert pool.stats()["connections_opened"] == 2
+    finally:
+        pool.close()
+        stub.close()
+
+
+def test_breaker_opens_after_failures_and_probes_once():
+    from conftest import GeminiStub
+    from linus_app.circuit_breaker import CircuitBreaker
+    from linus_app.classifier import CircuitOpenError, ClassificationError, GeminiClassifier
+
+    now = [0.0]
+    sleeps = []
+    stub = GeminiStub()
+    stub.respond = lambda payload: (503, b"{}", {"Retry-After": "1"})
+    breaker = CircuitBreaker(failure_threshold=2, cooldown_seconds=30, clock=lambda: now[0])
+    gemini = GeminiClassifier("key", "m", base_url=stub.url, breaker=breaker, sleep=sleeps.append)
+    try:
+        for _ in range(2):
+            with pytest.raises(ClassificationError):
+                gemini.classify("合約")
+        assert sleeps == [1.0, 1.0, 1.0, 1.0]
+        assert len(stub.requests) == 6
+        assert gemini.circuit_state() == "open"
+        with pytest.raises(CircuitOpenError):
+            gemini.classify("合約")
+        assert len(stub.requests) == 6
+
+        now[0] = 31.0
+        assert gemini.circuit_state() == "half_open"
+        stub.respond = lambda payload: {"primary": {"grid": 3, "confidence": 0.9}}
+        assert gemini.classify("合約")[0].grid_id == 3
+        assert gemini.circuit_state() == "closed"
+
+        # A Retry-After longer than we wait inline opens the breaker straight away for that long.
+        stub.respond = lambda payload: (429, b"{}", {"Retry-After": "120"})
+        with pytest.raises(ClassificationError):
+            gemini.classify("付款")
+        assert len(stub.requests) == 8
+        now[0] = 31.0 + 60
+        assert gemini.stats()["circuit"]["state"] == "open"
+    finally:
+        stub.close()
+
+
+def test_quota_scheduler_serves_interactive_first_and_rejects_past_deadline():
+    import threading
+    import time
+
+    from linus_app.quota import BULK, INTERACTIVE, QuotaRejectedError, QuotaScheduler, lane
+
+    # 10 requests/s with room for one at a time: each queued call waits ~0.1 s.
+    scheduler = QuotaScheduler(requests_per_minute=600, headroom=1.0, burst_seconds=0.1, max_queue=1)
+    scheduler.acquire(1)
+    admitted = []
+
+    def call(name):
+        with lane(name):
+            scheduler.acquire(1)
+        admitted.append(name)
+
+    workers = [threading.Thread(target=call, args=(name,)) for name in (BULK, INTERACTIVE)]
+    for worker in workers:
+        worker.start()
+        time.sleep(0.02)
+    with lane(BULK):
+        with pytest.raises(QuotaRejectedError, match="queue is full"):
+            scheduler.acquire(1)
+    for worker in workers:
+        worker.join()
+    with pytest.raises(QuotaRejectedError, match="deadline"):
+        scheduler.acquire(1, deadline_seconds=0.05)
+
+    assert admitted == [INTERACTIVE, BULK]
+    stats = scheduler.stats()
+    assert stats["admitted"] == {INTERACTIVE: 2, BULK: 1}
+    assert stats["rejected"] == {INTERACTIVE: 1, BULK: 1}
+
+
+@pytest.mark.parametrize("use_numpy", [False, True])
+def test_ngram_classifier_learns_incrementally(use_numpy):
+    from linus_app.classifier import ClassificationError
+    from linus_app.ngram_classifier import NgramBayesClassifier, np
+
+    if use_numpy and np is None:
+        pytest.skip("numpy not installed")
+    model = NgramBayesClassifier(min_examples=4, use_numpy=use_numpy)
+    with pytest.raises(ClassificationError):
+        model.classify("合約條款再確認")
+
+    model.learn(
+        [
+            ("合約 SOW 條款需要補進合作文件", 3),
+            ("品牌定位與收入模式要寫清楚", 3),
+            ("付款流程 SOP 要加上提醒", 8),
+            ("報名後的提醒信與追蹤流程", 8),
+        ]
+    )
+    assert model.classify("合約條款再確認")[0].grid_id == 3
+    assert model.classify("付款提醒信")[0].grid_id == 8
+    with pytest.raises(ClassificationError):
+        model.classify("教練")
+
+    model.learn([("教練分潤與教案支援需要釐清", 2), ("教練合作承諾與曝光", 2)])
+    primary = model.classify("教練教案")[0]
+    assert (primary.grid_id, primary.secondary) == (2, False)
+    assert model.stats()["ngram"]["examples"] == 6
+
+
+def test_ngram_numpy_and_python_backends_score_alike():
+    pytest.importorskip("numpy")
+    from linus_app.ngram_classifier import NgramBayesClassifier, char_ngrams
+
+    topics = {2: "教練分潤與教案支援", 3: "合約 SOW 條款與合作文件", 7: "品牌定位與收入模式", 8: "付款流程 SOP 與提醒信"}
+    # Enough distinct grams to grow the NumPy matrix past its initial 1024 columns.
+    examples = [
+        (f"第{number}次會議：{topic}，編號 {number * 7919}", grid) for number in range(300) for grid, topic in topics.items()
+    ]
+    python_model = NgramBayesClassifier(min_examples=1, use_numpy=False)
+    numpy_model = NgramBayesClassifier(min_examples=1, use_numpy=True)
+    python_model.learn(examples)
+    numpy_model.learn(examples)
+    assert python_model.stats()["ngram"]["backend"] == "python"
+    assert numpy_model.stats()["ngram"]["backend"] == "numpy"
+    assert numpy_model.stats()["ngram"]["vocabulary"] > 1024
+
+    for text in ["合約條款再確認", "付款提醒信", "教練教案與分潤", "品牌收入 SOW", "第7次會議"]:
+        grams = char_ngrams(text, (1, 2, 3))
+        known = [(gram, count) for gram, count in grams.items() if gram in python_model._vocab]
+        rows = [row for row, docs in enumerate(python_model._docs) if docs]
+        expected = python_model._scores(rows, known, sum(grams.values()))
+        assert numpy_model._scores(rows, known, sum(grams.values())) == pytest.approx(expected, rel=1e-9)
+        assert numpy_model.classify(text) == python_model.classify(text)
+
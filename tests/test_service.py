@@ -3,7 +3,6 @@ from unittest import mock
 
 import json
 import os
-from pathlib import Path
 from unittest import mock
 
 import pytest
@@ -76,6 +75,138 @@ def test_duplicate_segments_merge_instead_of_duplication(monkeypatch):
     assert log["history"][0]["action"] == "merged"
 
 
+def test_minhash_similarity_merges_repastes_not_shared_keywords(monkeypatch):
+    monkeypatch.delenv("GEMINI_API_KEY", raising=False)
+    monkeypatch.setenv("LINUS_SIMILARITY", "minhash")
+    service = LinusService()
+
+    def post(segment_id, text):
+        payload = {"segments": [{"segment_id": segment_id, "text": text}]}
+        return service.post_segments(payload)["results"][0]
+
+    assert post("seg-agr", "合約 SOW 條款需要立即補進合作文件中。")["status"] == "new_entry"
+    # Same keywords, different paragraph: no longer a duplicate.
+    assert post("seg-other", "合約 SOW 條款必須加上，不然付款流程會被卡住。")["status"] == "new_entry"
+    # The same paragraph pasted again with different spacing is.
+    assert post("seg-repaste", "合約  SOW 條款需要立即補進合作文件中 。")["status"] == "merged"
+    assert len(service.get_grid(3)["entries"]) == 2
+    assert service.get_segment_log("seg-repaste")["history"][0]["similarity"] >= 0.85
+
+
+def test_process_batch_matches_sequential_processing_with_one_refresh_per_cell():
+    from datetime import datetime, timezone
+
+    from linus_app.classifier import RuleBasedClassifier
+    from linus_app.config import GRID_DEFINITIONS
+    from linus_app.integrator import GridIntegrator
+    from linus_app.models import Segment
+
+    rules = RuleBasedClassifier(GRID_DEFINITIONS)
+    texts = [
+        "合約 SOW 條款需要立即補進合作文件中。",
+        "付款流程 SOP 要加上提醒。",
+        "教練分潤與教案支援需要釐清。",
+        "合約 SOW 條款必須加上，不然付款流程會被卡住。",
+        "品牌活動 與 品牌 定位，社群口碑要追蹤。",
+        "付款 SOP 與對帳流程每月檢查。",
+        "合作夥伴 合約 與 分潤 規則",
+        "品牌 社群 貼文",
+    ]
+    items = [
+        (Segment(f"seg-{i}", "meeting", text, datetime.now(timezone.utc), []), rules.classify(text))
+        for i, text in enumerate(texts)
+    ]
+    sequential, batched = GridIntegrator(GRID_DEFINITIONS), GridIntegrator(GRID_DEFINITIONS)
+    expected = [sequential.process(segment, assignments) for segment, assignments in items]
+    with mock.patch.object(batched._summary_builder, "refresh", wraps=batched._summary_builder.refresh) as refresh:
+        outcomes = batched.process_batch(items)
+
+    assert outcomes == expected
+    inserted = {outcome["grid_id"] for outcome in outcomes if outcome["status"] == "new_entry"}
+    assert refresh.call_count == len(inserted) < sum(outcome["status"] == "new_entry" for outcome in outcomes)
+    for grid_id in GRID_DEFINITIONS:
+        assert batched.cell(grid_id).summary == sequential.cell(grid_id).summary
+    assert batched.drain_changes().touched_cells == sequential.drain_changes().touched_cells
+
+
+def test_stream_segments_yields_results_as_lines_arrive(monkeypatch):
+    import threading
+
+    monkeypatch.delenv("GEMINI_API_KEY", raising=False)
+    monkeypatch.setenv("LINUS_STREAM_WINDOW", "2")
+    service = LinusService()
+    first_result_seen = threading.Event()
+
+    def upload():
+        yield json.dumps({"segment_id": "seg-1", "text": "合約 SOW 條款需要補上。"}).encode("utf-8") + b"\n"
+        # The rest of the upload only arrives once the first result has been streamed back.
+        assert first_result_seen.wait(5)
+        yield b"{not json\n"
+        yield b"\n"
+        for number, text in enumerate(["付款流程 SOP 要加上提醒。", "教練分潤與教案支援需要釐清。"], start=2):
+            yield json.dumps({"segment_id": f"seg-{number}", "text": text}).encode("utf-8") + b"\n"
+
+    records = []
+    for record in service.stream_segments(upload()):
+        records.append(record)
+        first_result_seen.set()
+
+    assert [record.get("segment_id") for record in records[:1] + records[2:4]] == ["seg-1", "seg-2", "seg-3"]
+    assert records[1] == {"line": 2, "error": records[1]["error"]} and "invalid JSON" in records[1]["error"]
+    assert records[-1] == {"done": True, "segments": 3, "errors": 1}
+    assert service.get_segment_log("seg-3")["history"][0]["action"] == "inserted"
+    with pytest.raises(ValueError):
+        service.stream_segments([], priority="urgent")
+
+
+def test_split_transcript_follows_turns_and_length_bounds():
+    from linus_app.segmentation import split_transcript
+
+    transcript = (
+        "[00:00:01] 主持人：大家好。\n"
+        "[00:00:04] 小明：好。\n"
+        "[00:00:06] 小華：合約 SOW 條款需要立即補進合作文件中，不然付款流程會被卡住。\n"
+        "我們下週要跟律師確認所有條款。\n"
+        "\n"
+        "Alice: The coaching revenue share needs a decision. " + "教練分潤與教案支援需要釐清。" * 12
+    )
+    pieces = list(split_transcript(transcript, min_chars=20, max_chars=80))
+
+    # Tiny turns are merged into the next one; timestamps are dropped.
+    assert pieces[0].startswith("主持人：大家好。 小明：好。 小華：合約 SOW")
+    assert pieces[0].endswith("我們下週要跟律師確認所有條款。")
+    # A long turn is packed sentence by sentence without losing text.
+    assert pieces[1].startswith("Alice: The coaching revenue share needs a decision. 教練")
+    assert all(20 <= len(piece) <= 80 and piece.endswith("。") for piece in pieces[:-1])
+    assert "".join(pieces[1:]) == transcript.split("\n")[-1]
+
+
+def test_transcript_posts_are_segmented_on_the_server(monkeypatch):
+    monkeypatch.delenv("GEMINI_API_KEY", raising=False)
+    monkeypatch.setenv("LINUS_STREAM_WINDOW", "2")
+    monkeypatch.setenv("LINUS_CLASSIFY_CONCURRENCY", "1")
+    monkeypatch.setenv("LINUS_SEGMENT_MIN_CHARS", "10")
+    service = LinusService()
+    transcript = "\n".join(
+        [
+            "主持人：合約 SOW 條款需要立即補進合作文件中。",
+            "財務：付款流程 SOP 要加上提醒，月底對帳。",
+            "教練：教練分潤與教案支援需要釐清。",
+            "品牌：品牌活動與社群口碑要追蹤。",
+            "好。",
+        ]
+    )
+    with mock.patch.object(service, "_ingest", wraps=service._ingest) as ingest:
+        response = service.post_segments({"source": "meeting-0920", "transcript": transcript})
+
+    results = response["results"]
+    assert [result["grid_id"] for result in results] == [3, 8, 2, 7]
+    assert results[-1]["snippet"].endswith("口碑要追蹤。 好。")
+    assert [len(call.args[0]) for call in ingest.call_args_list] == [2, 2]
+    entry = service.get_grid(3)["entries"][0]
+    assert entry["source"] == "meeting-0920" and entry["segment_id"].endswith("-0001")
+
+
 def test_low_confidence_segments_are_flagged_for_review(monkeypatch):
     monkeypatch.delenv("GEMINI_API_KEY", raising=False)
     service = LinusService()
@@ -135,68 +266,46 @@ def test_segment_logs_are_traceable(monkeypatch):
     assert log["history"][0]["action"] == "inserted"
 
 
-def test_gemini_classifier_bridge_parses_response(monkeypatch):
-    fake_response = {
-        "candidates": [
+def test_gemini_classifier_bridge_parses_response(gemini_stub):
+    gemini_stub.respond = lambda payload: {
+        "primary": {"grid": 7, "confidence": 0.9},
+        "secondary": [{"grid": 3, "confidence": 0.65}],
+        "related_keywords": ["行銷"],
+    }
+    service = LinusService()
+    payload = {
+        "segments": [
             {
-                "content": {
-                    "parts": [
-                        {
-                            "text": json.dumps(
-                                {
-                                    "primary": {"grid": 7, "confidence": 0.9},
-                                    "secondary": [{"grid": 3, "confidence": 0.65}],
-                                    "related_keywords": ["行銷"],
-                                }
-                            )
-                        }
-                    ]
-                }
+                "segment_id": "seg-mkt",
+                "source": "meeting",
+                "text": "品牌啟動會議鎖定冬季檔期。",
             }
         ]
     }
-
-    class DummyResponse:
-        def __enter__(self):
-            return self
-
-        def __exit__(self, exc_type, exc, tb):
-            return False
-
-        def read(self):
-            return json.dumps(fake_response).encode("utf-8")
-
-    monkeypatch.setenv("GEMINI_API_KEY", "fake-key")
-    with mock.patch("linus_app.classifier.request.urlopen", return_value=DummyResponse()):
-        service = LinusService()
-        payload = {
+    response = service.post_segments(payload)
+    result = response["results"][0]
+    primary = result["grid_assignments"][0]
+    assert primary["grid_id"] == 7
+    assert primary["confidence"] == 0.9
+    service.post_segments(
+        {
             "segments": [
                 {
-                    "segment_id": "seg-mkt",
+                    "segment_id": "seg-agr",
                     "source": "meeting",
-                    "text": "品牌啟動會議鎖定冬季檔期。",
+                    "text": "SOW 條款需要補上。",
                 }
             ]
         }
-        response = service.post_segments(payload)
-        result = response["results"][0]
-        primary = result["grid_assignments"][0]
-        assert primary["grid_id"] == 7
-        assert primary["confidence"] == 0.9
-        service.post_segments(
-            {
-                "segments": [
-                    {
-                        "segment_id": "seg-agr",
-                        "source": "meeting",
-                        "text": "SOW 條款需要補上。",
-                    }
-                ]
-            }
-        )
-        log = service.get_segment_log("seg-agr")
-        assert log["segment_id"] == "seg-agr"
-        assert log["history"][0]["action"] == "inserted"
+    )
+    log = service.get_segment_log("seg-agr")
+    assert log["segment_id"] == "seg-agr"
+    assert log["history"][0]["action"] == "inserted"
+    # Both calls went over one pooled keep-alive connection.
+    assert len(gemini_stub.client_ports) == 1
+    http_stats = service.get_stats()["classification"]["http"]
+    assert (http_stats["calls"], http_stats["connections_opened"], http_stats["reused"]) == (2, 1, 1)
+    assert set(http_stats["last_ms"]) == {"connect", "ttfb", "total"}
 
 
 def test_persistence_roundtrip(tmp_path, monkeypatch):
@@ -224,3 +333,289 @@ def test_persistence_roundtrip(tmp_path, monkeypatch):
             found = True
             break
     assert found
+
+
+def test_grid_responses_are_cached_per_cell_version(monkeypatch):
+    monkeypatch.delenv("GEMINI_API_KEY", raising=False)
+    service = LinusService()
+    body, etag = service.get_grid_response(3)
+    all_body, all_etag = service.get_all_grids_response()
+    assert json.loads(body) == service.get_grid(3)
+    assert json.loads(all_body) == service.get_grids_overview()
+    assert json.loads(service.get_all_grids_response(latest=None)[0]) == service.get_all_grids()
+    assert service.get_grid_response(3) == (body, etag)
+
+    service.post_segments(
+        {"segments": [{"segment_id": "seg-agr", "source": "meeting", "text": "合約 SOW 條款需要補上。"}]}
+    )
+    new_body, new_etag = service.get_grid_response(3)
+    assert new_etag != etag
+    assert json.loads(new_body)["entries"][0]["segment_id"] == "seg-agr"
+    assert service.get_grid_response(8)[1] == service.get_grid_response(8)[1]
+    assert service.get_all_grids_response()[1] != all_etag
+
+
+def test_grid_response_cache_only_keeps_default_and_full_views(monkeypatch):
+    from linus_app.pagination import MAX_LIMIT
+
+    monkeypatch.delenv("GEMINI_API_KEY", raising=False)
+    service = LinusService()
+    service.get_all_grids_response()
+    service.get_all_grids_response(latest=None)
+    cached = (len(service._grid_cache), len(service._all_grids_cache))
+    for latest in (1, 7, 10**9, -3):
+        body, etag = service.get_all_grids_response(latest=latest)
+        assert etag == service.get_all_grids_response(latest=latest)[1]
+    assert (len(service._grid_cache), len(service._all_grids_cache)) == cached
+    # Out-of-range values are clamped, so they share the ETag of the bound they map to.
+    assert service.get_grid_response(3, latest=10**9)[1] == service.get_grid_response(3, latest=MAX_LIMIT)[1]
+    assert service.get_grid_response(3, latest=-3)[1] == service.get_grid_response(3, latest=0)[1]
+
+
+def test_grid_response_cached_before_summary_refresh_is_not_reused(monkeypatch):
+    monkeypatch.delenv("GEMINI_API_KEY", raising=False)
+    service = LinusService()
+    builder = service._integrator._summary_builder
+    refresh = builder.refresh
+    mid_batch = []
+
+    def read_then_refresh(cell, latest_entry=None):
+        mid_batch.append(service.get_grid_response(cell.definition.grid_id))
+        refresh(cell, latest_entry=latest_entry)
+
+    with mock.patch.object(builder, "refresh", side_effect=read_then_refresh):
+        service.post_segments(
+            {"segments": [{"segment_id": "seg-agr", "source": "meeting", "text": "合約 SOW 條款需要補上。"}]}
+        )
+
+    (stale_body, stale_etag), = mid_batch
+    body, etag = service.get_grid_response(3)
+    assert etag != stale_etag
+    assert body != stale_body
+    assert json.loads(body)["summary"] == service.get_grid(3)["summary"]
+
+
+def test_grid_response_waits_for_integration_in_progress(monkeypatch):
+    import threading
+
+    monkeypatch.delenv("GEMINI_API_KEY", raising=False)
+    service = LinusService()
+    _, etag = service.get_grid_response(3)
+    read = []
+    with service._integrate_lock:
+        reader = threading.Thread(target=lambda: read.append(service.get_grid_response(3)))
+        reader.start()
+        reader.join(timeout=0.1)
+        assert not read
+        service._integrator.cell(3).version += 1
+    reader.join(timeout=2)
+    assert read and read[0][1] != etag
+
+
+def test_grid_items_are_cursor_paginated_newest_first(monkeypatch):
+    monkeypatch.delenv("GEMINI_API_KEY", raising=False)
+    service = LinusService()
+    texts = ["合約 SOW 條款。", "品牌定位要清楚。", "收入模式與商業差異。", "品牌合約收入。"]
+    for index, text in enumerate(texts):
+        service.post_segments({"segments": [{"segment_id": f"seg-{index}", "source": "m", "text": text}]})
+    inserted = [entry["segment_id"] for entry in service.get_grid(3)["entries"]]
+
+    first = service.get_grid_items(3, "entries", limit=2)
+    assert [item["segment_id"] for item in first["items"]] == inserted[::-1][:2]
+    assert first["total"] == len(inserted) and first["prev_cursor"] is None
+
+    second = service.get_grid_items(3, "entries", limit=2, before=first["next_cursor"])
+    assert [item["segment_id"] for item in second["items"]] == inserted[::-1][2:4]
+
+    back = service.get_grid_items(3, "entries", limit=2, after=second["prev_cursor"])
+    assert back["items"] == first["items"]
+
+    overview = service.get_grids_overview(latest=1)
+    grid = next(item for item in overview["grids"] if item["grid_id"] == 3)
+    assert grid["entry_count"] == len(inserted)
+    assert [entry["segment_id"] for entry in grid["entries"]] == inserted[-1:]
+
+    with pytest.raises(ValueError):
+        service.get_grid_items(3, "entries", before="not-a-cursor")
+
+
+def test_multi_segment_post_classifies_in_one_gemini_batch(gemini_stub):
+    batch_answer = [
+        {"index": 0, "primary": {"grid": 3, "confidence": 0.9}, "related_keywords": ["合約"]},
+        {"index": 1, "oops": True},
+        {"index": 2, "primary": {"grid": 8, "confidence": 0.85}, "secondary": [{"grid": 6, "confidence": 0.6}]},
+    ]
+    single_answer = {"primary": {"grid": 2, "confidence": 0.8}}
+    gemini_stub.respond = lambda payload: (
+        batch_answer if len(payload["contents"][0]["parts"]) == 3 else single_answer
+    )
+
+    service = LinusService()
+    response = service.post_segments(
+        {
+            "segments": [
+                {"segment_id": "seg-a", "source": "meeting", "text": "合約 SOW 條款需要補上。"},
+                {"segment_id": "seg-b", "source": "meeting", "text": "教練分潤與教案支援需要釐清。"},
+                {"segment_id": "seg-c", "source": "meeting", "text": "付款流程 SOP 要加上提醒。"},
+            ]
+        }
+    )
+
+    # One batch request, then a single retry for the malformed item.
+    assert [len(payload["contents"][0]["parts"]) for payload in gemini_stub.requests] == [3, 2]
+    primaries = [result["grid_assignments"][0]["grid_id"] for result in response["results"]]
+    assert primaries == [3, 2, 8]
+    assert all(result["classifier"] == "gemini" for result in response["results"])
+
+
+def test_concurrent_classification_integrates_in_segment_order(gemini_stub, monkeypatch):
+    import threading
+    import time
+
+    grids = {"合約": 3, "付款": 8, "教練": 2, "品牌": 7}
+    in_flight = []
+    peak = []
+    lock = threading.Lock()
+
+    def respond(payload):
+        paragraph = gemini_stub.paragraphs(payload)
+        grid = next(grid for keyword, grid in grids.items() if keyword in paragraph)
+        with lock:
+            in_flight.append(grid)
+            peak.append(len(in_flight))
+        # Earlier segments answer last, so completion order is the reverse of segment order.
+        time.sleep(0.01 * (10 - grid))
+        with lock:
+            in_flight.remove(grid)
+        return {"primary": {"grid": grid, "confidence": 0.9}}
+
+    gemini_stub.respond = respond
+    monkeypatch.setenv("GEMINI_BATCH_SIZE", "1")
+    monkeypatch.setenv("LINUS_CLASSIFY_CONCURRENCY", "3")
+    service = LinusService()
+    texts = ["合約條款", "付款提醒", "教練分潤", "品牌定位"]
+    response = service.post_segments(
+        {"segments": [{"segment_id": f"seg-{i}", "source": "meeting", "text": text} for i, text in enumerate(texts)]}
+    )
+
+    assert [result["grid_assignments"][0]["grid_id"] for result in response["results"]] == [3, 8, 2, 7]
+    assert [result["segment_id"] for result in response["results"]] == ["seg-0", "seg-1", "seg-2", "seg-3"]
+    assert 1 < max(peak) <= 3
+
+
+def test_open_circuit_routes_straight_to_rule_based(gemini_stub, monkeypatch):
+    gemini_stub.respond = lambda payload: (500, b"{}", {"Retry-After": "0"})
+    monkeypatch.setenv("GEMINI_BREAKER_THRESHOLD", "1")
+    service = LinusService()
+    first = service.post_segments({"segments": [{"segment_id": "seg-1", "text": "合約 SOW 條款需要補上。"}]})
+    assert first["classifier_circuit"] == "open"
+    assert first["results"][0]["classifier"] == "rule_based_fallback"
+    calls = len(gemini_stub.requests)
+
+    second = service.post_segments({"segments": [{"segment_id": "seg-2", "text": "付款流程 SOP 要加上提醒。"}]})
+    assert len(gemini_stub.requests) == calls
+    assert "circuit open" in second["results"][0]["error"]
+    assert service.get_stats()["classification"]["circuit"]["rejected_calls"] == 1
+
+
+def test_bulk_posts_past_the_quota_deadline_fall_back(gemini_stub, monkeypatch):
+    monkeypatch.setenv("GEMINI_RPM", "1")
+    monkeypatch.setenv("GEMINI_QUOTA_DEADLINE_BULK", "5")
+    monkeypatch.setenv("LINUS_CLASSIFY_CACHE", "0")
+    service = LinusService()
+    first = service.post_segments({"segments": [{"segment_id": "seg-1", "text": "合約 SOW 條款需要補上。"}]})
+    assert first["results"][0]["classifier"] == "gemini"
+
+    second = service.post_segments(
+        {"priority": "bulk", "segments": [{"segment_id": "seg-2", "text": "付款流程 SOP 要加上提醒。"}]}
+    )
+    assert len(gemini_stub.requests) == 1
+    assert second["results"][0]["classifier"] == "rule_based_fallback"
+    assert "quota" in second["results"][0]["error"]
+    assert second["classifier_circuit"] == "closed"
+    assert service.get_stats()["classification"]["quota"]["rejected"]["bulk"] == 1
+    with pytest.raises(ValueError):
+        service.post_segments({"priority": "urgent", "segments": []})
+
+
+def test_shadow_classifier_is_compared_but_never_integrated(gemini_stub, monkeypatch):
+    gemini_stub.respond = lambda payload: {"primary": {"grid": 5, "confidence": 0.9}}
+    monkeypatch.setenv("LINUS_SHADOW_CLASSIFIER", "rule_based")
+    service = LinusService()
+    response = service.post_segments(
+        {
+            "segments": [
+                {"segment_id": "seg-1", "text": "合約 SOW 條款需要補上。"},
+                {"segment_id": "seg-2", "text": "教練分潤與教案支援需要釐清。"},
+            ]
+        }
+    )
+    assert [result["grid_assignments"][0]["grid_id"] for result in response["results"]] == [5, 5]
+    assert service._shadow.flush(timeout=5)
+
+    stats = service.get_shadow_stats()
+    assert stats["enabled"] and stats["shadow"] == "rule_based"
+    assert stats["compared"] == 2 and stats["agreed"] == 0
+    assert sum(stats["disagreements"].values()) == 2
+    assert all(key.startswith("5->") for key in stats["disagreements"])
+    assert stats["avg_abs_confidence_delta"] >= abs(stats["avg_confidence_delta"])
+    assert stats["latency_ms"]["primary_p50"] > 0
+    assert len(service.get_grid(5)["entries"]) == 2
+    assert not service.get_grid(3)["entries"]
+
+
+def test_cascade_escalates_only_ambiguous_paragraphs(gemini_stub, monkeypatch):
+    gemini_stub.respond = lambda payload: {"primary": {"grid": 7, "confidence": 0.9}}
+    monkeypatch.setenv("LINUS_CLASSIFIER", "cascade")
+    service = LinusService()
+    response = service.post_segments(
+        {
+            "segments": [
+                {"segment_id": "seg-clear", "text": "合約 SOW 條款需要補上。"},
+                {"segment_id": "seg-vague", "text": "品牌啟動會議鎖定冬季檔期。"},
+            ]
+        }
+    )
+
+    decided = [(result["classifier"], result["grid_assignments"][0]["grid_id"]) for result in response["results"]]
+    assert decided == [("rule_based", 3), ("gemini", 7)]
+    assert len(gemini_stub.requests) == 1
+    assert "合約" not in gemini_stub.paragraphs(gemini_stub.requests[0])
+    assert service.get_stats()["classification"]["cascade"]["decided_by"] == {"rule_based": 1, "gemini": 1}
+
+
+@pytest.mark.parametrize(
+    ("primary", "fallback", "expected"),
+    [("rule_based", "ngram", "rule_based"), ("", "ngram", "ngram"), ("ngram", "rule_based", "ngram")],
+)
+def test_classifier_name_follows_configuration(monkeypatch, primary, fallback, expected):
+    monkeypatch.delenv("GEMINI_API_KEY", raising=False)
+    monkeypatch.setenv("LINUS_CLASSIFIER", primary)
+    monkeypatch.setenv("LINUS_FALLBACK_CLASSIFIER", fallback)
+    service = LinusService()
+    assert service.get_stats()["classifier"] == expected
+    response = service.post_segments({"segments": [{"segment_id": "seg-agr", "text": "合約 SOW 條款需要補上。"}]})
+    # Until the n-gram model is trained the keyword rules inside its cascade decide.
+    assert response["results"][0]["classifier"] == "rule_based"
+
+
+def test_ngram_classifier_trains_from_stored_entries(monkeypatch):
+    monkeypatch.delenv("GEMINI_API_KEY", raising=False)
+    monkeypatch.setenv("LINUS_CLASSIFIER", "ngram")
+    monkeypatch.setenv("LINUS_NGRAM_MIN_EXAMPLES", "3")
+    service = LinusService()
+    texts = ["合約 SOW 條款需要立即補進合作文件中。", "付款流程 SOP 要加上提醒。", "教練分潤與教案支援需要釐清。"]
+    first = service.post_segments(
+        {"segments": [{"segment_id": f"seg-{i}", "text": text} for i, text in enumerate(texts)]}
+    )
+    assert {result["classifier"] for result in first["results"]} == {"rule_based"}
+    assert service.get_stats()["classifier"] == "ngram"
+
+    # New entries are learned as they are filed...
+    follow_up = service.post_segments({"segments": [{"segment_id": "seg-x", "text": "教練教案"}]})
+    assert follow_up["results"][0]["classifier"] == "ngram"
+    assert follow_up["results"][0]["grid_assignments"][0]["grid_id"] == 2
+
+    # ...and a restarted service retrains from the store.
+    restarted = LinusService()
+    assert restarted.get_stats()["classification"]["ngram"]["examples"] == 3
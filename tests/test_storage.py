@@ -0,0 +1,230 @@
+import gzip
+import json
+from unittest import mock
+
+import pytest
+
+from linus_app import LinusService
+from linus_app.archive import LogArchive
+from linus_app.storage import PersistentStore
+
+
+@pytest.fixture(autouse=True)
+def isolated_store(tmp_path, monkeypatch):
+    monkeypatch.setenv("LINUS_STATE_PATH", str(tmp_path / "linus_state.json"))
+    monkeypatch.setenv("LINUS_SAVE_DEBOUNCE", "0")
+    monkeypatch.delenv("GEMINI_API_KEY", raising=False)
+    yield
+
+
+def _post(service, segment_id, text):
+    return service.post_segments(
+        {"segments": [{"segment_id": segment_id, "source": "meeting", "text": text}]}
+    )
+
+
+def test_journal_mode_appends_and_replays(tmp_path, monkeypatch):
+    monkeypatch.setenv("LINUS_STORAGE_MODE", "journal")
+    service = LinusService()
+    _post(service, "seg-agr", "合約 SOW 條款需要立即補進合作文件中。")
+    _post(service, "seg-coach", "教練分潤與教案支援需要釐清。")
+
+    journal_path = tmp_path / "linus_state.json.journal"
+    records = [json.loads(line) for line in journal_path.read_text(encoding="utf-8").splitlines()]
+    assert [record["seq"] for record in records] == list(range(1, len(records) + 1))
+    assert {record["op"] for record in records} == {"entry", "summary", "log"}
+
+    restarted = LinusService()
+    assert any(entry["segment_id"] == "seg-agr" for entry in restarted.get_grid(3)["entries"])
+    assert restarted.get_grid(3)["summary"] == service.get_grid(3)["summary"]
+    assert restarted.get_segment_log("seg-coach")["history"][0]["action"] == "inserted"
+
+
+def test_compaction_folds_journal_into_checkpoint(tmp_path, monkeypatch):
+    monkeypatch.setenv("LINUS_STORAGE_MODE", "journal")
+    service = LinusService()
+    _post(service, "seg-agr", "合約 SOW 條款需要立即補進合作文件中。")
+
+    store = PersistentStore(tmp_path / "linus_state.json", journal=True)
+    store.compact()
+    assert not (tmp_path / "linus_state.json.journal").exists()
+    checkpoint = json.loads((tmp_path / "linus_state.json").read_text(encoding="utf-8"))
+    assert checkpoint["journal_seq"] > 0
+
+    _post(service, "seg-pay", "付款流程 SOP 要加上提醒。")
+    restarted = LinusService()
+    assert any(entry["segment_id"] == "seg-agr" for entry in restarted.get_grid(3)["entries"])
+    assert any(entry["segment_id"] == "seg-pay" for entry in restarted.get_grid(8)["entries"])
+    assert len(restarted.get_segment_log("seg-agr")["history"]) == 1
+
+
+def test_snapshot_save_only_reencodes_dirty_parts(tmp_path, monkeypatch):
+    from linus_app import storage
+
+    service = LinusService()
+    _post(service, "seg-agr", "合約 SOW 條款需要立即補進合作文件中。")
+
+    encoded_cells = []
+    original = storage._cell_to_dict
+    monkeypatch.setattr(storage, "_cell_to_dict", lambda cell: encoded_cells.append(cell) or original(cell))
+    _post(service, "seg-pay", "付款流程 SOP 要加上提醒。")
+
+    assert [cell.definition.grid_id for cell in encoded_cells] == [8]
+    state = json.loads((tmp_path / "linus_state.json").read_text(encoding="utf-8"))
+    assert set(state["logs"]) == {"seg-agr", "seg-pay"}
+    assert state["cells"]["3"]["entries"][0]["segment_id"] == "seg-agr"
+
+
+def test_sqlite_store_loads_cells_and_logs_lazily(tmp_path, monkeypatch):
+    db_path = tmp_path / "linus.db"
+    monkeypatch.setenv("LINUS_STATE_PATH", f"sqlite:///{db_path}")
+    service = LinusService()
+    _post(service, "seg-agr", "合約 SOW 條款需要立即補進合作文件中。")
+    _post(service, "seg-review", "需要再想想，暫時沒有具體分類。")
+    assert db_path.exists()
+
+    restarted = LinusService()
+    integrator = restarted._integrator
+    assert integrator.cells[3].entries == []
+    assert restarted.get_grid(3)["entries"][0]["segment_id"] == "seg-agr"
+    assert restarted.get_grid(3)["summary"] == service.get_grid(3)["summary"]
+    assert restarted.get_segment_log("seg-review")["history"][0]["action"] == "marked_review"
+    assert "seg-review" not in integrator.logs
+
+    _post(restarted, "seg-agr", "教練分潤與教案支援需要釐清。")
+    assert [item["action"] for item in restarted.get_segment_log("seg-agr")["history"]] == [
+        "inserted",
+        "inserted",
+    ]
+    exported = restarted.export_state()
+    assert len(exported["logs"]["seg-agr"]) == 2
+
+
+def test_binary_snapshot_materializes_cells_on_demand(tmp_path, monkeypatch):
+    snap_path = tmp_path / "linus_state.snap"
+    monkeypatch.setenv("LINUS_STATE_PATH", str(snap_path))
+    service = LinusService()
+    _post(service, "seg-agr", "合約 SOW 條款需要立即補進合作文件中。")
+    _post(service, "seg-pay", "付款流程 SOP 要加上提醒。")
+    assert snap_path.read_bytes().startswith(b"LNSNAP1\n")
+
+    restarted = LinusService()
+    assert restarted._integrator.cells[3].entries == []
+    assert restarted.get_grid(3)["entries"][0]["segment_id"] == "seg-agr"
+    assert restarted._integrator.cells[8].entries == []
+
+    # A save after touching grid 3 must keep the untouched grid 8 block intact.
+    _post(restarted, "seg-brand", "品牌定位與收入模式要寫清楚。")
+    exported = restarted.export_state()
+    assert exported["cells"]["8"]["entries"][0]["segment_id"] == "seg-pay"
+    assert exported["logs"]["seg-pay"][0]["action"] == "inserted"
+
+    third = LinusService()
+    assert [entry["segment_id"] for entry in third.get_grid(3)["entries"]] == ["seg-agr", "seg-brand"]
+    assert third.get_segment_log("seg-pay")["history"][0]["action"] == "inserted"
+
+
+def test_entries_share_interned_fields():
+    from linus_app.models import GridEntry
+
+    first = GridEntry("seg-1", "".join(["meet", "ing"]), "a", "new_entry", [3, 8], 0.9, 0.0)
+    second = GridEntry("seg-2", "".join(["meet", "ing"]), "b", "new_entry", [3, 8], 0.9, 0.0)
+    assert first.source is second.source
+    assert first.related_grids is second.related_grids == (3, 8)
+    assert not hasattr(first, "__dict__")
+    assert first.created_at.isoformat() == "1970-01-01T00:00:00+00:00"
+
+
+@pytest.mark.parametrize(
+    ("state_name", "mode"),
+    [("linus_state.json", "snapshot"), ("linus_state.json", "journal"), ("linus_state.snap", "snapshot")],
+)
+def test_evicted_logs_are_archived_and_paged_back_in(tmp_path, monkeypatch, state_name, mode):
+    monkeypatch.setenv("LINUS_STATE_PATH", str(tmp_path / state_name))
+    monkeypatch.setenv("LINUS_STORAGE_MODE", mode)
+    monkeypatch.setenv("LINUS_LOG_MAX_SEGMENTS", "1")
+    service = LinusService()
+    _post(service, "seg-agr", "合約 SOW 條款需要立即補進合作文件中。")
+    _post(service, "seg-pay", "付款流程 SOP 要加上提醒。")
+
+    assert list(service._integrator.logs) == ["seg-pay"]
+    assert (tmp_path / f"{state_name}.archive").is_dir()
+    assert service.get_segment_log("seg-agr")["history"][0]["action"] == "inserted"
+
+    restarted = LinusService()
+    assert restarted.export_state()["logs"].keys() == {"seg-agr", "seg-pay"}
+    assert restarted.export_state()["logs"]["seg-agr"][0]["action"] == "inserted"
+    assert restarted.get_segment_log("seg-agr")["history"][0]["action"] == "inserted"
+
+    _post(restarted, "seg-agr", "教練分潤與教案支援需要釐清。")
+    assert len(restarted.get_segment_log("seg-agr")["history"]) == 2
+    assert len(restarted.get_segment_log("seg-pay")["history"]) == 1
+
+    # The paged-in history must survive another restart, not just the entry appended to it.
+    again = LinusService()
+    assert len(again.get_segment_log("seg-agr")["history"]) == 2
+    assert len(again.get_segment_log("seg-pay")["history"]) == 1
+    assert {key: len(history) for key, history in again.export_state()["logs"].items()} == {"seg-agr": 2, "seg-pay": 1}
+
+
+def test_archive_keeps_one_line_per_segment_and_skips_unknown_ids(tmp_path):
+    archive = LogArchive(tmp_path / "archive", buckets=1)
+    archive.spill({"seg-a": [{"action": "inserted"}], "seg-b": [{"action": "inserted"}]})
+    archive.spill({"seg-a": [{"action": "inserted"}, {"action": "merged"}]})
+    archive.spill({"seg-c": [{"action": "inserted"}]})
+
+    bucket = tmp_path / "archive" / "logs-00.jsonl.gz"
+    with gzip.open(bucket, "rt", encoding="utf-8") as fh:
+        segment_ids = [json.loads(line)["segment_id"] for line in fh]
+    assert sorted(segment_ids) == ["seg-a", "seg-b", "seg-c"]
+    assert len(archive.load("seg-a")) == 2
+
+    reopened = LogArchive(tmp_path / "archive", buckets=1)
+    assert dict(reopened.iter_all()).keys() == {"seg-a", "seg-b", "seg-c"}
+    # Ids that were never archived are answered from the startup index without opening the bucket.
+    with mock.patch("linus_app.archive.gzip.open", side_effect=AssertionError("bucket opened")):
+        assert reopened.load("seg-new") == []
+
+
+@pytest.mark.parametrize(
+    ("state_name", "mode"),
+    [("linus_state.json", "snapshot"), ("linus_state.json", "journal"), ("linus_state.snap", "snapshot")],
+)
+def test_stream_export_includes_archived_logs(tmp_path, monkeypatch, state_name, mode):
+    monkeypatch.setenv("LINUS_STATE_PATH", str(tmp_path / state_name))
+    monkeypatch.setenv("LINUS_STORAGE_MODE", mode)
+    monkeypatch.setenv("LINUS_LOG_MAX_SEGMENTS", "1")
+    service = LinusService()
+    texts = ["合約 SOW 條款需要立即補進合作文件中。", "付款流程 SOP 要加上提醒。", "教練分潤與教案支援需要釐清。"]
+    for number, text in enumerate(texts):
+        _post(service, f"seg-{number}", text)
+
+    for exporter in (service, LinusService()):
+        records = [json.loads(line) for line in b"".join(exporter.stream_export("ndjson")).splitlines()]
+        logged = sorted(record["segment_id"] for record in records if record["type"] == "log")
+        assert logged == ["seg-0", "seg-1", "seg-2"]
+
+
+@pytest.mark.parametrize("state_name", ["linus_state.json", "linus_state.snap", "sqlite"])
+def test_stream_export_filters_by_grid_and_date(tmp_path, monkeypatch, state_name):
+    location = f"sqlite:///{tmp_path / 'linus.db'}" if state_name == "sqlite" else str(tmp_path / state_name)
+    monkeypatch.setenv("LINUS_STATE_PATH", location)
+    service = LinusService()
+    _post(service, "seg-agr", "合約 SOW 條款需要立即補進合作文件中。")
+    _post(service, "seg-pay", "付款流程 SOP 要加上提醒。")
+    service = LinusService()
+
+    lines = b"".join(service.stream_export("ndjson", grid_id=3)).decode("utf-8").splitlines()
+    records = [json.loads(line) for line in lines]
+    assert [(record["type"], record["segment_id"]) for record in records] == [
+        ("entry", "seg-agr"),
+        ("log", "seg-agr"),
+    ]
+
+    assert b"".join(service.stream_export("ndjson", since="2999-01-01")) == b""
+    csv_lines = b"".join(service.stream_export("csv")).decode("utf-8").splitlines()
+    assert csv_lines[0].startswith("type,grid_id,segment_id")
+    assert len(csv_lines) == 1 + 4
+
+    with pytest.raises(ValueError):
+        service.stream_export("xml")